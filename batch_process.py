@@ -0,0 +1,216 @@
+"""
+Proses ulang arsip foto secara batch, tanpa watcher & tanpa menyalin ke uploads/.
+
+Foto dialirkan lewat tahap decode → deteksi → OCR → tulis yang masing-masing
+punya worker sendiri dan dihubungkan antrian terbatas. Progres dicatat di
+checkpoint sehingga run yang terputus bisa dilanjutkan.
+
+Contoh:
+  python batch_process.py /media/arsip/event2024
+  python batch_process.py daftar_foto.txt --dry-run
+  python batch_process.py /media/arsip --restart --detect-processes 3
+"""
+import os
+import time
+import argparse
+from collections import defaultdict
+
+from upload_ingest import is_photo
+from pipeline import Pipeline, StageStats, photo_stages, analysis_of
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "batch_checkpoint.txt")
+CHECKPOINT_EVERY = 200  # foto per commit + checkpoint
+PROGRESS_EVERY = 100
+
+
+# ===================================================
+# 📂 Sumber & checkpoint
+# ===================================================
+def iter_sources(source):
+    """Path foto dari folder (rekursif, urut) atau file daftar (satu path per baris)"""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if is_photo(name):
+                    yield os.path.abspath(os.path.join(root, name))
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith("#") and is_photo(path):
+                    yield os.path.abspath(path)
+
+
+class Checkpoint:
+    """File append-only berisi path yang hasilnya sudah ter-commit ke database"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done.update(line.rstrip("\n") for line in f if line.strip())
+
+    def __contains__(self, path):
+        return path in self.done
+
+    def record(self, paths):
+        if not paths:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(path + "\n" for path in paths)
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(paths)
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.done.clear()
+
+
+# ===================================================
+# 🏭 Batch
+# ===================================================
+def _plan(main, item):
+    """Folder tujuan yang akan dipakai, tanpa mengubah galeri (untuk --dry-run)"""
+    if item["status"] == "too_big":
+        return ["(dilewati: terlalu besar)"]
+    targets = []
+    matches = main.gallery.match(item["encodings"], tolerance=main.DEFAULT_TOLERANCE)
+    for encoding, (name, _, _) in zip(item["encodings"], matches):
+        if name is None:
+            # Cluster wajah tak dikenal yang akan menampung wajah ini (tanpa mengubahnya)
+            cid, distance = main.unknown_clusters.nearest(encoding)
+            joins = cid is not None and distance <= main.unknown_clusters.join_distance
+            name = main.unknown_clusters[cid].label if joins else "unknown (baru)"
+        targets.append(f"wajah/{name}")
+    if item["digits"]:
+        targets.append(f"angka/{item['digits']}")
+    return targets
+
+
+def run_batch(paths, dry_run=False, remove_source=False, decode_workers=2, detect_workers=1,
+              detect_processes=0, ocr_workers=1, checkpoint=None, checkpoint_every=CHECKPOINT_EVERY):
+    """Proses semua path; kembalikan ringkasan jumlah per hasil"""
+    import main
+    from database import photo_service
+    from detection_pool import DetectionPool
+
+    stats = StageStats()
+    pool = DetectionPool(detect_processes) if detect_processes else None
+    stages = photo_stages(decode_workers, detect_processes or detect_workers, detect_processes or ocr_workers, pool=pool)
+    # Urutan hasil = urutan sumber, sehingga pendaftaran wajah baru sama dengan run serial
+    items = Pipeline(stages, stats=stats).map({"path": p} for p in paths)
+    stats.register("tulis", 1)
+
+    summary = defaultdict(int)
+    pending = []  # (path, staged | None) yang barisnya belum dipastikan ter-commit
+
+    def commit_pending():
+        done = []
+        for path, staged in pending:
+            if staged is not None:
+                try:
+                    main.commit_photo(path, staged, remove_source=remove_source)
+                except Exception as e:
+                    print(f"❌ Gagal menyimpan {os.path.basename(path)}: {e}")
+                    summary["error"] += 1
+                    continue  # tidak masuk checkpoint, dicoba lagi saat resume
+            done.append(path)
+        photo_service.flush()  # baris 'failed' juga harus sudah tersimpan
+        if checkpoint is not None:
+            checkpoint.record(done)
+        pending.clear()
+
+    def record_error(path, error):
+        print(f"❌ {os.path.basename(path)}: {error}")
+        summary["error"] += 1
+        if not dry_run:
+            main.insert_photo(os.path.basename(path), "error", path, status="failed")
+            pending.append((path, None))
+
+    start = time.perf_counter()
+    processed = 0
+    try:
+        for item in items:
+            t0 = time.perf_counter()
+            path = item["path"]
+            if item.get("error") is not None:
+                record_error(path, item["error"])
+            elif dry_run:
+                targets = _plan(main, item)
+                summary["akan dipindah" if item["status"] == "ok" and targets else "tanpa hasil"] += 1
+                print(f"🔍 {path} → {', '.join(targets) or '(tidak ada wajah/angka)'}")
+            else:
+                analysis = analysis_of(item)
+                try:
+                    staged = main.stage_photo(path, analysis, remove_source=remove_source, announce=False)
+                except Exception as e:
+                    record_error(path, e)
+                else:
+                    pending.append((path, staged))
+                    if staged is not None:
+                        summary["terklasifikasi"] += 1
+                    elif item["status"] == "too_big":
+                        summary["dilewati"] += 1
+                    else:
+                        summary["tanpa hasil"] += 1
+            item.pop("image", None)
+            stats.add("tulis", time.perf_counter() - t0)
+
+            processed += 1
+            if len(pending) >= checkpoint_every:
+                commit_pending()
+            if processed % PROGRESS_EVERY == 0:
+                rate = processed / (time.perf_counter() - start)
+                print(f"⏩ {processed} foto diproses ({rate:.1f} foto/s)")
+    finally:
+        if pending:
+            commit_pending()
+        if pool:
+            pool.shutdown()
+        print(stats.report(time.perf_counter() - start))
+    return dict(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="folder arsip atau file berisi daftar path foto")
+    parser.add_argument("--dry-run", action="store_true", help="hanya laporkan tujuan tiap foto, tanpa menulis apa pun")
+    parser.add_argument("--remove-source", action="store_true", help="hapus file sumber setelah berhasil (default: arsip tetap utuh)")
+    parser.add_argument("--decode-workers", type=int, default=2)
+    parser.add_argument("--detect-workers", type=int, default=1, help="thread deteksi wajah")
+    parser.add_argument("--detect-processes", type=int, default=0, help="pakai pool proses untuk deteksi (0 = thread)")
+    parser.add_argument("--ocr-workers", type=int, default=1)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--restart", action="store_true",
+                        help="abaikan checkpoint & proses semua foto lagi (mis. setelah menambah model wajah)")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart and not args.dry_run:
+        checkpoint.reset()
+    paths = iter_sources(args.source)
+    if checkpoint.done and not args.restart:
+        print(f"♻️ Melanjutkan dari checkpoint: {len(checkpoint.done)} foto sudah selesai.")
+        paths = (p for p in paths if p not in checkpoint)
+
+    summary = run_batch(
+        paths,
+        dry_run=args.dry_run,
+        remove_source=args.remove_source,
+        decode_workers=args.decode_workers,
+        detect_workers=args.detect_workers,
+        detect_processes=args.detect_processes,
+        ocr_workers=args.ocr_workers,
+        checkpoint=None if args.dry_run else checkpoint,
+        checkpoint_every=args.checkpoint_every,
+    )
+    print("✅ Batch selesai: " + (", ".join(f"{k} {v}" for k, v in sorted(summary.items())) or "tidak ada foto baru."))
+
+
+if __name__ == "__main__":
+    main()
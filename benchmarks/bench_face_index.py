@@ -0,0 +1,79 @@
+"""
+Benchmark recall & latensi index galeri wajah: exact vs IVF.
+
+Jalankan: python benchmarks/bench_face_index.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_gallery import FaceGallery, DEFAULT_TOLERANCE
+from face_index import make_index
+
+
+def synthetic_gallery(size, dim=128, seed=0):
+    """Identitas acak (jarak antar identitas ~1.0) + query dengan noise kecil"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(size, dim)).astype(np.float32)
+    # Norma 1/sqrt(2) → jarak antar dua identitas acak ≈ 1.0
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True) * np.sqrt(2)
+    return centers
+
+
+def make_queries(gallery_vectors, count, noise=0.3, seed=1):
+    rng = np.random.default_rng(seed)
+    dim = gallery_vectors.shape[1]
+    targets = rng.integers(0, len(gallery_vectors), size=count)
+    jitter = rng.normal(size=(count, dim)).astype(np.float32)
+    jitter *= noise / np.linalg.norm(jitter, axis=1, keepdims=True)
+    # Setengah query adalah wajah baru (tidak ada di galeri)
+    fresh = synthetic_gallery(count // 2, dim, seed=seed + 1)
+    queries = np.vstack([gallery_vectors[targets[:count - len(fresh)]] + jitter[:count - len(fresh)], fresh])
+    return queries.astype(np.float32)
+
+
+def run(size, n_queries=500, batch=4):
+    vectors = synthetic_gallery(size)
+    queries = make_queries(vectors, n_queries)
+    hasil = {}
+    for kind in ("exact", "ivf"):
+        gallery = FaceGallery(index=make_index(kind))
+        t0 = time.perf_counter()
+        gallery.extend(vectors, [f"p{i}" for i in range(size)])
+        build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        matches = []
+        for start in range(0, len(queries), batch):
+            matches.extend(gallery.match(queries[start:start + batch], tolerance=DEFAULT_TOLERANCE))
+        elapsed = time.perf_counter() - t0
+        hasil[kind] = {
+            "build_s": build,
+            "ms_per_photo": elapsed / (len(queries) / batch) * 1000,
+            "names": [m[0] for m in matches],
+        }
+
+    exact_names = hasil["exact"]["names"]
+    same = sum(a == b for a, b in zip(exact_names, hasil["ivf"]["names"]))
+    print(f"\n📊 Galeri {size:,} wajah, {n_queries} query ({batch} wajah/foto)")
+    for kind in ("exact", "ivf"):
+        r = hasil[kind]
+        print(f"   {kind:<6} build {r['build_s']:.2f}s | {r['ms_per_photo']:.3f} ms/foto")
+    print(f"   recall IVF vs exact (keputusan match sama): {same / len(exact_names):.3%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark decode foto kamera: decode penuh + cv2.resize (lama) vs load_image (draft JPEG).
+
+Jalankan: python benchmarks/bench_image_loader.py [--width 6000 --height 4000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from image_loader import load_image
+
+
+def legacy_load(path):
+    """Jalur lama: face_recognition.load_image_file (PIL → RGB) lalu resize ke 800px"""
+    image = np.array(Image.open(path).convert("RGB"))
+    height, width = image.shape[:2]
+    if width > 800:
+        image = cv2.resize(image, (800, int(height * 800 / width)))
+    return image
+
+
+def make_photo(path, width, height):
+    # Gradien + noise agar ukuran JPEG mirip foto kamera
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = (x[None, :] * 0.5 + y * 0.5)
+    img = np.stack([base, base[::-1], np.full_like(base, 128)], axis=2)
+    img += rng.normal(scale=12, size=img.shape).astype(np.float32)
+    Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(path, quality=92)
+
+
+def measure(fn, path, repeat):
+    fn(path)  # pemanasan cache disk
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(path)
+    elapsed = (time.perf_counter() - t0) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kamera.jpg")
+        make_photo(path, args.width, args.height)
+        print(f"📷 {args.width}x{args.height} JPEG, {os.path.getsize(path) / 1e6:.1f} MB")
+        for label, fn in (("lama", legacy_load), ("draft", lambda p: load_image(p, max_bytes=None)[0])):
+            elapsed, peak = measure(fn, path, args.repeat)
+            print(f"   {label:<5} {elapsed * 1000:8.1f} ms | puncak alokasi NumPy {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
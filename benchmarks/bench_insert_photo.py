@@ -0,0 +1,73 @@
+"""
+Benchmark insert_photo: koneksi per insert (lama) vs koneksi persisten + group commit.
+
+Jalankan: python benchmarks/bench_insert_photo.py [--rows 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import photo_service
+from database.db_setup import init_db
+import database.db_setup as db_setup
+
+
+def legacy_insert(filename, photo_type, path, status="success"):
+    """Salinan perilaku lama: connect, insert, commit, close per baris"""
+    conn = sqlite3.connect(photo_service.DB_PATH, timeout=30)
+    conn.execute("""
+        INSERT INTO photos (filename, type, path, detected_at, status)
+        VALUES (?, ?, ?, ?, ?)
+    """, (filename, photo_type, path, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), status))
+    conn.commit()
+    conn.close()
+
+
+def run(insert, producers, rows):
+    errors = []
+
+    def produce(n):
+        try:
+            for i in range(rows // producers):
+                insert(f"bench_{n}_{i}.jpg", "wajah", "output/wajah/bench")
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(producers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    photo_service.flush()
+    elapsed = time.perf_counter() - t0
+    return rows / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        photo_service.DB_PATH = db_setup.DB_PATH = db_path
+        init_db()
+
+        for producers in (1, 2, 8):
+            for label, insert in (("lama", legacy_insert), ("batch", photo_service.insert_photo)):
+                rate, errors = run(insert, producers, args.rows)
+                info = f", {errors} error 'database is locked'" if errors else ""
+                print(f"📊 {producers} producer | {label:<5} {rate:10.0f} insert/detik{info}")
+        photo_service.close()
+
+
+if __name__ == "__main__":
+    main()
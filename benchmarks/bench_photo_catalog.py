@@ -0,0 +1,69 @@
+"""
+Benchmark daftar foto menu cetak: os.walk output/ (lama) vs katalog database per halaman.
+
+Jalankan: python benchmarks/bench_photo_catalog.py [--photos 20000 --persons 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from database import photo_service
+from photo_catalog import PhotoCatalog
+
+
+def legacy_list(output_dir):
+    """Jalur lama list_photos: telusuri seluruh folder output setiap kali"""
+    all_photos = []
+    for subdir, dirs, files in os.walk(output_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for f in files:
+            if f.lower().endswith((".jpg", ".jpeg", ".png")):
+                all_photos.append(os.path.join(subdir, f))
+    return all_photos
+
+
+def timed_ms(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=20000)
+    parser.add_argument("--persons", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = os.path.join(tmp, "output")
+        photo_service.DB_PATH = os.path.join(tmp, "katalog.db")
+        for i in range(args.photos):
+            person, bib = f"person{i % args.persons}", str(i % 997)
+            path = os.path.join(output_dir, "wajah", person, f"foto{i}.jpg")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+            bib_path = os.path.join(output_dir, "angka", bib, f"foto{i}.jpg")
+            os.makedirs(os.path.dirname(bib_path), exist_ok=True)
+            os.link(path, bib_path)
+            photo_service.insert_photo(f"foto{i}.jpg", "campuran", bib_path, persons=[person], bib=bib)
+        photo_service.flush()
+
+        catalog = PhotoCatalog(os.path.join(output_dir, ".thumbs"))
+        print(f"📸 {args.photos} foto, {args.persons} orang:")
+        print(f"   os.walk semua file     {timed_ms(lambda: legacy_list(output_dir)):9.2f} ms")
+        print(f"   katalog halaman 1      {timed_ms(lambda: catalog.page()):9.2f} ms")
+        print(f"   katalog filter orang   {timed_ms(lambda: catalog.page(person='person7')):9.2f} ms")
+        print(f"   katalog filter nomor   {timed_ms(lambda: catalog.page(bib=42)):9.2f} ms")
+        photo_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark throughput steady-state: proses serial vs Pipeline bertahap.
+
+Tahap memakai kerja nyata yang melepas GIL: decode JPEG (load_image), piramida
+gradien mirip HOG (OpenCV) sebagai pengganti HOG dlib, dan proposal teks MSER (ocr_roi).
+Dengan --real dipakai tahap asli main (butuh face_recognition & easyocr).
+
+Jalankan: python benchmarks/bench_pipeline.py [--photos 40 --resolution 12mp] [--real]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from workloads import generate, RESOLUTIONS
+from image_loader import load_image
+from ocr_roi import propose_regions
+from pipeline import Pipeline, StageStats, photo_stages
+
+
+def gradient_pyramid(gray, levels=4):
+    """Beban mirip HOG: gradien + histogram sel 8x8 di tiap level piramida"""
+    responses = []
+    level = gray
+    for _ in range(levels):
+        gx = cv2.Sobel(level, cv2.CV_32F, 1, 0)
+        gy = cv2.Sobel(level, cv2.CV_32F, 0, 1)
+        magnitude, angle = cv2.cartToPolar(gx, gy)
+        for b in range(9):
+            mask = ((angle >= b * 0.7) & (angle < (b + 1) * 0.7)).astype("float32")
+            responses.append(cv2.boxFilter(magnitude * mask, -1, (8, 8)).max())
+        level = cv2.pyrDown(level)
+    return responses
+
+
+def standin_stages(decode_workers, detect_workers, ocr_workers):
+    def decode(item):
+        item["image"], _ = load_image(item["path"])
+
+    def detect(item):
+        gray = cv2.cvtColor(item["image"], cv2.COLOR_RGB2GRAY)
+        item["gray"] = gray
+        item["locations"] = gradient_pyramid(gray)
+
+    def ocr(item):
+        item["regions"] = propose_regions(item["gray"], [])
+
+    return [("decode", decode, decode_workers), ("deteksi", detect, detect_workers), ("ocr", ocr, ocr_workers)]
+
+
+def run_serial(stages, paths):
+    t0 = time.perf_counter()
+    for path in paths:
+        item = {"path": path}
+        for _, fn, _ in stages:
+            fn(item)
+    return time.perf_counter() - t0
+
+
+def run_pipeline(stages, paths):
+    stats = StageStats()
+    t0 = time.perf_counter()
+    count = sum(1 for item in Pipeline(stages, stats=stats).map({"path": p} for p in paths) if not item.get("error"))
+    elapsed = time.perf_counter() - t0
+    assert count == len(paths)
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=40)
+    parser.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="12mp")
+    parser.add_argument("--decode-workers", type=int, default=2)
+    parser.add_argument("--detect-workers", type=int, default=2)
+    parser.add_argument("--ocr-workers", type=int, default=2)
+    parser.add_argument("--real", action="store_true", help="pakai tahap asli main (face_recognition/easyocr)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_combo = max(1, args.photos // 3)
+        photos = generate(tmp, (args.resolution,), face_counts=(0, 1, 5), per_combo=per_combo)
+        paths = [p["path"] for p in photos]
+        # Pemanasan cache disk & inisialisasi library
+        run_serial(standin_stages(1, 1, 1), paths[:2])
+
+        workers = (args.decode_workers, args.detect_workers, args.ocr_workers)
+        make = photo_stages if args.real else standin_stages
+        serial = run_serial(make(1, 1, 1), paths)
+        piped, stats = run_pipeline(make(*workers), paths)
+
+    print(f"📷 {len(paths)} foto {args.resolution}, {os.cpu_count()} core, worker decode/deteksi/ocr = {workers}")
+    print(f"   serial   : {len(paths) / serial:6.2f} foto/s ({serial:.2f}s)")
+    print(f"   pipeline : {len(paths) / piped:6.2f} foto/s ({piped:.2f}s) → {serial / piped:.2f}x")
+    print(stats.report(piped))
+
+
+if __name__ == "__main__":
+    main()
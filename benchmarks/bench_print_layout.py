@@ -0,0 +1,63 @@
+"""
+Benchmark PDF cetak massal: satu gambar per halaman per salinan (lama) vs grid multi-up.
+
+Jalankan: python benchmarks/bench_print_layout.py [--copies 20 100 --size 3x4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from workloads import make_event_photo
+from print_layout import layout_pdf
+from photo_print_menu import PHOTO_SIZES, resize_photo
+
+
+def legacy_pdf(image_path, pdf_path, copies):
+    """Jalur lama create_pdf_for_print: satu halaman A4 per salinan, skala 0.24"""
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+    img_width, img_height = Image.open(image_path).size
+    a4_width, a4_height = A4
+    for _ in range(copies):
+        x = (a4_width - img_width * 0.24) / 2
+        y = (a4_height - img_height * 0.24) / 2
+        c.drawImage(image_path, x, y, img_width * 0.24, img_height * 0.24)
+        c.showPage()
+    c.save()
+    return copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--size", choices=sorted(PHOTO_SIZES), default="3x4")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "sumber.jpg")
+        Image.fromarray(make_event_photo(4000, 3000, faces=1, bib="123")).save(source, quality=92)
+        resized = resize_photo(source, os.path.join(tmp, f"foto_{args.size}.jpg"), PHOTO_SIZES[args.size])
+
+        for copies in args.copies:
+            print(f"📄 {copies} salinan {args.size}:")
+            for label, run in (
+                ("lama", lambda path: legacy_pdf(resized, path, copies)),
+                ("grid", lambda path: layout_pdf([(resized, copies)], PHOTO_SIZES[args.size], path).sheets),
+            ):
+                path = os.path.join(tmp, f"{label}_{copies}.pdf")
+                t0 = time.perf_counter()
+                sheets = run(path)
+                elapsed = time.perf_counter() - t0
+                print(f"   {label:<5} {sheets:>4} lembar | {os.path.getsize(path) / 1024:8.1f} KB | "
+                      f"{elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
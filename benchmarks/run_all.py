@@ -0,0 +1,302 @@
+"""
+Jalankan semua benchmark dengan workload sintetis & simpan hasilnya sebagai JSON.
+
+Yang diukur: process_photo end-to-end & per tahap (butuh face_recognition/easyocr),
+decode foto, proposal OCR, pencocokan galeri di beberapa ukuran, throughput
+insert_photo, serta render cetak photo_print_menu.
+
+Jalankan: python benchmarks/run_all.py [--quick] [--faces-dir models/wajah]
+          [--output hasil.json] [--compare benchmarks/results/<commit lama>.json]
+Hasil default: benchmarks/results/<commit>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.append(ROOT_DIR)
+
+from workloads import generate, load_face_fixtures
+from bench_face_index import synthetic_gallery, make_queries
+from face_gallery import FaceGallery
+from face_index import make_index
+from image_loader import load_image
+from ocr_roi import propose_regions
+from database import photo_service
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def summarize(samples):
+    data = np.asarray(samples, dtype=np.float64) * 1000
+    if not len(data):
+        return {"n": 0}
+    return {
+        "n": int(len(data)),
+        "mean_ms": round(float(data.mean()), 3),
+        "p50_ms": round(float(np.percentile(data, 50)), 3),
+        "p95_ms": round(float(np.percentile(data, 95)), 3),
+        "max_ms": round(float(data.max()), 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "local", False
+
+
+# ===================================================
+# Benchmark per komponen
+# ===================================================
+def bench_decode(photos):
+    samples = defaultdict(list)
+    for photo in photos:
+        seconds, _ = timed(load_image, photo["path"])
+        samples[photo["resolution"]].append(seconds)
+    return {res: summarize(s) for res, s in samples.items()}
+
+
+def bench_ocr_proposals(photos):
+    samples = defaultdict(list)
+    for photo in photos:
+        image, _ = load_image(photo["path"])
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        seconds, _ = timed(propose_regions, gray, [])
+        samples[photo["resolution"]].append(seconds)
+    return {res: summarize(s) for res, s in samples.items()}
+
+
+def bench_gallery(sizes, queries, faces_per_photo=5):
+    results = {}
+    for size in sizes:
+        vectors = synthetic_gallery(size)
+        names = [f"person{i}" for i in range(size)]
+        query_set = make_queries(vectors, queries)
+        for kind in ("exact", "ivf"):
+            gallery = FaceGallery(index=make_index(kind))
+            build, _ = timed(gallery.extend, vectors, names)
+            samples = []
+            for i in range(0, len(query_set), faces_per_photo):
+                seconds, _ = timed(gallery.match, query_set[i:i + faces_per_photo])
+                samples.append(seconds)
+            results[f"{kind}_{size}"] = {"build_s": round(build, 3), **summarize(samples)}
+    return results
+
+
+def bench_insert(rows, tmp):
+    old_path = photo_service.DB_PATH
+    photo_service.close()
+    photo_service.DB_PATH = os.path.join(tmp, "bench_insert.db")
+    try:
+        t0 = time.perf_counter()
+        for i in range(rows):
+            photo_service.insert_photo(f"bench_{i}.jpg", "wajah", f"output/wajah/person{i % 50}/bench_{i}.jpg",
+                                       persons=[f"person{i % 50}"], bib=str(i % 300))
+        photo_service.flush()
+        elapsed = time.perf_counter() - t0
+    finally:
+        photo_service.close()
+        photo_service.DB_PATH = old_path
+    return {"rows": rows, "rows_per_s": round(rows / elapsed, 1)}
+
+
+def bench_print(photos, tmp):
+    import photo_print_menu
+
+    photo_print_menu.PRINT_READY_DIR = os.path.join(tmp, "print_ready")
+    os.makedirs(photo_print_menu.PRINT_READY_DIR, exist_ok=True)
+    renditions = photo_print_menu.RenditionCache(os.path.join(tmp, "renditions"))
+    resize, cached, pdf = defaultdict(list), defaultdict(list), defaultdict(list)
+    for photo in photos:
+        out = os.path.join(photo_print_menu.PRINT_READY_DIR, "resized.jpg")
+        seconds, _ = timed(photo_print_menu.resize_photo, photo["path"], out, photo_print_menu.PHOTO_SIZES["4x6"])
+        resize[photo["resolution"]].append(seconds)
+        # Cetak ulang foto yang sama: rendition sudah ada di cache
+        renditions.get(photo["path"], "4x6")
+        seconds, _ = timed(renditions.get, photo["path"], "4x6")
+        cached[photo["resolution"]].append(seconds)
+        seconds, _ = timed(photo_print_menu.create_pdf_for_print, out, copies=4, size_key="4x6")
+        pdf[photo["resolution"]].append(seconds)
+    return {
+        "resize_4x6": {res: summarize(s) for res, s in resize.items()},
+        "resize_4x6_cached": {res: summarize(s) for res, s in cached.items()},
+        "pdf_4_copies": {res: summarize(s) for res, s in pdf.items()},
+    }
+
+
+def _sandbox_main(tmp):
+    """Import main lalu arahkan semua folder, galeri, store, suara & DB ke folder sementara"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    from face_cache import FaceCache
+    from photo_store import PhotoStore
+    from voice_notifier import VoiceNotifier
+    from unknown_clusters import UnknownClusters
+    from rendition_cache import RenditionCache
+
+    main.WAJAH_DIR = os.path.join(tmp, "output", "wajah")
+    main.ANGKA_DIR = os.path.join(tmp, "output", "angka")
+    main.MODEL_WAJAH_DIR = os.path.join(tmp, "models", "wajah")
+    for path in (main.WAJAH_DIR, main.ANGKA_DIR, main.MODEL_WAJAH_DIR):
+        os.makedirs(path, exist_ok=True)
+    main.gallery = FaceGallery(index=make_index("exact"))
+    main.face_cache = FaceCache(os.path.join(main.MODEL_WAJAH_DIR, "face_cache"))
+    main.photo_store = PhotoStore(os.path.join(tmp, "output", ".store"))
+    silent = lambda *args: None  # noqa: E731
+    main.voice = VoiceNotifier(os.path.join(tmp, "suara"), synthesize=silent, play=silent, fallback=silent)
+    main.unknown_clusters = UnknownClusters(os.path.join(tmp, "unknown_clusters.db"))
+    main.renditions = RenditionCache(os.path.join(tmp, "print_ready"))
+    main.PREFETCH_SIZES = []  # render cetak di background tidak ikut diukur
+    photo_service.close()
+    photo_service.DB_PATH = os.path.join(tmp, "bench_pipeline.db")
+    return main
+
+
+def bench_process_photo(photos, tmp):
+    old_db = photo_service.DB_PATH
+    try:
+        main = _sandbox_main(tmp)
+    except ImportError as e:
+        return {"skipped": f"dependensi tidak tersedia: {e}"}
+    from metrics import metrics
+
+    metrics.enable()
+    uploads = os.path.join(tmp, "uploads")
+    os.makedirs(uploads, exist_ok=True)
+    end_to_end = defaultdict(list)
+    stage_before = metrics.snapshot()["histograms"]
+    try:
+        for photo in photos:
+            path = os.path.join(uploads, os.path.basename(photo["path"]))
+            shutil.copy(photo["path"], path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds, _ = timed(main.process_photo, path)
+            end_to_end[f"{photo['resolution']}_{photo['faces']}wajah"].append(seconds)
+            if os.path.exists(path):
+                os.remove(path)
+        photo_service.flush()
+    finally:
+        photo_service.close()
+        photo_service.DB_PATH = old_db
+
+    stages = {}
+    for (name, labels), hist in metrics.snapshot()["histograms"].items():
+        if name != "stage_seconds":
+            continue
+        before = stage_before.get((name, labels), {"count": 0, "sum": 0.0})
+        count = hist["count"] - before["count"]
+        if count:
+            stages[dict(labels)["stage"]] = {"n": count, "mean_ms": round((hist["sum"] - before["sum"]) / count * 1000, 3)}
+    return {"end_to_end": {k: summarize(v) for k, v in end_to_end.items()}, "stages": stages}
+
+
+# ===================================================
+# Perbandingan antar commit
+# ===================================================
+def _flatten(data, prefix=""):
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and key in ("mean_ms", "p95_ms", "rows_per_s"):
+            yield name, value
+
+
+def compare(old, new, threshold=0.10):
+    """Cetak metrik yang berubah > threshold; _ms makin kecil makin baik, _per_s sebaliknya"""
+    old_values = dict(_flatten(old["results"]))
+    print(f"\n🔁 Dibanding {old.get('commit')}:")
+    changed = 0
+    for name, value in _flatten(new["results"]):
+        before = old_values.get(name)
+        if not before:
+            continue
+        delta = (value - before) / before
+        if abs(delta) < threshold:
+            continue
+        better = delta < 0 if name.endswith("_ms") else delta > 0
+        print(f"   {'✅' if better else '⚠️'} {name}: {before} → {value} ({delta:+.0%})")
+        changed += 1
+    if not changed:
+        print(f"   Tidak ada perubahan > {threshold:.0%}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="workload kecil untuk cek cepat")
+    parser.add_argument("--faces-dir", default=os.path.join(ROOT_DIR, "models", "wajah"),
+                        help="folder crop wajah fixture (tanpa fixture dipakai wajah kartun)")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="file hasil lama untuk dibandingkan")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    resolutions = ("vga", "fullhd") if args.quick else ("vga", "fullhd", "12mp", "24mp")
+    gallery_sizes = (1_000, 10_000) if args.quick else (1_000, 10_000, 100_000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = load_face_fixtures(args.faces_dir)
+        print(f"🧪 Membuat workload ({len(fixtures)} fixture wajah, resolusi {', '.join(resolutions)})...")
+        photos = generate(os.path.join(tmp, "photos"), resolutions, per_combo=1 if args.quick else 3,
+                          fixtures=fixtures)
+
+        results = {}
+        for name, run in (
+            ("decode", lambda: bench_decode(photos)),
+            ("ocr_proposals", lambda: bench_ocr_proposals(photos)),
+            ("gallery_match", lambda: bench_gallery(gallery_sizes, 200 if args.quick else 1000)),
+            ("insert_photo", lambda: bench_insert(2_000 if args.quick else 20_000, tmp)),
+            ("print_render", lambda: bench_print(photos, tmp)),
+            ("process_photo", lambda: bench_process_photo(photos, tmp)),
+        ):
+            print(f"⏱️ {name}...")
+            results[name] = run()
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Hasil disimpan di {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Workload sintetis untuk benchmark: foto event dengan 0/1/N wajah & nomor dada.
+
+Wajah diambil dari folder fixture (crop wajah asli, mis. models/wajah) bila
+ada; tanpa fixture dipakai wajah kartun yang digambar sendiri. Nomor dada
+di-render dengan cv2.putText seperti di tests/test_detection.py.
+Semua acak memakai seed tetap sehingga hasil bisa dibandingkan antar commit.
+"""
+import os
+import numpy as np
+from PIL import Image
+import cv2
+
+RESOLUTIONS = {
+    "vga": (640, 480),
+    "fullhd": (1920, 1080),
+    "12mp": (4000, 3000),
+    "24mp": (6000, 4000),
+}
+FACE_COUNTS = (0, 1, 5)
+
+
+def load_face_fixtures(faces_dir):
+    """Crop wajah RGB dari folder fixture (kosong bila folder tidak ada)"""
+    if not faces_dir or not os.path.isdir(faces_dir):
+        return []
+    faces = []
+    for name in sorted(os.listdir(faces_dir)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png")):
+            with Image.open(os.path.join(faces_dir, name)) as img:
+                faces.append(np.asarray(img.convert("RGB")))
+    return faces
+
+
+def draw_face(size, rng):
+    """Wajah kartun sederhana (kulit, mata, hidung, mulut) ukuran size x size"""
+    face = np.full((size, size, 3), 235, dtype=np.uint8)
+    skin = tuple(int(c) for c in rng.integers(140, 230, size=3))
+    c = size // 2
+    cv2.ellipse(face, (c, c), (int(size * 0.38), int(size * 0.48)), 0, 0, 360, skin, -1)
+    eye_y, eye_dx, eye_r = int(size * 0.4), int(size * 0.15), max(2, size // 18)
+    for dx in (-eye_dx, eye_dx):
+        cv2.circle(face, (c + dx, eye_y), eye_r, (40, 30, 30), -1)
+    cv2.line(face, (c, int(size * 0.45)), (c, int(size * 0.6)), (90, 60, 50), max(1, size // 40))
+    cv2.ellipse(face, (c, int(size * 0.7)), (int(size * 0.15), int(size * 0.05)), 0, 0, 180,
+                (120, 40, 40), max(1, size // 30))
+    return face
+
+
+def render_bib(image, number, center, width):
+    """Kotak putih bernomor hitam di dada, seperti nomor lari"""
+    height = int(width * 0.6)
+    x0, y0 = int(center[0] - width / 2), int(center[1] - height / 2)
+    h, w = image.shape[:2]
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(w, x0 + width), min(h, y0 + height)
+    cv2.rectangle(image, (x0, y0), (x1, y1), (255, 255, 255), -1)
+    scale = width / 120
+    thickness = max(1, int(scale * 2.5))
+    (tw, th), _ = cv2.getTextSize(number, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    org = (x0 + max(0, (x1 - x0 - tw) // 2), y0 + (y1 - y0 + th) // 2)
+    cv2.putText(image, number, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness)
+
+
+def make_event_photo(width, height, faces=0, bib=None, fixtures=(), seed=0):
+    """Frame RGB: latar gradien + noise, tiap orang = wajah + badan, nomor di orang pertama"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(60, 200, width, dtype=np.float32)
+    y = np.linspace(40, 180, height, dtype=np.float32)[:, None]
+    base = x[None, :] * 0.6 + y * 0.4
+    image = np.stack([base, base * 0.9, base[::-1] * 0.8], axis=2)
+    image += rng.normal(scale=10, size=image.shape).astype(np.float32)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    slots = max(1, faces)
+    face_size = max(24, min(int(height / 5), int(width / (slots * 1.6))))
+    for i in range(faces):
+        cx = int(width * (i + 1) / (faces + 1))
+        top = int(height * 0.2)
+        # Badan di bawah wajah, tempat nomor dada
+        torso_color = tuple(int(c) for c in rng.integers(0, 120, size=3))
+        cv2.rectangle(image, (cx - face_size, top + face_size), (cx + face_size, min(height - 1, top + face_size * 4)),
+                      torso_color, -1)
+        if fixtures:
+            face = cv2.resize(fixtures[int(rng.integers(len(fixtures)))], (face_size, face_size))
+        else:
+            face = draw_face(face_size, rng)
+        x0 = max(0, cx - face_size // 2)
+        region = image[top:top + face_size, x0:x0 + face_size]
+        region[:] = face[:region.shape[0], :region.shape[1]]
+        if bib and i == 0:
+            render_bib(image, bib, (cx, top + int(face_size * 2.2)), int(face_size * 1.4))
+
+    if bib and faces == 0:
+        render_bib(image, bib, (width // 2, height // 2), max(60, width // 6))
+    return image
+
+
+def generate(out_dir, resolutions=("vga", "fullhd", "12mp"), face_counts=FACE_COUNTS,
+             per_combo=2, fixtures=(), seed=0):
+    """Tulis set foto JPEG ke out_dir, kembalikan list deskripsi per foto"""
+    os.makedirs(out_dir, exist_ok=True)
+    photos = []
+    n = 0
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+        for faces in face_counts:
+            for k in range(per_combo):
+                bib = str(100 + n) if k % 2 == 0 else None
+                path = os.path.join(out_dir, f"{res}_{faces}wajah_{k}.jpg")
+                image = make_event_photo(width, height, faces, bib, fixtures, seed=seed + n)
+                Image.fromarray(image).save(path, quality=92)
+                photos.append({"path": path, "resolution": res, "faces": faces, "bib": bib})
+                n += 1
+    return photos
@@ -1,6 +1,6 @@
 import os
 import time
-import queue
+import argparse
 import threading
 import subprocess
 from datetime import datetime
@@ -9,62 +9,265 @@ from watchdog.events import FileSystemEventHandler
 from concurrent.futures import ThreadPoolExecutor
 
 # Import langsung fungsi dari main.py
-from main import process_photo
+from main import (process_photo, begin_photo, finish_photo, voice, photo_store, face_detector, face_encoder,
+                  unknown_clusters, renditions)
+from detection_pool import DetectionPool, default_worker_count
+from database import photo_service
+from dedup import DuplicateFilter
+from upload_ingest import ReadinessTracker, is_photo
+from database.work_queue import WorkQueue, PRIORITY_NORMAL, PRIORITY_MANUAL
+from metrics import metrics, METRICS_PORT
+from pipeline import Pipeline, StageStats, photo_stages, analysis_of
 
 UPLOADS_DIR = "uploads"
-MAX_WORKERS = 2  # jumlah foto yang bisa diproses bersamaan
+DUPLICATE_DIR = os.path.join(UPLOADS_DIR, "duplikat")  # foto duplikat dipindah ke sini
+NEAR_DUPLICATES = os.environ.get("CETAK_DEDUP_NEAR", "0") == "1"
+MAX_WORKERS = 2  # jumlah foto yang bisa diproses bersamaan (mode thread)
+EXECUTION_MODE = os.environ.get("CETAK_EXECUTION_MODE", "thread")  # "thread" | "process" | "pipeline"
+DECODE_WORKERS = 2  # thread decode di mode pipeline
+QUEUE_MAXSIZE = 500  # batas foto aktif di antrian sebelum ingest ditahan (backpressure)
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-# Queue untuk antrian file baru
-photo_queue = queue.Queue()
+# Antrian kerja persisten (SQLite), selamat dari crash/restart
+work_queue = WorkQueue(maxsize=QUEUE_MAXSIZE)
 stop_event = threading.Event()
 
 
+class ThroughputStats:
+    """Hitung foto/detik selama worker sibuk (untuk membandingkan mode)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.first_start = None
+        self.last_end = None
+
+    def started(self):
+        with self._lock:
+            if self.first_start is None:
+                self.first_start = time.time()
+
+    def finished(self):
+        with self._lock:
+            self.count += 1
+            self.last_end = time.time()
+
+    def report(self, mode, workers):
+        if not self.count or self.first_start is None:
+            return f"📈 Mode {mode} ({workers} worker): belum ada foto diproses."
+        elapsed = max(self.last_end - self.first_start, 1e-9)
+        return (f"📈 Mode {mode} ({workers} worker): {self.count} foto dalam {elapsed:.1f} detik "
+                f"→ {self.count / elapsed:.2f} foto/detik")
+
+
+stats = ThroughputStats()
+dedup_filter = DuplicateFilter(near_duplicates=NEAR_DUPLICATES)
+
+
+@metrics.collector
+def _pipeline_metrics():
+    """Nilai yang sudah dihitung komponen lain, dibaca hanya saat scrape"""
+    for state, count in work_queue.counts().items():
+        yield "queue_depth", count, {"state": state}
+    yield "dedup_checked", dedup_filter.checked, {}
+    yield "dedup_skipped", dedup_filter.exact_skipped, {"kind": "exact"}
+    yield "dedup_skipped", dedup_filter.near_skipped, {"kind": "near"}
+    for method, count in photo_store.link_counts.items():
+        yield "store_links", count, {"method": method}
+    yield "voice_dropped", voice.dropped, {}
+    yield "ingest_given_up", ingest.given_up, {}
+    # Batch encoding wajah: batas yang dipakai & rata-rata isi batch = chips / batches
+    yield "encode_batch_limit", face_encoder.max_batch, {}
+    yield "encode_latency_limit_seconds", face_encoder.max_latency, {}
+    yield "encode_batches", face_encoder.batches, {}
+    yield "encode_chips", face_encoder.encoded, {}
+    yield "unknown_clusters", len(unknown_clusters), {}
+    yield "rendition_cache_bytes", renditions.total_bytes, {}
+    yield "rendition_prefetch_dropped", renditions.dropped, {}
+
+
+def enqueue_photo(filepath, priority=PRIORITY_NORMAL):
+    """Masukkan foto ke antrian persisten (capture manual melewati batas antrian)"""
+    filepath = os.path.abspath(filepath)
+    if priority == PRIORITY_NORMAL and work_queue.seen(filepath):
+        return False
+    return work_queue.put(filepath, priority, bypass_bound=priority >= PRIORITY_MANUAL)
+
+
+# File baru hanya masuk antrian setelah benar-benar selesai ditulis
+ingest = ReadinessTracker(on_ready=enqueue_photo)
+
+
+def skip_duplicate(filepath, verdict, info):
+    """Pindahkan foto duplikat keluar dari uploads tanpa deteksi ulang"""
+    filename = os.path.basename(filepath)
+    os.makedirs(DUPLICATE_DIR, exist_ok=True)
+    target = os.path.join(DUPLICATE_DIR, filename)
+    os.replace(filepath, target)
+    jenis = "duplikat persis" if verdict == "duplicate" else "hampir sama"
+    print(f"[♻️] {filename} {jenis} dengan {info['original']}, deteksi dilewati.")
+    photo_service.insert_photo(filename, "duplicate", target, status="skipped")
+
+
 # =====================================
 # HANDLER FILE BARU
 # =====================================
 class UploadHandler(FileSystemEventHandler):
+    def _track(self, path, closed=False):
+        if is_photo(path) and os.path.dirname(os.path.abspath(path)) == os.path.abspath(UPLOADS_DIR):
+            ingest.touch(path, closed=closed)
+
     def on_created(self, event):
         if event.is_directory:
             return
 
         filepath = event.src_path
-        if filepath.lower().endswith((".jpg", ".jpeg", ".png")):
+        if is_photo(filepath):
             print(f"[🆕] File baru terdeteksi: {os.path.basename(filepath)}")
-            photo_queue.put(filepath)
+            self._track(filepath)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._track(event.src_path)
+
+    def on_closed(self, event):
+        if not event.is_directory:
+            self._track(event.src_path, closed=True)
+
+    def on_moved(self, event):
+        # Banyak tool menulis ke file sementara lalu rename: file tujuan sudah utuh
+        if not event.is_directory:
+            ingest.forget(event.src_path)
+            self._track(event.dest_path, closed=True)
 
 
 # =====================================
 # THREAD PEMROSESAN ANTRIAN
 # =====================================
-def worker_thread():
+def prepare_photo(filepath):
+    """Cek file & dedup; kembalikan info dedup bila foto perlu diproses, None bila dilewati"""
+    if not os.path.exists(filepath):
+        print(f"[⚠️] File hilang: {filepath}")
+        return None
+
+    # Juga untuk duplikat, agar path-nya tidak tertahan di status siap tracker
+    ingest.mark_started(filepath)
+    # Tahap dedup: foto yang isinya sudah pernah diproses tidak dideteksi ulang
+    verdict, info = dedup_filter.check(filepath)
+    if verdict != "new":
+        skip_duplicate(filepath, verdict, info)
+        return None
+    print(f"[⚙️] Memulai proses untuk {os.path.basename(filepath)}")
+    stats.started()
+    return info
+
+
+def settle_photo(filepath, info, ok):
+    """Catat hasil ke filter dedup setelah foto selesai diproses"""
+    if ok:
+        dedup_filter.remember(info, os.path.basename(filepath))
+    else:
+        dedup_filter.release(info)
+    stats.finished()
+    print(f"[✅] Selesai memproses {os.path.basename(filepath)}")
+
+
+def handle_photo(filepath, analyzer=None):
+    """Dedup lalu proses satu foto dari antrian"""
+    info = prepare_photo(filepath)
+    if info is not None:
+        settle_photo(filepath, info, process_photo(filepath, analyzer=analyzer))
+
+
+def worker_thread(analyzer=None):
     """Worker utama untuk memproses foto dari queue"""
     while not stop_event.is_set():
-        try:
-            filepath = photo_queue.get(timeout=1)
-            if os.path.exists(filepath):
-                print(f"[⚙️] Memulai proses untuk {os.path.basename(filepath)}")
-                process_photo(filepath)
-                print(f"[✅] Selesai memproses {os.path.basename(filepath)}")
-            else:
-                print(f"[⚠️] File hilang: {filepath}")
-        except queue.Empty:
+        job = work_queue.get(timeout=1)
+        if job is None:
             continue
+        if job.enqueued_at:
+            metrics.observe("queue_wait_seconds", max(0.0, time.time() - job.enqueued_at))
+        metrics.add("workers_busy", 1)
+        t0 = time.perf_counter()
+        try:
+            handle_photo(job.path, analyzer)
         except Exception as e:
             print(f"[❌] Error di worker: {e}")
+            work_queue.fail(job, e)
+        else:
+            work_queue.complete(job)
+        finally:
+            metrics.add("workers_busy", -1)
+            metrics.inc("worker_busy_seconds_total", time.perf_counter() - t0)
+
+
+# =====================================
+# MODE PIPELINE (decode, deteksi, OCR tumpang tindih)
+# =====================================
+def dispatch_jobs(pipeline):
+    """Ambil job dari antrian & masukkan ke pipeline sesuai urutan prioritas"""
+    try:
+        while not stop_event.is_set():
+            job = work_queue.get(timeout=1)
+            if job is None:
+                continue
+            if job.enqueued_at:
+                metrics.observe("queue_wait_seconds", max(0.0, time.time() - job.enqueued_at))
+            try:
+                start_time = time.time()
+                info = prepare_photo(job.path)
+                if info is not None and not begin_photo(job.path):
+                    settle_photo(job.path, info, False)
+                    info = None
+            except Exception as e:
+                print(f"[❌] Error di dispatcher: {e}")
+                work_queue.fail(job, e)
+                continue
+            if info is None:
+                work_queue.complete(job)
+                continue
+            pipeline.submit({"path": job.path, "job": job, "info": info, "start": start_time})
+    finally:
+        pipeline.close()
+
+
+def apply_results(pipeline):
+    """Terapkan hasil analisis ke galeri & DB, satu per satu sesuai urutan masuk"""
+    for item in pipeline.results():
+        job = item["job"]
+        t0 = time.perf_counter()
+        try:
+            if item.get("error") is not None:
+                ok = finish_photo(item["path"], None, item["start"], error=RuntimeError(item["error"]))
+            else:
+                ok = finish_photo(item["path"], analysis_of(item), item["start"])
+            settle_photo(item["path"], item["info"], ok)
+        except Exception as e:
+            print(f"[❌] Error menerapkan hasil: {e}")
+            work_queue.fail(job, e)
+        else:
+            work_queue.complete(job)
         finally:
-            photo_queue.task_done()
+            item.pop("image", None)
+            metrics.inc("worker_busy_seconds_total", time.perf_counter() - t0)
+
 
 # =====================================
 # PEMROSESAN FOTO LAMA (JIKA ADA)
 # =====================================
 def process_existing_photos():
-    print("\n🕵️ Mengecek foto lama di folder uploads...")
-    for file in os.listdir(UPLOADS_DIR):
-        filepath = os.path.join(UPLOADS_DIR, file)
-        if os.path.isfile(filepath) and file.lower().endswith((".jpg", ".jpeg", ".png")):
-            photo_queue.put(filepath)
-    print("✅ Pemeriksaan foto lama selesai.\n")
+    """Pulihkan antrian dari run sebelumnya, lalu antrikan hanya file yang belum dikenal"""
+    print("\n🕵️ Memulihkan antrian & mengecek foto lama di folder uploads...")
+    recovered = work_queue.recover()
+    baru = 0
+    for file in sorted(os.listdir(UPLOADS_DIR)):
+        filepath = os.path.abspath(os.path.join(UPLOADS_DIR, file))
+        if os.path.isfile(filepath) and is_photo(file) and not work_queue.seen(filepath):
+            # Tetap lewat pengecekan kelengkapan, file bisa saja terpotong saat crash
+            ingest.touch(filepath, closed=True)
+            baru += 1
+    counts = work_queue.counts()
+    print(f"✅ {recovered} job dipulihkan, {counts['queued']} menunggu, {baru} file baru ditemukan.\n")
 
 
 # =====================================
@@ -84,6 +287,8 @@ def capture_from_camera():
             stderr=subprocess.DEVNULL
         )
         print(f"[✔] Foto tersimpan di {save_path}")
+        # Capture manual langsung didahulukan dari backlog tethered
+        enqueue_photo(save_path, PRIORITY_MANUAL)
     except subprocess.CalledProcessError:
         print("⚠️ Kamera tidak terdeteksi atau belum siap.")
 
@@ -123,16 +328,53 @@ def start_watcher():
 # =====================================
 # FUNGSI UTAMA
 # =====================================
-def main():
+def main(mode=EXECUTION_MODE, workers=None, metrics_port=None, metrics_jsonl=None):
     print("🚀 Menjalankan sistem pemrosesan real-time...\n")
 
+    if metrics_jsonl:
+        metrics.enable(metrics_jsonl)
+    if metrics_port:
+        metrics.serve(metrics_port)
+
+    # Mode process: deteksi/OCR di pool proses, tiap worker memuat model sekali
+    detection_pool = None
+    analyzer = None
+    pipeline = None
+    if mode in ("process", "pipeline"):
+        detection_pool = DetectionPool(workers or default_worker_count())
+        print(f"[🧠] Memuat model di {detection_pool.workers} proses worker...")
+        detection_pool.warm_up()
+        analyzer = detection_pool.analyze
+        num_workers = detection_pool.workers
+        if mode == "pipeline":
+            # Decode di thread, deteksi & OCR di pool proses; penerapan hasil tetap urut
+            stage_stats = StageStats()
+            pipeline = Pipeline(
+                photo_stages(DECODE_WORKERS, num_workers, num_workers, pool=detection_pool),
+                stats=stage_stats,
+            )
+    elif mode == "thread":
+        num_workers = workers or MAX_WORKERS
+    else:
+        raise ValueError(f"Mode eksekusi tidak dikenal: {mode}")
+
+    # Render klip suara di thread audio sementara sistem mulai memantau
+    voice.start()
+
+    ingest.start()
     observer = start_watcher()
     process_existing_photos()
 
-    # Jalankan pool worker
-    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-    for _ in range(MAX_WORKERS):
-        executor.submit(worker_thread)
+    # Jalankan pool worker (di mode process, thread ini hanya meneruskan ke pool)
+    if pipeline:
+        executor = ThreadPoolExecutor(max_workers=2)
+        executor.submit(dispatch_jobs, pipeline)
+        executor.submit(apply_results, pipeline)
+        pipeline_start = time.perf_counter()
+    else:
+        executor = ThreadPoolExecutor(max_workers=num_workers)
+        for _ in range(num_workers):
+            executor.submit(worker_thread, analyzer)
 
     # Jalankan tethered mode di thread terpisah
     tether_thread = threading.Thread(target=tethered_listener, daemon=True)
@@ -156,19 +398,45 @@ def main():
     finally:
         # Shutdown sequence
         stop_event.set()               # beri tanda pada worker untuk berhenti
-        print("⏳ Menunggu antrian selesai...")
-        try:
-            photo_queue.join()         # tunggu sampai semua tugas dibereskan
-        except Exception:
-            pass
+        print("⏳ Menunggu foto yang sedang diproses selesai...")
+        executor.shutdown(wait=True)   # job yang belum diambil tetap aman di antrian persisten
 
-        print("🔒 Menutup executor dan watcher...")
-        executor.shutdown(wait=True)
+        print("🔒 Menutup watcher...")
+        if detection_pool:
+            detection_pool.shutdown()
+        face_detector.shutdown()
+        print("💾 Menyimpan sisa data foto ke database...")
+        photo_service.shutdown()
+        voice.stop()
+        renditions.stop()
         observer.stop()
         observer.join()
+        ingest.stop()
+        print(stats.report(mode, num_workers))
+        if pipeline:
+            print(stage_stats.report(time.perf_counter() - pipeline_start))
+        print(ingest.latency_report())
+        print(dedup_filter.report())
+        print(photo_store.report())
+        sisa = work_queue.counts()["queued"]
+        if sisa:
+            print(f"📥 {sisa} foto tetap di antrian dan akan diproses saat sistem dijalankan lagi.")
+        work_queue.close()
+        metrics.close()
         print("✅ Semua proses berhenti. Sampai jumpa!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sistem pemrosesan foto real-time")
+    parser.add_argument("--mode", choices=["thread", "process", "pipeline"], default=EXECUTION_MODE,
+                        help="thread: worker thread di satu proses; process: pool proses per core; "
+                             "pipeline: decode/deteksi/OCR bertahap & tumpang tindih di atas pool proses")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="jumlah worker (default: 2 thread, atau core-1 untuk mode process)")
+    parser.add_argument("--metrics-port", type=int, nargs="?", const=METRICS_PORT, default=None,
+                        help=f"aktifkan endpoint /metrics lokal (default port {METRICS_PORT})")
+    parser.add_argument("--metrics-jsonl", default=None, help="tulis juga setiap observasi ke file JSON lines")
+    args = parser.parse_args()
+
     # buat folder uploads jika belum ada
     os.makedirs(UPLOADS_DIR, exist_ok=True)
-    main()
+    main(args.mode, args.workers, args.metrics_port, args.metrics_jsonl)
@@ -3,23 +3,78 @@ import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
 
+SCHEMA_VERSION = 4
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def migrate(conn):
+    """Naikkan skema database ke SCHEMA_VERSION (idempoten, dicatat di user_version)"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    with conn:
+        # v1: tabel photos awal
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS photos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL,
+                type TEXT DEFAULT 'none',
+                path TEXT,
+                detected_at TEXT,
+                status TEXT DEFAULT 'pending'
+            )
+        """)
+
+        # v2: timestamp integer yang bisa diurutkan, label orang/nomor & index
+        if version < 2:
+            if "detected_ts" not in _columns(conn, "photos"):
+                conn.execute("ALTER TABLE photos ADD COLUMN detected_ts INTEGER")
+            # detected_at disimpan dalam waktu lokal → konversi ke epoch detik
+            conn.execute("""
+                UPDATE photos
+                SET detected_ts = COALESCE(CAST(strftime('%s', detected_at, 'utc') AS INTEGER), 0)
+                WHERE detected_ts IS NULL
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS photo_labels (
+                    photo_id INTEGER NOT NULL REFERENCES photos(id) ON DELETE CASCADE,
+                    kind TEXT NOT NULL,
+                    label TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_ts ON photos(detected_ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_type_ts ON photos(type, detected_ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_status ON photos(status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_filename ON photos(filename)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_labels_kind_label ON photo_labels(kind, label, photo_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_labels_photo ON photo_labels(photo_id)")
+
+        # v3: index hash konten untuk deduplikasi upload
+        if version < 3:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS photo_hashes (
+                    content_hash TEXT PRIMARY KEY,
+                    phash INTEGER,
+                    filename TEXT,
+                    first_seen INTEGER
+                )
+            """)
+
+        # v4: katalog cetak menampilkan foto sukses terbaru dulu tanpa sort seluruh tabel
+        if version < 4:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_status_ts ON photos(status, detected_ts)")
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
 def init_db():
     """Inisialisasi database dan tabel photos"""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS photos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT NOT NULL,
-            type TEXT DEFAULT 'none',
-            path TEXT,
-            detected_at TEXT,
-            status TEXT DEFAULT 'pending'
-        )
-    """)
-
-    conn.commit()
+    migrate(conn)
     conn.close()
 
 if __name__ == "__main__":
@@ -1,36 +1,370 @@
 import sqlite3
 import os
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
+from database.db_setup import migrate
+from metrics import metrics
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
 
-def insert_photo(filename, photo_type, path, status="success"):
-    """Simpan data foto baru ke database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Group commit: tulis per BATCH_SIZE baris atau tiap BATCH_INTERVAL_MS milidetik
+BATCH_SIZE = 200
+BATCH_INTERVAL_MS = 50
+
+# Kolom yang dikembalikan query (urutan sama dengan SELECT * versi lama)
+PHOTO_COLUMNS = "id, filename, type, path, detected_at, status"
+PAGE_SIZE = 500
+
+_lock = threading.RLock()
+_conn = None
+_conn_path = None
+
+
+# ===================================================
+# 🔌 Koneksi bersama
+# ===================================================
+def get_connection():
+    """Koneksi SQLite jangka panjang (thread-safe lewat _lock, mode WAL)"""
+    global _conn, _conn_path
+    with _lock:
+        if _conn is None or _conn_path != DB_PATH:
+            if _conn is not None:
+                _conn.close()
+            _conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _conn.execute("PRAGMA busy_timeout=30000")
+            _conn.execute("PRAGMA temp_store=MEMORY")
+            _conn.execute("PRAGMA cache_size=-16000")
+            _conn.execute("PRAGMA foreign_keys=ON")
+            migrate(_conn)
+            _conn_path = DB_PATH
+        return _conn
+
+
+def close():
+    """Tulis sisa antrian lalu tutup koneksi (akan dibuka lagi bila dipakai)"""
+    global _conn, _conn_path
+    flush()
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _conn_path = None
+
+
+def shutdown():
+    """Hook shutdown: pastikan semua insert tertunda sudah di-commit"""
+    close()
+
+
+# ===================================================
+# ✍️ Penulis latar belakang (group commit)
+# ===================================================
+class _PendingWrite:
+    def __init__(self, params, labels=()):
+        self.params = params
+        self.labels = labels
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self):
+        """Tunggu baris ini di-commit; lempar ulang error SQLite bila gagal"""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+
+
+class _BatchWriter(threading.Thread):
+    def __init__(self):
+        super().__init__(name="photo-db-writer", daemon=True)
+        self.pending = queue.Queue()
+        # Nomor urut tulis: flush() cukup menunggu tulis yang sudah diantrikan saat dipanggil
+        self._progress = threading.Condition()
+        self._queued = 0
+        self._written = 0
+
+    def put(self, item):
+        with self._progress:
+            self._queued += 1
+            self.pending.put(item)
+
+    def wait_queued(self):
+        """Tunggu semua tulis yang diantrikan sebelum panggilan ini, bukan sampai antrian kosong"""
+        with self._progress:
+            target = self._queued
+            self._progress.wait_for(lambda: self._written >= target)
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + BATCH_INTERVAL_MS / 1000
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        error = None
+        t0 = time.perf_counter()
+        try:
+            with _lock:
+                conn = get_connection()
+                with conn:
+                    for item in batch:
+                        cursor = conn.execute("""
+                            INSERT INTO photos (filename, type, path, detected_at, status, detected_ts)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, item.params)
+                        if item.labels:
+                            conn.executemany(
+                                "INSERT INTO photo_labels (photo_id, kind, label) VALUES (?, ?, ?)",
+                                [(cursor.lastrowid, kind, label) for kind, label in item.labels],
+                            )
+        except Exception as e:
+            # Bukan hanya sqlite3.Error: thread writer tidak boleh mati, kalau tidak
+            # flush()/close() (dan hook atexit) menunggu selamanya
+            error = e
+            print(f"❌ Gagal menyimpan {len(batch)} data foto: {e}")
+        finally:
+            try:
+                metrics.observe("db_commit_seconds", time.perf_counter() - t0)
+                metrics.inc("db_rows_total", len(batch), status="error" if error else "ok")
+            finally:
+                for item in batch:
+                    item.error = error
+                    item.done.set()
+                with self._progress:
+                    self._written += len(batch)
+                    self._progress.notify_all()
+
+
+_writer = None
+
+
+def _get_writer():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = _BatchWriter()
+            _writer.start()
+        return _writer
+
+
+def flush():
+    """Tunggu sampai semua insert yang sudah diantrikan saat ini di-commit"""
+    if _writer is not None:
+        _writer.wait_queued()
+
+
+atexit.register(shutdown)
+
+
+# ===================================================
+# 📸 API foto
+# ===================================================
+def insert_photo(filename, photo_type, path, status="success", wait=False, persons=(), bib=None):
+    """
+    Simpan data foto baru ke database.
+
+    Baris dikumpulkan dan di-commit bersama oleh writer latar belakang;
+    gunakan wait=True bila pemanggil butuh baris sudah tersimpan.
+    `persons` dan `bib` dicatat sebagai label untuk pencarian per orang/nomor.
+    Kembalikan handle tulis; handle.wait() menunggu commit bila perlu belakangan.
+    """
+    now = datetime.now()
+    labels = [("person", name) for name in dict.fromkeys(persons)]
+    if bib:
+        labels.append(("bib", bib))
+    item = _PendingWrite(
+        (filename, photo_type, path, now.strftime("%Y-%m-%d %H:%M:%S"), status, int(now.timestamp())),
+        labels,
+    )
+    _get_writer().put(item)
+    if wait:
+        item.wait()
+    return item
 
-    cursor.execute("""
-        INSERT INTO photos (filename, type, path, detected_at, status)
-        VALUES (?, ?, ?, ?, ?)
-    """, (filename, photo_type, path, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), status))
 
-    conn.commit()
-    conn.close()
+def photo_path_exists(path):
+    """True bila sudah ada baris foto dengan path ini (dipakai pemulihan store)"""
+    flush()
+    with _lock:
+        return get_connection().execute(
+            "SELECT 1 FROM photos WHERE path = ? LIMIT 1", (path,)
+        ).fetchone() is not None
+
+
+def rename_person(old_name, new_name, old_dir=None, new_dir=None):
+    """Perbarui label (dan path folder) saat unknownN dipromosikan jadi personN"""
+    flush()
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE photo_labels SET label = ? WHERE kind = 'person' AND label = ?",
+                (new_name, old_name),
+            )
+            if old_dir and new_dir:
+                prefix = old_dir.rstrip(os.sep) + os.sep
+                conn.execute(
+                    "UPDATE photos SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                    (new_dir.rstrip(os.sep) + os.sep, len(prefix) + 1, len(prefix), prefix),
+                )
+
+
+# ===================================================
+# #️⃣ Index hash konten (deduplikasi)
+# ===================================================
+def find_photo_hash(content_hash):
+    """Kembalikan (filename, first_seen) bila hash konten sudah pernah diproses"""
+    with _lock:
+        return get_connection().execute(
+            "SELECT filename, first_seen FROM photo_hashes WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+
+
+def insert_photo_hash(content_hash, filename, phash=None):
+    """Catat hash konten foto yang sudah berhasil diproses"""
+    if phash is not None and phash >= 1 << 63:
+        phash -= 1 << 64  # SQLite INTEGER bertanda 64-bit
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO photo_hashes (content_hash, phash, filename, first_seen) VALUES (?, ?, ?, ?)",
+                (content_hash, phash, filename, int(time.time())),
+            )
+
+
+def get_photo_phashes():
+    """Semua perceptual hash tersimpan sebagai list (phash, filename)"""
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT phash, filename FROM photo_hashes WHERE phash IS NOT NULL"
+        ).fetchall()
+    return [(phash % (1 << 64), filename) for phash, filename in rows]
+
+
+# ===================================================
+# 🔎 Query (keyset pagination & streaming)
+# ===================================================
+def _filters(photo_type=None, status=None, person=None, bib=None, since=None, until=None):
+    where, params = [], []
+    if photo_type is not None:
+        where.append("type = ?")
+        params.append(photo_type)
+    if status is not None:
+        where.append("status = ?")
+        params.append(status)
+    for kind, label in (("person", person), ("bib", bib)):
+        if label is not None:
+            where.append("id IN (SELECT photo_id FROM photo_labels WHERE kind = ? AND label = ?)")
+            params.extend([kind, label])
+    if since is not None:
+        where.append("detected_ts >= ?")
+        params.append(int(since))
+    if until is not None:
+        where.append("detected_ts < ?")
+        params.append(int(until))
+    return where, params
+
+
+def get_photos_page(limit=50, cursor=None, **filters):
+    """
+    Ambil satu halaman foto terbaru dulu, dengan keyset pagination.
+
+    `cursor` adalah nilai next_cursor dari halaman sebelumnya (None untuk
+    halaman pertama). Kembalikan (rows, next_cursor); next_cursor None bila
+    sudah halaman terakhir. Filter: photo_type, status, person, bib,
+    since/until (epoch detik).
+    """
+    where, params = _filters(**filters)
+    if cursor is not None:
+        where.append("(detected_ts, id) < (?, ?)")
+        params.extend(cursor)
+    sql = f"SELECT {PHOTO_COLUMNS}, detected_ts FROM photos"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY detected_ts DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    flush()
+    with _lock:
+        rows = get_connection().execute(sql, params).fetchall()
+    next_cursor = (rows[-1][-1], rows[-1][0]) if len(rows) == limit else None
+    return [row[:-1] for row in rows], next_cursor
+
+
+def iter_photos(page_size=PAGE_SIZE, **filters):
+    """Stream foto terbaru dulu per halaman tanpa memuat seluruh tabel ke memori"""
+    cursor = None
+    while True:
+        rows, cursor = get_photos_page(limit=page_size, cursor=cursor, **filters)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def get_photos_after(photo_id, limit=PAGE_SIZE, **filters):
+    """Foto dengan id > photo_id urut id naik, untuk pemrosesan inkremental (mis. thumbnail)"""
+    where, params = _filters(**filters)
+    where.append("id > ?")
+    params.extend([photo_id, limit])
+    flush()
+    with _lock:
+        return get_connection().execute(
+            f"SELECT {PHOTO_COLUMNS} FROM photos WHERE {' AND '.join(where)} ORDER BY id LIMIT ?", params
+        ).fetchall()
+
+
+def get_photo_labels(photo_ids):
+    """Label orang/nomor sekumpulan foto dalam satu query, {photo_id: [(kind, label), ...]}"""
+    photo_ids = list(photo_ids)
+    labels = {photo_id: [] for photo_id in photo_ids}
+    if not photo_ids:
+        return labels
+    with _lock:
+        rows = get_connection().execute(
+            f"SELECT photo_id, kind, label FROM photo_labels WHERE photo_id IN ({','.join('?' * len(photo_ids))}) "
+            "ORDER BY rowid",
+            photo_ids,
+        ).fetchall()
+    for photo_id, kind, label in rows:
+        labels[photo_id].append((kind, label))
+    return labels
+
 
 def get_all_photos():
-    """Ambil semua data foto"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM photos ORDER BY detected_at DESC")
-    data = cursor.fetchall()
-    conn.close()
-    return data
+    """Ambil semua data foto, terbaru dulu"""
+    return list(iter_photos())
+
 
 def get_photos_by_type(photo_type):
-    """Ambil foto berdasarkan jenis"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM photos WHERE type = ? ORDER BY detected_at DESC", (photo_type,))
-    data = cursor.fetchall()
-    conn.close()
-    return data
+    """Ambil foto berdasarkan jenis, terbaru dulu"""
+    return list(iter_photos(photo_type=photo_type))
+
+
+def get_photos_by_person(name, limit=None):
+    """Ambil foto yang memuat wajah orang tertentu (mis. person3 / unknown7)"""
+    return _take(iter_photos(person=name), limit)
+
+
+def get_photos_by_bib(bib, limit=None):
+    """Ambil foto dengan nomor dada (bib) tertentu"""
+    return _take(iter_photos(bib=str(bib)), limit)
+
+
+def _take(rows, limit):
+    if limit is None:
+        return list(rows)
+    return [row for _, row in zip(range(limit), rows)]
@@ -0,0 +1,229 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+from collections import namedtuple
+
+QUEUE_DB_PATH = os.path.join(os.path.dirname(__file__), "work_queue.db")
+
+PRIORITY_NORMAL = 0
+PRIORITY_MANUAL = 10  # capture manual 'c' didahulukan dari backlog
+
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+
+Job = namedtuple("Job", "id path priority attempts enqueued_at")
+
+
+class QueueFull(Exception):
+    """Antrian mencapai batas dan tidak ada ruang dalam waktu tunggu"""
+
+
+class WorkQueue:
+    """
+    Antrian kerja tahan crash berbasis SQLite.
+
+    Status job: queued → in_progress (dengan lease) → done / failed.
+    Job yang lease-nya habis (worker mati) diambil ulang; saat start,
+    recover() mengembalikan semua job in_progress milik run sebelumnya.
+    """
+
+    def __init__(self, db_path=QUEUE_DB_PATH, maxsize=500, lease_seconds=LEASE_SECONDS,
+                 max_attempts=MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.maxsize = maxsize
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._conn = None
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    mtime_ns INTEGER,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_until REAL,
+                    enqueued_at REAL,
+                    updated_at REAL,
+                    error TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_path
+                ON jobs(path) WHERE state IN ('queued', 'in_progress')
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(state, priority DESC, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs(path, mtime_ns)")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------------------------------------------------
+    # Producer
+    # ---------------------------------------------------
+    def put(self, path, priority=PRIORITY_NORMAL, block=True, timeout=None, bypass_bound=False):
+        """
+        Antrikan path. Bila path sudah aktif di antrian, prioritasnya hanya
+        dinaikkan. Saat antrian penuh, tunggu (backpressure) atau QueueFull.
+        Kembalikan True bila job baru dibuat.
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._changed:
+            db = self._db()
+            while True:
+                row = db.execute(
+                    "SELECT id, priority FROM jobs WHERE path = ? AND state IN ('queued', 'in_progress')", (path,)
+                ).fetchone()
+                if row:
+                    if priority > row[1]:
+                        db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row[0]))
+                    return False
+                if bypass_bound or not self.maxsize or self._active_count() < self.maxsize:
+                    break
+                if not block:
+                    raise QueueFull(path)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise QueueFull(path)
+                self._changed.wait(timeout=POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL))
+
+            now = time.time()
+            db.execute(
+                "INSERT INTO jobs (path, mtime_ns, priority, enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (path, mtime_ns, priority, now, now),
+            )
+            self._changed.notify_all()
+            return True
+
+    def seen(self, path):
+        """True bila file ini (path + mtime sama) sudah pernah diantrikan"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        with self._lock:
+            return self._db().execute(
+                "SELECT 1 FROM jobs WHERE path = ? AND mtime_ns = ? LIMIT 1", (path, mtime_ns)
+            ).fetchone() is not None
+
+    # ---------------------------------------------------
+    # Consumer
+    # ---------------------------------------------------
+    def get(self, timeout=None):
+        """Ambil job prioritas tertinggi dan pasang lease; None bila timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._claim()
+                if job:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(timeout=POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL))
+
+    def _claim(self):
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Lease kedaluwarsa = worker mati di tengah jalan
+            db.execute("""
+                UPDATE jobs SET state = 'queued', lease_owner = NULL, lease_until = NULL, updated_at = ?
+                WHERE state = 'in_progress' AND lease_until < ?
+            """, (now, now))
+            row = db.execute("""
+                SELECT id, path, priority, attempts, enqueued_at FROM jobs
+                WHERE state = 'queued' ORDER BY priority DESC, id LIMIT 1
+            """).fetchone()
+            if row:
+                db.execute("""
+                    UPDATE jobs SET state = 'in_progress', attempts = attempts + 1,
+                        lease_owner = ?, lease_until = ?, updated_at = ?
+                    WHERE id = ?
+                """, (self.owner, now + self.lease_seconds, now, row[0]))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return Job(row[0], row[1], row[2], row[3] + 1, row[4])
+
+    def complete(self, job):
+        self._finish(job, "done")
+
+    def fail(self, job, error):
+        """Job gagal: dicoba lagi sampai max_attempts, setelah itu 'failed'"""
+        state = "queued" if job.attempts < self.max_attempts else "failed"
+        self._finish(job, state, str(error))
+
+    def _finish(self, job, state, error=None):
+        with self._changed:
+            self._db().execute("""
+                UPDATE jobs SET state = ?, error = ?, lease_owner = NULL, lease_until = NULL, updated_at = ?
+                WHERE id = ?
+            """, (state, error, time.time(), job.id))
+            self._changed.notify_all()
+
+    # ---------------------------------------------------
+    # Status & pemulihan
+    # ---------------------------------------------------
+    def recover(self):
+        """Kembalikan job in_progress dari run sebelumnya ke antrian, kembalikan jumlahnya"""
+        with self._changed:
+            cursor = self._db().execute("""
+                UPDATE jobs SET state = 'queued', lease_owner = NULL, lease_until = NULL, updated_at = ?
+                WHERE state = 'in_progress' AND (lease_owner IS NULL OR lease_owner != ?)
+            """, (time.time(), self.owner))
+            self._changed.notify_all()
+            return cursor.rowcount
+
+    def _active_count(self):
+        return self._db().execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN ('queued', 'in_progress')"
+        ).fetchone()[0]
+
+    def counts(self):
+        with self._lock:
+            rows = self._db().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {"queued": 0, "in_progress": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def wait_idle(self, timeout=None, include_queued=True):
+        """Tunggu sampai tidak ada job aktif (atau hanya in_progress bila include_queued=False)"""
+        states = ("queued", "in_progress") if include_queued else ("in_progress",)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                counts = self.counts()
+                if not any(counts[s] for s in states):
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(timeout=POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL))
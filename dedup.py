@@ -0,0 +1,128 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+from database.photo_service import find_photo_hash, insert_photo_hash, get_photo_phashes
+
+HASH_CHUNK = 1 << 20  # baca file per 1 MB
+NEAR_DUPLICATE_DISTANCE = 4  # jarak Hamming maksimum dHash 64-bit
+
+
+def file_digest(path, chunk_size=HASH_CHUNK):
+    """SHA-256 isi file, dibaca bertahap tanpa memuat seluruh file"""
+    digest = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def perceptual_hash(path):
+    """dHash 64-bit dari gambar yang di-decode kecil (JPEG draft mode)"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))
+        small = img.convert("L").resize((9, 8), Image.BILINEAR)
+        pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class DuplicateFilter:
+    """
+    Tahap dedup sebelum deteksi: lewati foto yang isinya sudah pernah
+    diproses (hash SHA-256 tersimpan di database) dan, bila diaktifkan,
+    foto yang hampir sama menurut perceptual hash.
+    """
+
+    def __init__(self, near_duplicates=False, max_distance=NEAR_DUPLICATE_DISTANCE):
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._phashes = None
+        self._phash_names = []
+        self._in_flight = {}
+        self.checked = 0
+        self.exact_skipped = 0
+        self.near_skipped = 0
+        self.bytes_skipped = 0
+
+    def _load_phashes(self):
+        if self._phashes is None:
+            rows = get_photo_phashes()
+            self._phashes = np.array([p for p, _ in rows], dtype=np.uint64)
+            self._phash_names = [name for _, name in rows]
+
+    def check(self, path):
+        """
+        Kembalikan (verdict, info) dengan verdict "new", "duplicate" atau
+        "near_duplicate". `info` berisi hash untuk diteruskan ke remember()
+        atau nama file asli bila duplikat.
+        """
+        digest = file_digest(path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self.checked += 1
+            # File identik yang sedang diproses worker lain juga dianggap duplikat
+            original = self._in_flight.get(digest)
+            if original is None:
+                self._in_flight[digest] = os.path.basename(path)
+
+        if original is None:
+            existing = find_photo_hash(digest)
+            original = existing[0] if existing else None
+            if original is not None:
+                self.release({"digest": digest})
+        if original is not None:
+            with self._lock:
+                self.exact_skipped += 1
+                self.bytes_skipped += size
+            return "duplicate", {"digest": digest, "original": original}
+
+        phash = None
+        if self.near_duplicates:
+            try:
+                phash = perceptual_hash(path)
+            except Exception:
+                phash = None
+        if phash is not None:
+            with self._lock:
+                self._load_phashes()
+                if len(self._phashes):
+                    dist = np.bitwise_count(self._phashes ^ np.uint64(phash))
+                    best = int(np.argmin(dist))
+                    if dist[best] <= self.max_distance:
+                        self._in_flight.pop(digest, None)
+                        self.near_skipped += 1
+                        self.bytes_skipped += size
+                        return "near_duplicate", {"digest": digest, "original": self._phash_names[best]}
+
+        return "new", {"digest": digest, "phash": phash}
+
+    def remember(self, info, filename):
+        """Catat foto yang sudah selesai diproses ke index hash"""
+        insert_photo_hash(info["digest"], filename, info.get("phash"))
+        with self._lock:
+            if info.get("phash") is not None:
+                self._load_phashes()
+                self._phashes = np.append(self._phashes, np.uint64(info["phash"]))
+                self._phash_names.append(filename)
+            self._in_flight.pop(info["digest"], None)
+
+    def release(self, info):
+        """Lepas tanda in-flight untuk foto yang gagal diproses (boleh dicoba lagi)"""
+        with self._lock:
+            self._in_flight.pop(info["digest"], None)
+
+    def report(self):
+        skipped = self.exact_skipped + self.near_skipped
+        return (f"♻️ Dedup: {self.checked} dicek, {self.exact_skipped} duplikat persis, "
+                f"{self.near_skipped} hampir sama → {skipped} deteksi dihemat "
+                f"({self.bytes_skipped / 1_000_000:.1f} MB tidak diproses ulang)")
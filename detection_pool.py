@@ -0,0 +1,100 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def available_cores():
+    """Jumlah core yang boleh dipakai proses ini"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_worker_count():
+    # Sisakan satu core untuk proses pemilik (watcher, galeri, salin file, DB)
+    return max(1, available_cores() - 1)
+
+
+def _init_worker(threads):
+    """Dipanggil sekali per proses worker: batasi thread & muat model"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except Exception:
+        pass
+
+    # Import main memuat EasyOCR Reader & model dlib sekali per worker
+    import main  # noqa: F401
+
+
+def _analyze(filepath):
+    import main
+    return main.analyze_photo(filepath)
+
+
+def _locate(image):
+    import main
+    t0 = time.perf_counter()
+    locations = main.face_detector.locate(image)
+    return locations, time.perf_counter() - t0
+
+
+def _ocr(image, face_locations):
+    import main
+    return main.ocr_number(image, face_locations)
+
+
+class DetectionPool:
+    """
+    Pool proses untuk tahap berat (deteksi, encoding, OCR).
+
+    Worker hanya mengembalikan hasil analisis; galeri wajah tetap dimiliki
+    proses utama sehingga pendaftaran & promosi diterapkan di satu tempat.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or default_worker_count()
+        threads = max(1, available_cores() // self.workers)
+
+        # Diwarisi worker saat spawn, sebelum torch/OpenCV dimuat di sana
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ.setdefault(var, str(threads))
+        # Paralelisme sudah per foto; tile deteksi di worker dijalankan berurutan
+        os.environ.setdefault("CETAK_DETECTION_WORKERS", "1")
+        os.environ.setdefault("CETAK_ENCODE_LATENCY_MS", "0")  # tidak ada foto lain untuk ditunggu
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+
+    def warm_up(self):
+        """Paksa semua worker start & memuat model sebelum foto pertama"""
+        futures = [self._executor.submit(os.getpid) for _ in range(self.workers)]
+        return {f.result() for f in futures}
+
+    def analyze(self, filepath):
+        return self._executor.submit(_analyze, filepath).result()
+
+    def locate(self, image, timings=None):
+        """Lokasi wajah saja; encoding di-batch lintas foto oleh proses pemilik"""
+        locations, seconds = self._executor.submit(_locate, image).result()
+        if timings is not None:
+            timings["detect"] = seconds
+        return locations
+
+    def ocr(self, image, face_locations):
+        """OCR nomor dada di proses worker, kembalikan (digits, timings, sumber)"""
+        return self._executor.submit(_ocr, image, face_locations).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
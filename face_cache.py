@@ -0,0 +1,221 @@
+import os
+import json
+import struct
+import threading
+import zlib
+import numpy as np
+
+from face_gallery import ENCODING_DIM
+
+# Format index: header + record lebar tetap (nama utf-8 + crc32 baris encoding)
+INDEX_MAGIC = b"FCIDX1\x00\x00"
+INDEX_HEADER = struct.Struct("<8sI")
+INDEX_RECORD = struct.Struct("<64sI")
+NAME_WIDTH = 64
+
+
+class CacheCorruptError(ValueError):
+    """Cache wajah tidak konsisten dan perlu dibangun ulang"""
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FaceCache:
+    """
+    Cache encoding wajah di disk tanpa pickle.
+
+    - <base>.f32     : baris float32 lebar tetap, dibuka dengan np.memmap
+    - <base>.idx     : index nama + crc32 per baris, lebar tetap (rename in-place)
+    - <base>.journal : jurnal rename/replace yang di-fsync sebelum file diubah
+    """
+
+    def __init__(self, base_path, dim=ENCODING_DIM):
+        self.dim = dim
+        self.enc_path = base_path + ".f32"
+        self.idx_path = base_path + ".idx"
+        self.journal_path = base_path + ".journal"
+        self.row_bytes = dim * 4
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def exists(self):
+        return os.path.exists(self.enc_path) and os.path.exists(self.idx_path)
+
+    # ---------------------------------------------------
+    # Baca & validasi
+    # ---------------------------------------------------
+    def load(self):
+        """Map file encoding dan kembalikan (encodings_memmap, names)"""
+        with self._lock:
+            if not self.exists():
+                raise FileNotFoundError(self.enc_path)
+            self._replay_journal()
+            names, crcs = self._read_index()
+            count = len(names)
+
+            enc_size = os.path.getsize(self.enc_path)
+            if enc_size < count * self.row_bytes:
+                raise CacheCorruptError("File encoding lebih pendek dari index")
+            if enc_size > count * self.row_bytes:
+                # Append terputus sebelum record index ditulis
+                with open(self.enc_path, "r+b") as f:
+                    f.truncate(count * self.row_bytes)
+                    os.fsync(f.fileno())
+
+            if count == 0:
+                encodings = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                encodings = np.memmap(self.enc_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+                for i in range(count):
+                    if zlib.crc32(encodings[i].tobytes()) != crcs[i]:
+                        raise CacheCorruptError(f"Checksum baris {i} tidak cocok")
+
+            self._count = count
+            return encodings, names
+
+    def _read_index(self):
+        with open(self.idx_path, "rb") as f:
+            data = f.read()
+        if len(data) < INDEX_HEADER.size:
+            raise CacheCorruptError("Header index tidak lengkap")
+        magic, dim = INDEX_HEADER.unpack_from(data, 0)
+        if magic != INDEX_MAGIC or dim != self.dim:
+            raise CacheCorruptError("Header index tidak dikenali")
+
+        body = data[INDEX_HEADER.size:]
+        # Record terakhir yang terpotong dianggap belum pernah ditulis
+        usable = len(body) - len(body) % INDEX_RECORD.size
+        names, crcs = [], []
+        for off in range(0, usable, INDEX_RECORD.size):
+            raw_name, crc = INDEX_RECORD.unpack_from(body, off)
+            try:
+                names.append(raw_name.rstrip(b"\x00").decode("utf-8"))
+            except UnicodeDecodeError:
+                raise CacheCorruptError(f"Nama pada record {off // INDEX_RECORD.size} rusak")
+            crcs.append(crc)
+        if usable != len(body):
+            with open(self.idx_path, "r+b") as f:
+                f.truncate(INDEX_HEADER.size + usable)
+                os.fsync(f.fileno())
+        return names, crcs
+
+    # ---------------------------------------------------
+    # Tulis
+    # ---------------------------------------------------
+    def reset(self):
+        """Kosongkan cache (dipakai sebelum rebuild dari folder model)"""
+        with self._lock:
+            with open(self.enc_path, "wb") as f:
+                os.fsync(f.fileno())
+            with open(self.idx_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, self.dim))
+                os.fsync(f.fileno())
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            _fsync_dir(self.idx_path)
+            self._count = 0
+
+    def append(self, encoding, name):
+        """Tambahkan satu baris di akhir file, kembalikan nomor barisnya"""
+        row = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        record = INDEX_RECORD.pack(self._encode_name(name), zlib.crc32(row.tobytes()))
+        with self._lock:
+            # Encoding dulu, baru index: baris tanpa record akan dipotong saat load
+            with open(self.enc_path, "ab") as f:
+                f.write(row.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.idx_path, "ab") as f:
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+            self._count += 1
+            return self._count - 1
+
+    def rename(self, row, new_name):
+        """Ganti nama baris secara in-place lewat jurnal"""
+        with self._lock:
+            if not 0 <= row < self._count:
+                raise IndexError(row)
+            self._encode_name(new_name)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"op": "rename", "row": row, "name": new_name}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._write_name(row, new_name)
+            os.remove(self.journal_path)
+
+    def replace(self, row, encoding):
+        """Timpa encoding satu baris (anggota identitas yang diganti) lewat jurnal"""
+        data = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            if not 0 <= row < self._count:
+                raise IndexError(row)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"op": "replace", "row": row, "encoding": data.tolist()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._write_encoding(row, data)
+            os.remove(self.journal_path)
+
+    def _write_encoding(self, row, data):
+        with open(self.enc_path, "r+b") as f:
+            f.seek(row * self.row_bytes)
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # crc ada di belakang nama pada record index
+        offset = INDEX_HEADER.size + row * INDEX_RECORD.size + NAME_WIDTH
+        with open(self.idx_path, "r+b") as f:
+            f.seek(offset)
+            f.write(struct.pack("<I", zlib.crc32(data.tobytes())))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_name(self, row, name):
+        offset = INDEX_HEADER.size + row * INDEX_RECORD.size
+        with open(self.idx_path, "r+b") as f:
+            f.seek(offset)
+            f.write(self._encode_name(name).ljust(NAME_WIDTH, b"\x00"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        rows = (os.path.getsize(self.idx_path) - INDEX_HEADER.size) // INDEX_RECORD.size
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Baris jurnal terpotong: operasi belum sempat dijalankan
+                    continue
+                if not 0 <= entry.get("row", -1) < rows:
+                    continue
+                if entry.get("op") == "rename":
+                    self._write_name(entry["row"], entry["name"])
+                elif entry.get("op") == "replace":
+                    self._write_encoding(entry["row"], np.asarray(entry["encoding"], dtype=np.float32))
+        os.remove(self.journal_path)
+
+    @staticmethod
+    def _encode_name(name):
+        raw = name.encode("utf-8")
+        if len(raw) > NAME_WIDTH:
+            raise ValueError(f"Nama terlalu panjang untuk cache: {name}")
+        return raw
@@ -0,0 +1,232 @@
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+import cv2
+
+from image_loader import TARGET_WIDTH
+from metrics import metrics
+
+# "single" = satu pass HOG di frame 800px (perilaku lama)
+# "tiled"  = frame besar dipecah jadi tile bertumpuk, HOG paralel di tiap tile
+# "pyramid" = tile di beberapa level skala, wajah besar tertangkap utuh di level kasar
+STRATEGIES = ("single", "tiled", "pyramid")
+
+DETECT_WIDTH = 2400  # lebar frame untuk tiled/pyramid
+TILE_SIZE = 800
+TILE_OVERLAP = 200  # wajah sampai selebar ini pasti utuh di salah satu tile
+PYRAMID_SCALE = 2.0
+UPSAMPLE = 1  # sama dengan default face_recognition.face_locations
+NMS_OVERLAP = 0.5  # irisan / luas kotak terkecil
+TIME_BUDGET = 2.0  # detik per foto sebelum turun ke pass kasar
+COOLDOWN = 10  # foto berikutnya langsung pass kasar setelah budget terlampaui
+
+
+# ===================================================
+# 🧩 Tile, NMS & HOG per tile
+# ===================================================
+def tile_grid(height, width, tile=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Kotak (y0, x0, y1, x1) tile bertumpuk yang menutup seluruh frame"""
+    def starts(length):
+        if length <= tile:
+            return [0]
+        step = tile - overlap
+        points = list(range(0, length - tile, step))
+        return points + [length - tile]
+
+    return [(y, x, min(height, y + tile), min(width, x + tile)) for y in starts(height) for x in starts(width)]
+
+
+def pyramid_widths(width, base=TARGET_WIDTH, scale=PYRAMID_SCALE):
+    """Lebar tiap level dari frame penuh turun sampai ±base"""
+    widths = [width]
+    while widths[-1] > base * 1.25:
+        widths.append(max(base, int(widths[-1] / scale)))
+    return widths
+
+
+def nms(detections, overlap=NMS_OVERLAP):
+    """
+    Gabungkan kotak (top, right, bottom, left) dengan skor, kembalikan lokasi.
+
+    Kotak yang beririsan > overlap dari luas kotak terkecil dianggap wajah
+    yang sama; yang skornya tertinggi dipertahankan. Memakai luas terkecil
+    (bukan IoU) agar potongan wajah di tepi tile ikut tertekan oleh kotak utuh.
+    """
+    kept = []
+    for box, _ in sorted(detections, key=lambda d: d[1], reverse=True):
+        top, right, bottom, left = box
+        area = max(1, (bottom - top) * (right - left))
+        duplicate = False
+        for k_top, k_right, k_bottom, k_left in kept:
+            ih = min(bottom, k_bottom) - max(top, k_top)
+            iw = min(right, k_right) - max(left, k_left)
+            if ih > 0 and iw > 0:
+                smaller = min(area, max(1, (k_bottom - k_top) * (k_right - k_left)))
+                if ih * iw / smaller > overlap:
+                    duplicate = True
+                    break
+        if not duplicate:
+            kept.append(box)
+    return kept
+
+
+def hog_boxes(image, upsample=UPSAMPLE):
+    """HOG dlib pada satu gambar, kembalikan [((top, right, bottom, left), skor)]"""
+    import face_recognition
+
+    h, w = image.shape[:2]
+    rects, scores, _ = face_recognition.api.face_detector.run(image, upsample, 0.0)
+    return [((max(r.top(), 0), min(r.right(), w), min(r.bottom(), h), max(r.left(), 0)), float(s))
+            for r, s in zip(rects, scores)]
+
+
+def _detect_tile(tile, y0, x0, scale, upsample):
+    """Dijalankan di proses worker: HOG satu tile, kotak dipetakan ke koordinat frame"""
+    return [((int((top + y0) / scale), int((right + x0) / scale), int((bottom + y0) / scale), int((left + x0) / scale)),
+             score) for (top, right, bottom, left), score in hog_boxes(tile, upsample)]
+
+
+def _resize_width(image, width):
+    if image.shape[1] == width:
+        return image
+    return cv2.resize(image, (width, int(image.shape[0] * width / image.shape[1])), interpolation=cv2.INTER_AREA)
+
+
+# ===================================================
+# 🔍 Detektor
+# ===================================================
+class FaceDetector:
+    """
+    Deteksi wajah dengan strategi yang bisa dipilih.
+
+    `coarse(image)` adalah pass tunggal lama (lokasi di frame yang diberikan);
+    dipakai untuk strategi "single" dan sebagai cadangan bila deteksi bertile
+    melewati `budget` detik. Setelah cadangan dipakai, `cooldown` foto
+    berikutnya langsung memakai pass kasar sehingga antrean tidak makin panjang.
+    Tile dijalankan di pool proses (`workers` > 1) atau berurutan di thread pemanggil.
+    """
+
+    def __init__(self, strategy="single", coarse=None, workers=None, budget=TIME_BUDGET, cooldown=COOLDOWN,
+                 detect_width=DETECT_WIDTH, tile=TILE_SIZE, overlap=TILE_OVERLAP, upsample=UPSAMPLE,
+                 detect_tile=_detect_tile):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Strategi deteksi wajah tidak dikenal: {strategy}")
+        self.strategy = strategy
+        self.coarse = coarse or (lambda image: [box for box, _ in hog_boxes(image)])
+        self.workers = workers if workers is not None else _default_workers()
+        self.budget = budget
+        self.cooldown = cooldown
+        self.detect_width = detect_width
+        self.tile = tile
+        self.overlap = overlap
+        self.upsample = upsample
+        self._detect_tile = detect_tile
+        self._lock = threading.Lock()
+        self._executor = None
+        self._skip = 0
+
+    @property
+    def frame_width(self):
+        """Lebar decode yang dibutuhkan strategi ini"""
+        return TARGET_WIDTH if self.strategy == "single" else self.detect_width
+
+    def jobs(self, image):
+        """(tile, y0, x0, skala) untuk tiap tile di tiap level"""
+        height, width = image.shape[:2]
+        widths = pyramid_widths(width) if self.strategy == "pyramid" else [width]
+        jobs = []
+        for level_width in widths:
+            level = _resize_width(image, level_width)
+            scale = level_width / width
+            for y0, x0, y1, x1 in tile_grid(level.shape[0], level.shape[1], self.tile, self.overlap):
+                jobs.append((level[y0:y1, x0:x1], y0, x0, scale))
+        return jobs
+
+    def locate(self, image):
+        """Lokasi wajah (top, right, bottom, left) dalam koordinat `image`"""
+        if self.strategy == "single" or image.shape[1] <= TARGET_WIDTH:
+            return self.coarse(image)
+
+        with self._lock:
+            overloaded = self._skip > 0
+            if overloaded:
+                self._skip -= 1
+        if overloaded:
+            metrics.inc("detect_fallback_total", reason="cooldown")
+            return self._coarse_pass(image)
+
+        detections, complete = self._run_tiles(self.jobs(image), time.perf_counter() + self.budget)
+        if complete:
+            return nms(detections)
+
+        # Budget habis: lengkapi dengan pass kasar & turunkan foto berikutnya
+        print(f"⏱️ Deteksi bertile melewati {self.budget:.1f}s, memakai pass kasar.")
+        metrics.inc("detect_fallback_total", reason="budget")
+        with self._lock:
+            self._skip = self.cooldown
+        return nms(detections + [(box, float("inf")) for box in self._coarse_pass(image)])
+
+    def _coarse_pass(self, image):
+        small = _resize_width(image, TARGET_WIDTH)
+        scale = image.shape[1] / TARGET_WIDTH
+        return [(int(top * scale), int(right * scale), int(bottom * scale), int(left * scale))
+                for top, right, bottom, left in self.coarse(small)]
+
+    def _run_tiles(self, jobs, deadline):
+        """Kembalikan (deteksi, lengkap?); berhenti saat deadline"""
+        detections = []
+        if self.workers <= 1:
+            for job in jobs:
+                if time.perf_counter() > deadline:
+                    return detections, False
+                detections.extend(self._detect_tile(*job, self.upsample))
+            return detections, True
+
+        executor = self._pool()
+        futures = [executor.submit(self._detect_tile, *job, self.upsample) for job in jobs]
+        done, pending = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+        for future in pending:
+            future.cancel()
+        for future in done:
+            detections.extend(future.result())
+        return detections, not pending
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _default_workers():
+    from detection_pool import available_cores
+    return available_cores()
+
+
+def make_detector(strategy="single", **kwargs):
+    """Buat detektor wajah berdasarkan nama strategi ('single', 'tiled', 'pyramid')"""
+    return FaceDetector(strategy, **kwargs)
+
+
+def scale_locations(face_locations, factor):
+    """Skalakan lokasi wajah, mis. dari frame deteksi ke frame kerja 800px"""
+    if factor == 1:
+        return list(face_locations)
+    return [tuple(int(round(v * factor)) for v in loc) for loc in face_locations]
+
+
+def working_frame(image, face_locations, width=TARGET_WIDTH):
+    """Frame ±800px untuk OCR beserta lokasi wajah yang disesuaikan"""
+    if image.shape[1] <= width:
+        return image, list(face_locations)
+    small = _resize_width(image, width)
+    return small, scale_locations(face_locations, width / image.shape[1])
+
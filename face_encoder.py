@@ -0,0 +1,143 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+from metrics import metrics
+
+CHIP_SIZE = 150  # ukuran chip wajah yang diharapkan ResNet dlib
+CHIP_PADDING = 0.25
+MAX_BATCH = 16  # chip per panggilan encoder
+MAX_LATENCY = 0.02  # detik menunggu chip dari foto lain sebelum batch dijalankan
+
+
+# ===================================================
+# ✂️ Chip wajah & encoder dlib
+# ===================================================
+def face_chips(image, face_locations, size=CHIP_SIZE, padding=CHIP_PADDING):
+    """Chip wajah teralign (landmark 5 titik) seperti yang dipakai face_recognition.face_encodings"""
+    import dlib
+    import face_recognition
+
+    predictor = face_recognition.api.pose_predictor_5_point
+    chips = []
+    for top, right, bottom, left in face_locations:
+        shape = predictor(image, dlib.rectangle(left, top, right, bottom))
+        chips.append(dlib.get_face_chip(image, shape, size=size, padding=padding))
+    return chips
+
+
+def dlib_encode(chips):
+    """Satu panggilan ResNet dlib untuk sekumpulan chip, kembalikan list vektor 128-d"""
+    import face_recognition
+
+    descriptors = face_recognition.api.face_encoder.compute_face_descriptor(chips, 1)
+    return [np.asarray(d) for d in descriptors]
+
+
+class _Request:
+    __slots__ = ("chips", "created", "done", "result", "error")
+
+    def __init__(self, chips):
+        self.chips = chips
+        self.created = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# ===================================================
+# 📦 Micro-batch lintas foto
+# ===================================================
+class BatchEncoder:
+    """
+    Kumpulkan chip wajah dari beberapa foto yang sedang diproses lalu encode per batch.
+
+    Pemanggil encode() menunggu sampai batch berisi chip-nya selesai. Batch
+    dijalankan saat berisi `max_batch` chip atau saat chip tertua sudah
+    menunggu `max_latency` detik. Dengan `max_latency` 0 encode langsung di
+    thread pemanggil (mis. di proses worker yang hanya memproses satu foto).
+    """
+
+    def __init__(self, encode=dlib_encode, chips=face_chips, max_batch=MAX_BATCH, max_latency=MAX_LATENCY):
+        self._encode = encode
+        self.chips = chips
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max_latency
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._queued = 0
+        self._thread = None
+        self.batches = 0
+        self.encoded = 0
+
+    def encode(self, image, face_locations):
+        """Encoding tiap lokasi wajah di frame, urut sesuai face_locations"""
+        if not face_locations:
+            return []
+        return self.encode_chips(self.chips(image, face_locations))
+
+    def encode_chips(self, chips):
+        if not chips:
+            return []
+        if self.max_latency <= 0:
+            return self._run_batch(list(chips))
+
+        request = _Request(list(chips))
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="face-encoder", daemon=True)
+                self._thread.start()
+            self._pending.append(request)
+            self._queued += len(request.chips)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Tunggu foto lain sampai batch penuh atau chip tertua mencapai batas latensi
+                deadline = self._pending[0].created + self.max_latency
+                while self._queued < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, size = [], 0
+                while self._pending and (not batch or size + len(self._pending[0].chips) <= self.max_batch):
+                    request = self._pending.popleft()
+                    batch.append(request)
+                    size += len(request.chips)
+                self._queued -= size
+
+            now = time.perf_counter()
+            for request in batch:
+                metrics.observe("encode_wait_seconds", now - request.created)
+            try:
+                encodings = self._run_batch([chip for request in batch for chip in request.chips])
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+            start = 0
+            for request in batch:
+                request.result = encodings[start:start + len(request.chips)]
+                start += len(request.chips)
+                request.done.set()
+
+    def _run_batch(self, chips):
+        """Encode chip per potongan max_batch (foto dengan banyak wajah tetap dipecah)"""
+        encodings = []
+        for i in range(0, len(chips), self.max_batch):
+            part = chips[i:i + self.max_batch]
+            with metrics.timer("encode_batch_seconds"):
+                encodings.extend(self._encode(part))
+            self.batches += 1
+            self.encoded += len(part)
+        return encodings
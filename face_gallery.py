@@ -0,0 +1,300 @@
+import threading
+import numpy as np
+
+from face_index import ExactIndex
+
+ENCODING_DIM = 128
+DEFAULT_TOLERANCE = 0.55
+MAX_MEMBERS = 8  # embedding representatif per identitas
+REFINE_TOP = 3  # identitas dengan centroid terdekat yang dicek per anggota
+FOLD_MIN_DISTANCE = 0.2  # lebih dekat dari ini = tidak menambah variasi
+FOLD_MAX_DISTANCE = 0.4  # match seyakin ini boleh ditambahkan ke identitas
+FOLD_MIN_MARGIN = 0.1
+
+
+class FaceGallery:
+    """
+    Galeri encoding wajah dalam satu matriks float32 yang tumbuh 2x lipat.
+
+    Tiap baris adalah satu embedding; baris dengan nama yang sama membentuk
+    satu identitas dengan centroid yang dijaga (rata-rata anggotanya).
+    match() mencari centroid terdekat lebih dulu lalu memeriksa anggota
+    dari `refine` identitas teratas saja. Index (exact/IVF) bekerja di atas
+    centroid identitas.
+    """
+
+    def __init__(self, dim=ENCODING_DIM, capacity=256, index=None, max_members=MAX_MEMBERS, refine=REFINE_TOP):
+        self.dim = dim
+        self.index = index or ExactIndex()
+        self.max_members = max_members
+        self.refine = refine
+        self._lock = threading.RLock()
+        capacity = max(capacity, 1)
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._names = np.empty(capacity, dtype=object)
+        self._size = 0
+        # Identitas: centroid, nama & baris anggota
+        self._centroids = np.zeros((capacity, dim), dtype=np.float32)
+        self._c_sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._ident_names = np.empty(capacity, dtype=object)
+        self._members = []
+        self._ident_of_name = {}
+        self._multi = False  # ada identitas dengan > 1 anggota
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def encodings(self):
+        """View (tanpa copy) ke baris matriks yang terisi"""
+        return self._matrix[:self._size]
+
+    @property
+    def names(self):
+        """View (tanpa copy) ke array nama yang terisi"""
+        return self._names[:self._size]
+
+    @property
+    def identities(self):
+        return len(self._members)
+
+    @property
+    def centroids(self):
+        """View ke centroid identitas yang terisi"""
+        return self._centroids[:len(self._members)]
+
+    @staticmethod
+    def _grown(array, needed):
+        capacity = len(array)
+        if needed <= capacity:
+            return array
+        while capacity < needed:
+            capacity *= 2
+        shape = (capacity,) + array.shape[1:]
+        grown = np.empty(shape, dtype=object) if array.dtype == object else np.zeros(shape, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _grow(self, needed):
+        self._matrix = self._grown(self._matrix, needed)
+        self._sq_norms = self._grown(self._sq_norms, needed)
+        self._names = self._grown(self._names, needed)
+
+    def _grow_identities(self, needed):
+        self._centroids = self._grown(self._centroids, needed)
+        self._c_sq_norms = self._grown(self._c_sq_norms, needed)
+        self._ident_names = self._grown(self._ident_names, needed)
+
+    def _update_centroid(self, ident):
+        centroid = self._matrix[self._members[ident]].mean(axis=0)
+        self._centroids[ident] = centroid
+        self._c_sq_norms[ident] = centroid @ centroid
+
+    def add(self, encoding, name):
+        """Tambah satu wajah, kembalikan index barisnya"""
+        return self.extend([encoding], [name])[0]
+
+    def extend(self, encodings, names):
+        """Tambah banyak wajah sekaligus, kembalikan list index barisnya"""
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        names = list(names)
+        if len(names) != len(encodings):
+            raise ValueError("Jumlah encoding dan nama tidak sama")
+
+        with self._lock:
+            start = self._size
+            end = start + len(encodings)
+            self._grow(end)
+            self._matrix[start:end] = encodings
+            self._sq_norms[start:end] = np.einsum("ij,ij->i", encodings, encodings)
+            self._names[start:end] = names
+            self._size = end
+
+            first_new = len(self._members)
+            self._grow_identities(first_new + len(names))
+            touched = set()
+            for row, name in enumerate(names, start):
+                ident = self._ident_of_name.get(name)
+                if ident is None:
+                    ident = len(self._members)
+                    self._members.append([row])
+                    self._ident_names[ident] = name
+                    self._ident_of_name[name] = ident
+                else:
+                    self._members[ident].append(row)
+                    self._multi = True
+                touched.add(ident)
+            # Identitas satu anggota: centroid = baris itu sendiri (disalin sekaligus)
+            single = [k for k in touched if len(self._members[k]) == 1]
+            if single:
+                rows = [self._members[k][0] for k in single]
+                self._centroids[single] = self._matrix[rows]
+                self._c_sq_norms[single] = self._sq_norms[rows]
+            for ident in touched.difference(single):
+                self._update_centroid(ident)
+            # Centroid identitas lama ikut bergeser: arahkan ulang di index
+            moved = sorted(k for k in touched if k < first_new)
+            if moved:
+                self.index.update(moved, self._centroids[moved])
+            if len(self._members) > first_new:
+                self.index.add(first_new, self._centroids[first_new:len(self._members)], self.centroids)
+            return list(range(start, end))
+
+    def rename(self, old_name, new_name):
+        """Ganti nama identitas (mis. unknownN → personN), kembalikan index baris pertamanya"""
+        with self._lock:
+            ident = self._ident_of_name.pop(old_name)
+            self._ident_of_name[new_name] = ident
+            self._ident_names[ident] = new_name
+            self._names[self._members[ident]] = new_name
+            return self._members[ident][0]
+
+    def index_of(self, name):
+        return self.rows_of(name)[0]
+
+    def rows_of(self, name):
+        """Baris embedding milik satu identitas"""
+        ident = self._ident_of_name.get(name)
+        if ident is None:
+            raise KeyError(name)
+        return list(self._members[ident])
+
+    def fold(self, name, encoding):
+        """
+        Tambahkan embedding dari match yang yakin ke identitas `name`.
+
+        Selama anggota < max_members embedding ditambahkan sebagai baris baru.
+        Bila penuh, salah satu dari dua anggota yang paling mirip diganti,
+        sehingga variasi pencahayaan/pose tetap terwakili tanpa galeri tumbuh.
+        Kembalikan ("append" | "replace", baris), atau None bila embedding baru
+        sendiri termasuk pasangan termirip (tidak menambah variasi).
+        """
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            ident = self._ident_of_name[name]
+            members = self._members[ident]
+            if len(members) < self.max_members:
+                return "append", self.add(encoding, name)
+
+            candidates = np.vstack([self._matrix[members], encoding[None, :]])
+            diff = candidates[:, None, :] - candidates[None, :, :]
+            pairwise = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+            np.fill_diagonal(pairwise, np.inf)
+            # Pasangan terdekat: bila melibatkan embedding baru, ia tidak menambah variasi
+            i = int(np.argmin(pairwise.min(axis=1)))
+            j = int(np.argmin(pairwise[i]))
+            if len(members) in (i, j):
+                return None
+            # Dari pasangan itu, buang yang lebih dekat ke centroid (paling "biasa")
+            centroid = self._centroids[ident]
+            evict = min((i, j), key=lambda k: float(np.linalg.norm(candidates[k] - centroid)))
+            row = members[evict]
+            self._matrix[row] = encoding
+            self._sq_norms[row] = encoding @ encoding
+            self._update_centroid(ident)
+            self.index.update([ident], self._centroids[[ident]])
+            return "replace", row
+
+    def distances(self, encodings):
+        """Matriks jarak Euclidean (n_wajah x n_galeri) dalam satu perhitungan"""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            return self._distances(queries, self.encodings, self._sq_norms[:self._size])
+
+    @staticmethod
+    def _distances(queries, matrix, sq_norms):
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        sq = q_norms[:, None] + sq_norms[None, :] - 2.0 * (queries @ matrix.T)
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq)
+
+    def match(self, encodings, tolerance=DEFAULT_TOLERANCE):
+        """
+        Cocokkan semua wajah dari satu foto ke seluruh galeri.
+
+        Kembalikan list (nama | None, jarak, margin) per wajah. Jarak adalah
+        jarak ke anggota terdekat; margin adalah selisih jarak identitas kedua
+        dan terbaik (inf bila galeri < 2 identitas).
+        """
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if len(queries) == 0:
+            return []
+
+        with self._lock:
+            if self._size == 0:
+                return [(None, float("inf"), float("inf")) for _ in range(len(queries))]
+            candidates = self.index.candidates(queries)
+            if candidates is None:
+                dist = self._distances(queries, self.centroids, self._c_sq_norms[:len(self._members)])
+                if self._multi:
+                    best, best_dist, margin = self._refine(queries, dist, [None] * len(queries))
+                else:
+                    # Satu anggota per identitas: jarak centroid sudah eksak
+                    best, best_dist, margin = self._best_two(dist)
+            else:
+                best, best_dist, margin = self._best_two_candidates(queries, candidates)
+            names = self._ident_names[best]
+
+        results = []
+        for i in range(len(queries)):
+            d = float(best_dist[i])
+            name = names[i] if d <= tolerance else None
+            results.append((name, d, float(margin[i])))
+        return results
+
+    @staticmethod
+    def _best_two(dist):
+        rows = np.arange(len(dist))
+        if dist.shape[1] < 2:
+            return (np.zeros(len(dist), dtype=np.intp), dist[:, 0],
+                    np.full(len(dist), np.inf, dtype=np.float32))
+        top2 = np.argpartition(dist, 1, axis=1)[:, :2]
+        d2 = dist[rows[:, None], top2]
+        order = np.argsort(d2, axis=1)
+        best = top2[rows, order[:, 0]]
+        best_dist = d2[rows, order[:, 0]]
+        return best, best_dist, d2[rows, order[:, 1]] - best_dist
+
+    def _refine(self, queries, centroid_dist, ident_ids):
+        """Jarak anggota untuk `refine` identitas dengan centroid terdekat per wajah"""
+        best = np.zeros(len(queries), dtype=np.intp)
+        best_dist = np.full(len(queries), np.inf, dtype=np.float32)
+        margin = np.full(len(queries), np.inf, dtype=np.float32)
+        for i, ids in enumerate(ident_ids):
+            row_dist = centroid_dist[i]
+            if ids is None:
+                ids = np.arange(len(row_dist))
+            if len(ids) == 0:
+                continue
+            top = np.argsort(row_dist)[:self.refine] if len(ids) > self.refine else np.arange(len(ids))
+            idents = ids[top]
+            rows = np.concatenate([self._members[k] for k in idents])
+            owner = np.repeat(np.arange(len(idents)), [len(self._members[k]) for k in idents])
+            diff = self._matrix[rows] - queries[i]
+            member_dist = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+            per_ident = np.full(len(idents), np.inf, dtype=np.float32)
+            np.minimum.at(per_ident, owner, member_dist)
+            b, d, m = self._best_two(per_ident[None, :])
+            best[i], best_dist[i], margin[i] = idents[b[0]], d[0], m[0]
+        return best, best_dist, margin
+
+    def _best_two_candidates(self, queries, candidates):
+        """Jarak eksak, tapi hanya ke identitas kandidat dari index aproksimasi"""
+        dists = []
+        for i, ids in enumerate(candidates):
+            diff = self._centroids[ids] - queries[i]
+            dists.append(np.sqrt(np.einsum("ij,ij->i", diff, diff)))
+        if self._multi:
+            return self._refine(queries, dists, candidates)
+
+        best = np.zeros(len(queries), dtype=np.intp)
+        best_dist = np.full(len(queries), np.inf, dtype=np.float32)
+        margin = np.full(len(queries), np.inf, dtype=np.float32)
+        for i, ids in enumerate(candidates):
+            if len(ids) == 0:
+                continue
+            b, d, m = self._best_two(dists[i][None, :])
+            best[i], best_dist[i], margin[i] = ids[b[0]], d[0], m[0]
+        return best, best_dist, margin
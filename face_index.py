@@ -0,0 +1,163 @@
+import threading
+import numpy as np
+
+
+class ExactIndex:
+    """Index brute-force: semua baris galeri menjadi kandidat"""
+
+    name = "exact"
+
+    def rebuild(self, vectors):
+        pass
+
+    def add(self, start_id, vectors, all_vectors):
+        pass
+
+    def update(self, ids, vectors):
+        pass
+
+    def candidates(self, queries):
+        return None
+
+
+def kmeans(vectors, k, iterations=10, seed=0):
+    """k-means sederhana berbasis NumPy, kembalikan centroid (k x dim)"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    v_norms = np.einsum("ij,ij->i", vectors, vectors)
+    for _ in range(iterations):
+        assign = _nearest(vectors, centroids, v_norms)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=k).astype(np.float32)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Cluster kosong diisi ulang dengan titik acak agar semua list terpakai
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+    return centroids
+
+
+def _nearest(vectors, centroids, v_norms=None, chunk=8192):
+    if v_norms is None:
+        v_norms = np.einsum("ij,ij->i", vectors, vectors)
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), chunk):
+        part = vectors[start:start + chunk]
+        sq = v_norms[start:start + chunk, None] + c_norms[None, :] - 2.0 * (part @ centroids.T)
+        out[start:start + chunk] = np.argmin(sq, axis=1)
+    return out
+
+
+class IVFIndex:
+    """
+    Index aproksimasi IVF: galeri dipartisi dengan k-means, query hanya
+    memeriksa `nprobe` partisi terdekat. Jarak kandidat tetap dihitung
+    eksak oleh galeri, jadi toleransi 0.55 berlaku sama seperti brute-force.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nprobe=8, train_min=2048, max_train_sample=20_000, seed=0):
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.max_train_sample = max_train_sample
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._centroids = None
+        self._lists = []
+        self._list_of = []
+        self._arrays = {}
+        self._trained_size = 0
+        self._size = 0
+
+    @property
+    def trained(self):
+        return self._centroids is not None
+
+    def rebuild(self, vectors):
+        with self._lock:
+            self._size = len(vectors)
+            if self._size < self.train_min:
+                self._centroids = None
+                self._lists, self._list_of, self._arrays = [], [], {}
+                return
+            self._train(vectors)
+
+    def _train(self, vectors):
+        n = len(vectors)
+        nlist = max(1, int(2 * np.sqrt(n)))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if n > self.max_train_sample:
+            sample = vectors[rng.choice(n, size=self.max_train_sample, replace=False)]
+        self._centroids = kmeans(np.asarray(sample, dtype=np.float32), nlist, seed=self.seed)
+        assign = _nearest(vectors, self._centroids)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self._centroids))]
+        self._list_of = assign.tolist()
+        self._arrays = {}
+        self._trained_size = n
+
+    def add(self, start_id, vectors, all_vectors):
+        with self._lock:
+            self._size = start_id + len(vectors)
+            if not self.trained:
+                if self._size >= self.train_min:
+                    self._train(all_vectors)
+                return
+            # Latih ulang saat galeri sudah dua kali lipat sejak training terakhir
+            if self._size >= 2 * self._trained_size:
+                self._train(all_vectors)
+                return
+            assign = _nearest(np.asarray(vectors, dtype=np.float32), self._centroids)
+            for offset, list_id in enumerate(assign):
+                self._lists[list_id].append(start_id + offset)
+                self._list_of.append(int(list_id))
+                self._arrays.pop(list_id, None)
+
+    def update(self, ids, vectors):
+        """Vektor yang sudah ada berubah (centroid identitas digeser): pindahkan ke list terdekatnya"""
+        with self._lock:
+            if not self.trained:
+                return
+            assign = _nearest(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1), self._centroids)
+            for vec_id, list_id in zip(ids, assign):
+                old = self._list_of[vec_id]
+                if old == list_id:
+                    continue
+                self._lists[old].remove(vec_id)
+                self._lists[list_id].append(vec_id)
+                self._list_of[vec_id] = int(list_id)
+                self._arrays.pop(old, None)
+                self._arrays.pop(list_id, None)
+
+    def _list_array(self, list_id):
+        arr = self._arrays.get(list_id)
+        if arr is None:
+            arr = np.asarray(self._lists[list_id], dtype=np.intp)
+            self._arrays[list_id] = arr
+        return arr
+
+    def candidates(self, queries):
+        with self._lock:
+            if not self.trained:
+                return None
+            nprobe = min(self.nprobe, len(self._centroids))
+            c_norms = np.einsum("ij,ij->i", self._centroids, self._centroids)
+            sq = c_norms[None, :] - 2.0 * (queries @ self._centroids.T)
+            probes = np.argpartition(sq, nprobe - 1, axis=1)[:, :nprobe]
+            return [np.concatenate([self._list_array(l) for l in row]) for row in probes]
+
+
+def make_index(kind="exact", **kwargs):
+    """Buat index galeri berdasarkan nama ('exact' atau 'ivf')"""
+    if kind == "exact":
+        return ExactIndex()
+    if kind == "ivf":
+        return IVFIndex(**kwargs)
+    raise ValueError(f"Jenis index wajah tidak dikenal: {kind}")
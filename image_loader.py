@@ -0,0 +1,70 @@
+import os
+import numpy as np
+from PIL import Image
+import cv2
+
+MAX_FILE_BYTES = 10_000_000  # foto > 10MB dilewati
+TARGET_WIDTH = 800
+CROP_PADDING = 0.5  # margin crop wajah, relatif terhadap ukuran wajah per sisi
+
+
+class ImageRejected(Exception):
+    """Foto ditolak sebelum di-decode (terlalu besar / header tidak valid)"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def probe_image(filepath, max_bytes=MAX_FILE_BYTES):
+    """Cek ukuran file & header gambar tanpa decode piksel, kembalikan (w, h, format)"""
+    size = os.path.getsize(filepath)
+    if max_bytes and size > max_bytes:
+        raise ImageRejected("too_big", f"{os.path.basename(filepath)} terlalu besar ({size} byte)")
+    try:
+        with Image.open(filepath) as img:
+            return img.size[0], img.size[1], img.format
+    except (OSError, SyntaxError) as e:
+        raise ImageRejected("invalid", f"Header gambar tidak valid: {e}")
+
+
+def load_image(filepath, target_width=TARGET_WIDTH, max_bytes=MAX_FILE_BYTES):
+    """
+    Decode foto langsung mendekati lebar target.
+
+    Untuk JPEG, PIL draft() memakai DCT scaling (1/2, 1/4, 1/8) sehingga
+    foto 24MP tidak pernah di-decode penuh. Sisa skala diselesaikan dengan
+    cv2.resize ke lebar target, sama seperti jalur lama.
+    Kembalikan (image_rgb, (lebar_asli, tinggi_asli)).
+    """
+    width, height, _ = probe_image(filepath, max_bytes)
+    with Image.open(filepath) as img:
+        if target_width and width > target_width:
+            img.draft("RGB", (target_width, int(height * target_width / width)))
+        image = np.asarray(img.convert("RGB"))
+
+    if target_width and width > target_width:
+        new_size = (target_width, int(height * target_width / width))
+        if (image.shape[1], image.shape[0]) != new_size:
+            image = cv2.resize(image, new_size)
+    return image, (width, height)
+
+
+def crop_face(image, location, padding=CROP_PADDING):
+    """Potong wajah (top, right, bottom, left) beserta margin dari frame yang sudah di-decode"""
+    top, right, bottom, left = location
+    pad_y = int((bottom - top) * padding)
+    pad_x = int((right - left) * padding)
+    h, w = image.shape[:2]
+    return image[max(0, top - pad_y):min(h, bottom + pad_y), max(0, left - pad_x):min(w, right + pad_x)].copy()
+
+
+def crop_face_location(crop, padding=CROP_PADDING):
+    """Perkiraan lokasi wajah di dalam crop buatan crop_face (untuk rebuild cache)"""
+    h, w = crop.shape[:2]
+    f = padding / (1 + 2 * padding)
+    return (int(h * f), int(w * (1 - f)), int(h * (1 - f)), int(w * f))
+
+
+def save_rgb(image, path):
+    Image.fromarray(image).save(path, quality=95)
@@ -1,12 +1,23 @@
 import os
-import shutil
+import time
+import threading
+import multiprocessing
 import face_recognition
 import easyocr
-import numpy as np
-from collections import defaultdict
-from gtts import gTTS
-from playsound import playsound
-from database.photo_service import insert_photo
+from database.photo_service import insert_photo, rename_person, photo_path_exists
+from face_gallery import FaceGallery, DEFAULT_TOLERANCE, FOLD_MIN_DISTANCE, FOLD_MAX_DISTANCE, FOLD_MIN_MARGIN
+from face_cache import FaceCache, CacheCorruptError
+from face_index import make_index
+from face_detection import make_detector, working_frame
+from face_encoder import BatchEncoder
+from unknown_clusters import UnknownClusters
+from image_loader import ImageRejected, load_image, crop_face, crop_face_location, save_rgb
+from ocr_roi import read_number
+from voice_notifier import VoiceNotifier
+from upload_ingest import is_complete
+from photo_store import PhotoStore
+from rendition_cache import RenditionCache
+from metrics import metrics
 import cv2
 
 # === Folder dasar ===
@@ -14,8 +25,29 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOADS_DIR = os.path.join(BASE_DIR, "uploads")
 WAJAH_DIR = os.path.join(BASE_DIR, "output", "wajah")
 ANGKA_DIR = os.path.join(BASE_DIR, "output", "angka")
+STORE_DIR = os.path.join(BASE_DIR, "output", ".store")  # foto asli per isi, folder hasil berisi tautan
 MODEL_WAJAH_DIR = os.path.join(BASE_DIR, "models", "wajah")
-CACHE_FILE = os.path.join(MODEL_WAJAH_DIR, "face_cache.npy")
+SUARA_CACHE_DIR = os.path.join(BASE_DIR, "models", "suara")
+CACHE_FILE = os.path.join(MODEL_WAJAH_DIR, "face_cache")  # → .f32 / .idx / .journal
+UNKNOWN_CLUSTERS_DB = os.path.join(MODEL_WAJAH_DIR, "unknown_clusters.db")
+PRINT_READY_DIR = os.path.join(BASE_DIR, "print_ready")
+
+# "exact" (brute-force) atau "ivf" (aproksimasi, untuk galeri besar)
+FACE_INDEX = os.environ.get("CETAK_FACE_INDEX", "exact")
+# "single" (satu pass 800px), "tiled" atau "pyramid" (frame besar, HOG paralel per tile)
+DETECTION_STRATEGY = os.environ.get("CETAK_DETECTION", "single")
+DETECTION_BUDGET = float(os.environ.get("CETAK_DETECTION_BUDGET", "2.0"))  # detik, lalu pass kasar
+DETECTION_WORKERS = int(os.environ["CETAK_DETECTION_WORKERS"]) if os.environ.get("CETAK_DETECTION_WORKERS") else None
+# Micro-batch encoding wajah lintas foto: maksimal chip per batch & waktu tunggu (ms, 0 = langsung)
+ENCODE_BATCH = int(os.environ.get("CETAK_ENCODE_BATCH", "16"))
+ENCODE_LATENCY_MS = float(os.environ.get("CETAK_ENCODE_LATENCY_MS", "20"))
+# Ukuran cetak yang disiapkan di background untuk foto baru (kosong = tidak ada prefetch)
+PREFETCH_SIZES = [s for s in os.environ.get("CETAK_PREFETCH_SIZES", "3x4,4x6").split(",") if s]
+RENDITION_CACHE_MB = int(os.environ.get("CETAK_RENDITION_CACHE_MB", "500"))
+
+# Worker spawn (DetectionPool, tile deteksi) ikut meng-import modul ini. Di sana hanya
+# model deteksi/OCR yang dibutuhkan; efek samping milik proses pemilik dilewati.
+IS_WORKER = multiprocessing.parent_process() is not None
 
 # === Pastikan semua folder ada ===
 os.makedirs(WAJAH_DIR, exist_ok=True)
@@ -26,182 +58,442 @@ os.makedirs(MODEL_WAJAH_DIR, exist_ok=True)
 reader = easyocr.Reader(["id"], gpu=False)
 
 # === Cache model wajah ===
-known_faces = []
-known_names = []
-unknown_stats = defaultdict(int)
+gallery = FaceGallery(index=make_index(FACE_INDEX))
+face_cache = FaceCache(CACHE_FILE)
+gallery_lock = threading.Lock()
 
-# ===================================================
-# 🔹 Muat cache wajah jika ada
-# ===================================================
-if os.path.exists(CACHE_FILE):
-    print("📦 Memuat cache wajah dari file...")
-    data = np.load(CACHE_FILE, allow_pickle=True).item()
-    known_faces = data["encodings"]
-    known_names = data["names"]
-else:
+# === Detektor wajah (pass tunggal lama = face_recognition.face_locations) ===
+face_detector = make_detector(
+    DETECTION_STRATEGY,
+    coarse=lambda image: face_recognition.face_locations(image, model="hog"),
+    workers=DETECTION_WORKERS,
+    budget=DETECTION_BUDGET,
+)
+face_encoder = BatchEncoder(max_batch=ENCODE_BATCH, max_latency=ENCODE_LATENCY_MS / 1000)
+
+# === Store foto asli (satu tulisan per foto) ===
+photo_store = PhotoStore(STORE_DIR)
+# Hanya di pemilik: worker yang di-spawn belakangan akan melihat manifest foto yang
+# baris DB-nya masih tertunda di pemilik, lalu membatalkan tautannya
+if not IS_WORKER and photo_store.recover(photo_path_exists):
+    print("♻️ Tautan hasil dari proses yang terputus dibatalkan.")
+
+# === Foto siap cetak (print_ready/), di-render di background ===
+renditions = None if IS_WORKER else RenditionCache(PRINT_READY_DIR, max_bytes=RENDITION_CACHE_MB * 1024 * 1024)
+
+
+def __getattr__(name):
+    # known_faces / known_names tetap tersedia sebagai view tipis ke galeri
+    if name == "known_faces":
+        return gallery.encodings
+    if name == "known_names":
+        return gallery.names
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def rebuild_cache():
+    """Bangun ulang cache wajah dari gambar di MODEL_WAJAH_DIR"""
     print("📷 Memuat model wajah dari folder...")
-    for filename in os.listdir(MODEL_WAJAH_DIR):
-        if filename.lower().endswith((".jpg", ".jpeg", ".png")):
+    face_cache.reset()
+    names, chips = [], []
+    for filename in sorted(os.listdir(MODEL_WAJAH_DIR)):
+        # Crop unknownN milik cluster wajah tak dikenal, bukan model galeri
+        if filename.lower().endswith((".jpg", ".jpeg", ".png")) and not filename.startswith("unknown"):
             path = os.path.join(MODEL_WAJAH_DIR, filename)
             image = face_recognition.load_image_file(path)
-            encoding = face_recognition.face_encodings(image)
-            if encoding:
-                known_faces.append(encoding[0])
-                known_names.append(os.path.splitext(filename)[0])
-    np.save(CACHE_FILE, {"encodings": known_faces, "names": known_names})
-print(f"✅ {len(known_faces)} model wajah dimuat.")
+            # Model hasil auto-enroll berupa crop wajah dengan margin tetap
+            location = face_recognition.face_locations(image)[:1] or [crop_face_location(image)]
+            names.append(os.path.splitext(filename)[0])
+            chips.extend(face_encoder.chips(image, location))
+    # Semua model di-encode per batch, bukan satu panggilan per file
+    for encoding, name in zip(face_encoder.encode_chips(chips), names):
+        gallery.add(encoding, name)
+        face_cache.append(encoding, name)
+
+
+# ===================================================
+# 🔹 Muat cache wajah jika ada
+# ===================================================
+def load_gallery():
+    """Isi galeri dari cache wajah; bangun ulang bila belum ada atau rusak"""
+    try:
+        print("📦 Memuat cache wajah dari file...")
+        cached_encodings, cached_names = face_cache.load()
+        if cached_names:
+            gallery.extend(cached_encodings, cached_names)
+        del cached_encodings
+    except FileNotFoundError:
+        rebuild_cache()
+    except CacheCorruptError as e:
+        print(f"⚠️ Cache wajah rusak ({e}), membangun ulang...")
+        rebuild_cache()
+    print(f"✅ {len(gallery)} model wajah dimuat.")
+
+
+def _max_number(names, prefix):
+    numbers = [int(n[len(prefix):]) for n in names if n.startswith(prefix) and n[len(prefix):].isdigit()]
+    return max(numbers, default=0)
+
+
+unknown_clusters = None
+if not IS_WORKER:
+    load_gallery()
+
+    # === Cluster wajah tak dikenal (tersimpan, di luar galeri) ===
+    unknown_clusters = UnknownClusters(UNKNOWN_CLUSTERS_DB)
+    # Nomor unknownN/personN dari run lama tidak boleh dipakai ulang (dicek sekali saat start)
+    unknown_clusters.reserve("unknown", _max_number(os.listdir(WAJAH_DIR), "unknown"))
+    unknown_clusters.reserve("person", _max_number(list(gallery.names) + os.listdir(WAJAH_DIR), "person"))
+    print(f"🧩 {len(unknown_clusters)} cluster wajah tak dikenal dimuat.")
 
 # ===================================================
 # 🔊 Fungsi suara notifikasi
 # ===================================================
+voice = VoiceNotifier(SUARA_CACHE_DIR, lang="id")
+
+
 def play_voice(message):
+    """Antrikan notifikasi suara; tidak pernah memblokir pemrosesan foto"""
+    voice.notify(message)
+
+
+# ===================================================
+# 🔬 Analisis foto (tanpa efek samping, aman di proses worker)
+# ===================================================
+def analyze_photo(filepath):
+    """
+    Tahap berat: load, resize, deteksi & encoding wajah, OCR angka.
+
+    Tidak menyentuh galeri, folder output, maupun database sehingga bisa
+    dijalankan di proses worker. Hasilnya diterapkan oleh classify_photo.
+    """
+    filename = os.path.basename(filepath)
+
+    # === 1️⃣ Cek ukuran & header, lalu decode langsung mendekati lebar deteksi (800px) ===
+    t0 = time.perf_counter()
     try:
-        tts = gTTS(text=message, lang="id")
-        tts.save("notif.mp3")
-        playsound("notif.mp3")
-        os.remove("notif.mp3")
+        image, (width, height) = load_image(filepath, target_width=face_detector.frame_width)
+    except ImageRejected as e:
+        if e.reason == "too_big":
+            return {"filename": filename, "status": "too_big"}
+        raise
+    stage_timings = {"decode": time.perf_counter() - t0}
+    if width > face_detector.frame_width:
+        print(f"🪶 Resize gambar dari {width}x{height} → {image.shape[1]}x{image.shape[0]}")
+
+    # === 2️⃣ Deteksi wajah ===
+    face_locations, encodings = detect_faces(image, stage_timings)
+
+    # === 3️⃣ OCR angka: region kandidat dulu, seluruh frame hanya sebagai cadangan ===
+    digits, timings, ocr_source = ocr_number(image, face_locations)
+    print("🔎 OCR " + ocr_source + ": " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items()))
+
+    # Durasi per tahap ikut dikembalikan agar tercatat di proses pemilik (juga dari worker pool)
+    stage_timings.update(timings)
+    return analysis_result(filename, image, face_locations, encodings, digits, ocr_source, stage_timings)
+
+
+def detect_faces(image, timings=None):
+    """Lokasi & encoding wajah dari frame RGB yang sudah di-resize (lebar face_detector.frame_width)"""
+    t0 = time.perf_counter()
+    face_locations = face_detector.locate(image)
+    t1 = time.perf_counter()
+    encodings = face_encoder.encode(image, face_locations)
+    if timings is not None:
+        timings["detect"] = t1 - t0
+        timings["encode"] = time.perf_counter() - t1
+    return face_locations, encodings
+
+
+def ocr_number(image, face_locations):
+    """Nomor dada dari frame RGB, kembalikan (digits, timings, sumber)"""
+    # Frame deteksi bertile lebih besar dari 800px; OCR tetap di frame kerja 800px
+    image, face_locations = working_frame(image, face_locations)
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return read_number(reader, gray, face_locations)
+
+
+def analysis_result(filename, image, face_locations, encodings, digits, ocr_source, timings):
+    return {
+        "filename": filename,
+        "status": "ok",
+        "encodings": list(encodings),
+        # Crop wajah dari frame yang sudah di-decode, untuk auto-enroll tanpa baca ulang file
+        "face_crops": [crop_face(image, loc) for loc in face_locations],
+        "digits": digits,
+        "ocr_source": ocr_source,
+        "timings": timings,
+    }
+
+
+# ===================================================
+# 🗂️ Terapkan hasil analisis (pemilik galeri tunggal)
+# ===================================================
+def classify_photo(filepath, analysis):
+    """
+    Cocokkan wajah, daftarkan/promosikan wajah baru, tautkan hasil & simpan ke DB.
+
+    Kembalikan True bila foto berhasil diklasifikasikan (dan dihapus dari uploads).
+    """
+    staged = stage_photo(filepath, analysis)
+    if staged is None:
+        return False
+    commit_photo(filepath, staged)
+    return True
+
+
+def stage_photo(filepath, analysis, remove_source=True, announce=True):
+    """
+    Terapkan hasil analisis tanpa menunggu database.
+
+    Kembalikan (placement, row) untuk diselesaikan commit_photo, atau None
+    bila foto dilewati/gagal (baris 'failed' tetap dicatat).
+    """
+    filename = analysis["filename"]
+
+    if analysis["status"] == "too_big":
+        print(f"⚠️ {filename} terlalu besar (>10MB), dilewati.")
+        insert_photo(filename, "skipped", filepath, status="failed")
+        if remove_source:
+            os.remove(filepath)
+        return None
+
+    encodings = analysis["encodings"]
+    digits = analysis["digits"]
+    wajah_terdeteksi = len(encodings) > 0
+    angka_terdeteksi = bool(digits)
+
+    if not (wajah_terdeteksi or angka_terdeteksi):
+        print("❌ Tidak ada wajah atau angka")
+        insert_photo(filename, "none", filepath, status="failed")
+        return None
+
+    # Isi foto ditulis sekali ke store; folder wajah/angka hanya berisi tautan
+    with metrics.timer("stage_seconds", stage="store"):
+        obj = photo_store.put(filepath)
+
+    # ========== PROSES WAJAH ==========
+    if wajah_terdeteksi:
+        # Pendaftaran, promosi & pemasangan tautan ke folder orang hanya satu thread sekaligus
+        with metrics.timer("stage_seconds", stage="gallery_lock_wait"):
+            gallery_lock.acquire()
+        try:
+            with metrics.timer("stage_seconds", stage="match"):
+                persons = _classify_faces(filename, encodings, analysis["face_crops"])
+            with metrics.timer("stage_seconds", stage="link"):
+                staged = _publish(obj, filename, persons, digits)
+        finally:
+            gallery_lock.release()
+        if announce:
+            play_voice("Wajah terdeteksi")
+    else:
+        with metrics.timer("stage_seconds", stage="link"):
+            staged = _publish(obj, filename, [], digits)
+
+    # ========== PROSES ANGKA ==========
+    if angka_terdeteksi:
+        print(f"🔢 Angka {digits} terdeteksi")
+    if announce and wajah_terdeteksi and angka_terdeteksi:
+        play_voice("Wajah dan angka terdeteksi")
+    if PREFETCH_SIZES:
+        # Nama objek store = SHA-256 isinya, jadi tidak perlu hash ulang
+        renditions.prefetch(obj, PREFETCH_SIZES, digest=os.path.splitext(os.path.basename(obj))[0])
+    return staged
+
+
+def commit_photo(filepath, staged, remove_source=True):
+    """Tunggu baris DB; tautan dan baris berhasil bersama atau dibatalkan bersama"""
+    placement, row = staged
+    try:
+        with metrics.timer("stage_seconds", stage="db"):
+            row.wait()
     except Exception:
-        pass
+        placement.rollback()
+        raise
+    placement.done()
+    if remove_source:
+        print(f"✅ Foto {os.path.basename(filepath)} selesai diproses & dihapus dari uploads.")
+        os.remove(filepath)
+
+
+def _publish(obj, filename, persons, digits):
+    """Pasang tautan hasil lalu antrikan baris DB-nya, kembalikan (placement, row)"""
+    targets = [os.path.join(WAJAH_DIR, name, filename) for name in persons]
+    if digits:
+        targets.append(os.path.join(ANGKA_DIR, digits, filename))
+    jenis_deteksi = "none"
+    if persons:
+        jenis_deteksi = "campuran" if digits else "wajah"
+
+    placement = photo_store.place(obj, targets)
+    try:
+        # Baris diantrikan selagi folder orang masih terkunci, sehingga
+        # rename_person saat promosi berikutnya selalu ikut memperbarui path-nya
+        row = insert_photo(filename, jenis_deteksi, targets[len(persons) - 1 if persons else -1],
+                           persons=persons, bib=digits)
+    except Exception:
+        placement.rollback()
+        raise
+    return placement, row
+
+
+def _classify_faces(filename, encodings, face_crops):
+    """Cocokkan/daftarkan tiap wajah, kembalikan nama folder orang per wajah"""
+    persons = []
+    renamed = {}  # unknownN yang digabung/dipromosikan selama foto ini → nama barunya
+    # Cocokkan semua wajah di foto ini ke galeri dalam satu batch
+    hasil_match = gallery.match(encodings, tolerance=DEFAULT_TOLERANCE)
+    for enc, crop, (matched_name, jarak, margin) in zip(encodings, face_crops, hasil_match):
+        # === Wajah dikenal ===
+        if matched_name:
+            folder_name = matched_name
+            print(f"🧠 Wajah dikenali: {matched_name} (jarak {jarak:.3f}, margin {margin:.3f})")
+            if FOLD_MIN_DISTANCE <= jarak <= FOLD_MAX_DISTANCE and margin >= FOLD_MIN_MARGIN:
+                _fold_face(matched_name, enc)
+        else:
+            folder_name = _assign_unknown(enc, crop, renamed)
+        persons.append(folder_name)
+    # Wajah sebelumnya di foto ini bisa berlabel cluster yang baru saja digabung/dipromosikan
+    for i, name in enumerate(persons):
+        while name in renamed:
+            name = renamed[name]
+        persons[i] = name
+    return persons
+
+
+def _fold_face(name, encoding):
+    """Tambahkan variasi baru (mis. pencahayaan) ke identitas yang sudah dikenal"""
+    hasil = gallery.fold(name, encoding)
+    if hasil is None:
+        return
+    op, row = hasil
+    if op == "append":
+        face_cache.append(encoding, name)
+    else:
+        face_cache.replace(row, encoding)
+    metrics.inc("gallery_fold_total", op=op)
+
+
+def _assign_unknown(encoding, crop, renamed=None):
+    """
+    Masukkan wajah tak dikenal ke cluster; promosikan bila cluster sudah besar & rapat.
+
+    Label lama yang digabung atau dipromosikan dicatat di `renamed` (lama → baru).
+    """
+    renamed = {} if renamed is None else renamed
+    hasil = unknown_clusters.assign(encoding)
+    cluster = unknown_clusters[hasil.cluster]
+    if hasil.created:
+        # Crop wajah yang sedang ditangani jadi gambar model cluster
+        save_rgb(crop, os.path.join(MODEL_WAJAH_DIR, f"{hasil.label}.jpg"))
+        print(f"🆕 Wajah baru: {hasil.label}")
+    else:
+        print(f"📊 Kemunculan {hasil.label}: {cluster.count} kali (jarak {hasil.distance:.3f}, "
+              f"sebaran {cluster.spread:.3f})")
+
+    for old_label in hasil.absorbed:
+        _merge_unknown(old_label, hasil.label)
+        renamed[old_label] = hasil.label
+        print(f"🔗 {old_label} digabung ke {hasil.label}")
+
+    # === Promosi jadi model tetap ===
+    if not unknown_clusters.promotable(hasil.cluster):
+        return hasil.label
+    new_name = f"person{unknown_clusters.next_number('person')}"
+    centroid = unknown_clusters.promote(hasil.cluster, new_name)
+
+    model_path = os.path.join(MODEL_WAJAH_DIR, f"{hasil.label}.jpg")
+    if os.path.exists(model_path):
+        os.rename(model_path, os.path.join(MODEL_WAJAH_DIR, f"{new_name}.jpg"))
+    # Centroid cluster mewakili semua kemunculan, lebih stabil dari satu encoding
+    gallery.add(centroid, new_name)
+    face_cache.append(centroid, new_name)
+
+    old_folder = os.path.join(WAJAH_DIR, hasil.label)
+    new_folder = os.path.join(WAJAH_DIR, new_name)
+    if os.path.isdir(old_folder):
+        os.rename(old_folder, new_folder)
+    rename_person(hasil.label, new_name, old_folder, new_folder)
+    renamed[hasil.label] = new_name
+    play_voice("Wajah baru berhasil disimpan permanen")
+    print(f"🎓 {hasil.label} dipromosikan jadi {new_name}")
+    return new_name
+
+
+def _merge_unknown(old_label, new_label):
+    """Pindahkan tautan & label cluster yang digabung ke cluster tujuan"""
+    old_folder = os.path.join(WAJAH_DIR, old_label)
+    new_folder = os.path.join(WAJAH_DIR, new_label)
+    if os.path.isdir(old_folder):
+        os.makedirs(new_folder, exist_ok=True)
+        for name in os.listdir(old_folder):
+            os.replace(os.path.join(old_folder, name), os.path.join(new_folder, name))
+        os.rmdir(old_folder)
+    rename_person(old_label, new_label, old_folder, new_folder)
+    model_path = os.path.join(MODEL_WAJAH_DIR, f"{old_label}.jpg")
+    if os.path.exists(model_path):
+        os.remove(model_path)
+
 
 # ===================================================
 # ⚙️ Proses utama
 # ===================================================
-def process_photo(filepath):
-    import time
-    import cv2
+def process_photo(filepath, analyzer=None):
+    """
+    Proses satu foto dari uploads.
 
+    `analyzer` dapat diganti (mis. DetectionPool.analyze) agar tahap berat
+    berjalan di proses lain; penerapan hasil tetap di proses ini.
+    Kembalikan True bila foto berhasil diklasifikasikan.
+    """
     start_time = time.time()
+    if not begin_photo(filepath):
+        return False
+    try:
+        analysis = (analyzer or analyze_photo)(filepath)
+    except Exception as e:
+        return finish_photo(filepath, None, start_time, error=e)
+    return finish_photo(filepath, analysis, start_time)
+
+
+def begin_photo(filepath):
+    """Cek awal sebelum analisis; False bila file belum lengkap atau rusak"""
     filename = os.path.basename(filepath)
     print(f"\n⚙️ Memproses: {filename}")
 
-    # 🧩 Cegah error jika file rusak atau belum selesai diupload
-    if not os.path.exists(filepath) or os.path.getsize(filepath) < 50_000:
-        print(f"⚠️ File {filename} terlalu kecil atau belum siap.")
-        return
+    # 🧩 Cegah error jika file rusak atau belum selesai diupload (cek marker akhir JPEG/PNG)
+    if not os.path.exists(filepath) or not is_complete(filepath):
+        print(f"⚠️ File {filename} belum lengkap atau rusak.")
+        metrics.inc("photos_total", result="incomplete")
+        return False
+    return True
 
-    try:
-        # === 1️⃣ Load & resize gambar ===
-        image = face_recognition.load_image_file(filepath)
-        height, width = image.shape[:2]
-
-        # Skip foto terlalu besar (>10MB)
-        if os.path.getsize(filepath) > 10_000_000:
-            print(f"⚠️ {filename} terlalu besar (>10MB), dilewati.")
-            insert_photo(filename, "skipped", filepath, status="failed")
-            os.remove(filepath)
-            return
-
-        # Resize jika lebar > 800px
-        if width > 800:
-            ratio = 800 / width
-            new_size = (800, int(height * ratio))
-            image = cv2.resize(image, new_size)
-            print(f"🪶 Resize gambar dari {width}x{height} → {new_size[0]}x{new_size[1]}")
-
-        # === 2️⃣ Deteksi wajah ===
-        face_locations = face_recognition.face_locations(image, model="hog")
-        encodings = face_recognition.face_encodings(image, face_locations)
-        wajah_terdeteksi = len(encodings) > 0
-
-        angka_terdeteksi = False
-        tujuan_wajah = tujuan_angka = None
-        jenis_deteksi = "none"
-
-        # ========== PROSES WAJAH ==========
-        if wajah_terdeteksi:
-            for enc in encodings:
-                matches = face_recognition.compare_faces(known_faces, enc, tolerance=0.55)
-                face_distances = face_recognition.face_distance(known_faces, enc)
-
-                matched_name = None
-                if len(face_distances) > 0:
-                    best_match_index = np.argmin(face_distances)
-                    if matches[best_match_index]:
-                        matched_name = known_names[best_match_index]
-
-                # === Wajah dikenal ===
-                if matched_name:
-                    folder_name = matched_name
-                    print(f"🧠 Wajah dikenali: {matched_name}")
-                else:
-                    # === Wajah baru ===
-                    unknown_dirs = [d for d in os.listdir(WAJAH_DIR) if d.startswith("unknown")]
-                    next_num = len(unknown_dirs) + 1
-                    folder_name = f"unknown{next_num}"
-                    person_dir = os.path.join(WAJAH_DIR, folder_name)
-                    os.makedirs(person_dir, exist_ok=True)
-
-                    model_path = os.path.join(MODEL_WAJAH_DIR, f"{folder_name}.jpg")
-                    shutil.copy(filepath, model_path)
-
-                    # Tambahkan ke cache
-                    new_img = face_recognition.load_image_file(model_path)
-                    new_enc = face_recognition.face_encodings(new_img)
-                    if new_enc:
-                        known_faces.append(new_enc[0])
-                        known_names.append(folder_name)
-                        np.save(CACHE_FILE, {"encodings": known_faces, "names": known_names})
-
-                    unknown_stats[folder_name] += 1
-                    print(f"📊 Kemunculan {folder_name}: {unknown_stats[folder_name]} kali")
-
-                    # === Promosi jadi model tetap ===
-                    if unknown_stats[folder_name] >= 3:
-                        new_name = f"person{len([n for n in known_names if n.startswith('person')]) + 1}"
-                        new_model_path = os.path.join(MODEL_WAJAH_DIR, f"{new_name}.jpg")
-                        os.rename(model_path, new_model_path)
-
-                        idx = known_names.index(folder_name)
-                        known_names[idx] = new_name
-                        np.save(CACHE_FILE, {"encodings": known_faces, "names": known_names})
-
-                        old_folder = os.path.join(WAJAH_DIR, folder_name)
-                        new_folder = os.path.join(WAJAH_DIR, new_name)
-                        os.rename(old_folder, new_folder)
-                        del unknown_stats[folder_name]
-                        play_voice("Wajah baru berhasil disimpan permanen")
-                        print(f"🎓 {folder_name} dipromosikan jadi {new_name}")
-
-                # Simpan hasil wajah
-                person_dir = os.path.join(WAJAH_DIR, folder_name)
-                os.makedirs(person_dir, exist_ok=True)
-                tujuan_wajah = os.path.join(person_dir, filename)
-                shutil.copy(filepath, tujuan_wajah)
-
-            jenis_deteksi = "wajah"
-            play_voice("Wajah terdeteksi")
 
-        # ========== PROSES ANGKA ==========
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        result = reader.readtext(gray, detail=0, paragraph=False)
-        for text in result:
-            digits = "".join([c for c in text if c.isdigit()])
-            if digits:
-                angka_terdeteksi = True
-                angka_dir = os.path.join(ANGKA_DIR, digits)
-                os.makedirs(angka_dir, exist_ok=True)
-                tujuan_angka = os.path.join(angka_dir, filename)
-                shutil.copy(filepath, tujuan_angka)
-                print(f"🔢 Angka {digits} terdeteksi")
-                break
-
-        # ========== SIMPAN HASIL ==========
-        if wajah_terdeteksi and angka_terdeteksi:
-            jenis_deteksi = "campuran"
-            play_voice("Wajah dan angka terdeteksi")
-
-        if not (wajah_terdeteksi or angka_terdeteksi):
-            print("❌ Tidak ada wajah atau angka")
-            insert_photo(filename, "none", filepath, status="failed")
-        else:
-            insert_photo(filename, jenis_deteksi, tujuan_wajah or tujuan_angka)
-            print(f"✅ Foto {filename} selesai diproses & dihapus dari uploads.")
-            os.remove(filepath)
+def finish_photo(filepath, analysis, start_time, error=None):
+    """
+    Terapkan hasil analisis (atau catat error analisis) & catat metrik.
+
+    Dipakai process_photo maupun mode pipeline, yang menjalankan analisis
+    secara bertahap lalu memanggil ini sesuai urutan foto masuk.
+    """
+    filename = os.path.basename(filepath)
+    result = "error"
+    try:
+        if error is not None:
+            raise error
+        for stage, seconds in analysis.get("timings", {}).items():
+            metrics.observe("stage_seconds", seconds, stage=stage)
+        ok = classify_photo(filepath, analysis)
+        result = "classified" if ok else ("too_big" if analysis["status"] == "too_big" else "no_match")
+        return ok
 
     except Exception as e:
         print(f"❌ Error memproses {filename}: {e}")
         insert_photo(filename, "error", filepath, status="failed")
+        return False
 
     finally:
-        durasi = round(time.time() - start_time, 2)
-        print(f"⏱️ Waktu proses total: {durasi} detik\n")
+        durasi = time.time() - start_time
+        metrics.observe("photo_seconds", durasi)
+        metrics.inc("photos_total", result=result)
+        print(f"⏱️ Waktu proses total: {round(durasi, 2)} detik\n")
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+PREFIX = "cetak_"
+# Batas bucket histogram durasi (detik), dari decode cepat sampai OCR seluruh frame
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PORT = 9108
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _escape_label(value):
+    # Format teks Prometheus: backslash, tanda kutip & baris baru di nilai label wajib di-escape
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """
+    Counter, gauge & histogram di memori untuk instrumentasi per tahap.
+
+    Saat nonaktif semua pemanggilan langsung kembali (timer() memberi objek
+    kosong bersama) sehingga instrumentasi bisa dibiarkan di jalur panas.
+    Collector dipanggil hanya saat scrape, untuk nilai yang mahal dihitung.
+    """
+
+    def __init__(self, enabled=False, jsonl_path=None, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+        self._jsonl = None
+        self._server = None
+        if enabled or jsonl_path:
+            self.enable(jsonl_path)
+
+    def enable(self, jsonl_path=None):
+        with self._lock:
+            if jsonl_path and self._jsonl is None:
+                self._jsonl = open(jsonl_path, "a", encoding="utf-8")
+            self.enabled = True
+
+    def close(self):
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+        if self._server is not None:
+            self._server.should_exit = True
+
+    # ---------------------------------------------------
+    # Pencatatan
+    # ---------------------------------------------------
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._log("counter", name, value, labels)
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def add(self, name, delta, **labels):
+        """Naik/turunkan gauge (mis. jumlah worker yang sedang sibuk)"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(self.buckets)
+            hist.observe(value)
+            self._log("histogram", name, value, labels)
+
+    def timer(self, name, **labels):
+        """Context manager yang mencatat durasi blok ke histogram `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def collector(self, fn):
+        """Daftarkan fn() → iterable (nama, nilai, labels) yang dibaca saat scrape"""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def _log(self, kind, name, value, labels):
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps({"ts": time.time(), "type": kind, "name": name,
+                                          "value": value, **labels}) + "\n")
+
+    # ---------------------------------------------------
+    # Ekspor
+    # ---------------------------------------------------
+    def _collected(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        gauges = {}
+        for fn in collectors:
+            try:
+                for name, value, labels in fn():
+                    gauges[_key(name, labels)] = value
+            except Exception:
+                continue
+        return gauges
+
+    def snapshot(self):
+        """Salinan nilai saat ini: {'counters', 'gauges', 'histograms'}"""
+        collected = self._collected()
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": {**self._gauges, **collected},
+                "histograms": {k: {"count": h.count, "sum": h.sum} for k, h in self._histograms.items()},
+            }
+
+    def render(self):
+        """Format teks Prometheus (exposition format 0.0.4)"""
+        collected = self._collected()
+        lines = []
+        with self._lock:
+            gauges = {**self._gauges, **collected}
+            for kind, values in (("counter", self._counters), ("gauge", gauges)):
+                typed = set()
+                for (name, labels), value in sorted(values.items()):
+                    full = PREFIX + name
+                    if full not in typed:
+                        lines.append(f"# TYPE {full} {kind}")
+                        typed.add(full)
+                    lines.append(f"{full}{_format_labels(labels)} {value}")
+
+            typed = set()
+            for (name, labels), hist in sorted(self._histograms.items()):
+                full = PREFIX + name
+                if full not in typed:
+                    lines.append(f"# TYPE {full} histogram")
+                    typed.add(full)
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{full}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{full}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist.count}")
+                lines.append(f"{full}_sum{_format_labels(labels)} {hist.sum}")
+                lines.append(f"{full}_count{_format_labels(labels)} {hist.count}")
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Endpoint /metrics lokal (FastAPI + uvicorn) di thread latar belakang"""
+        from fastapi import FastAPI
+        from fastapi.responses import PlainTextResponse
+        import uvicorn
+
+        self.enable()
+        app = FastAPI(title="cetak_foto metrics", docs_url=None, redoc_url=None)
+
+        @app.get("/metrics", response_class=PlainTextResponse)
+        def scrape():
+            return PlainTextResponse(self.render(), media_type="text/plain; version=0.0.4")
+
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        threading.Thread(target=self._server.run, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics tersedia di http://{host}:{port}/metrics")
+        return self._server
+
+
+# Registry bersama; aktif lewat CETAK_METRICS=1 atau bila file JSONL ditentukan
+metrics = Metrics(
+    enabled=os.environ.get("CETAK_METRICS") == "1",
+    jsonl_path=os.environ.get("CETAK_METRICS_JSONL") or None,
+)
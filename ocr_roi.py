@@ -0,0 +1,138 @@
+import time
+import numpy as np
+import cv2
+
+DIGIT_ALLOWLIST = "0123456789"
+MAX_PROPOSALS = 12
+# Reader dibatasi angka sehingga tekstur apa pun bisa "terbaca"; hasil di bawah batas ini diabaikan.
+# Proposal di luar area badan lebih sering berupa latar, jadi batasnya lebih ketat.
+MIN_CONFIDENCE = 0.5
+MIN_CONFIDENCE_OUTSIDE_TORSO = 0.8
+
+
+def _clip_box(x0, x1, y0, y1, shape):
+    h, w = shape[:2]
+    x0, x1 = max(0, int(x0)), min(w, int(x1))
+    y0, y1 = max(0, int(y0)), min(h, int(y1))
+    if x1 - x0 < 8 or y1 - y0 < 8:
+        return None
+    return [x0, x1, y0, y1]
+
+
+def torso_regions(face_locations, shape):
+    """Area dada/badan di bawah tiap wajah, tempat nomor dada biasanya ada"""
+    boxes = []
+    for top, right, bottom, left in face_locations:
+        fw, fh = right - left, bottom - top
+        box = _clip_box(left - fw, right + fw, bottom + 0.5 * fh, bottom + 4 * fh, shape)
+        if box:
+            boxes.append(box)
+    return boxes
+
+
+def text_proposals(gray, max_regions=MAX_PROPOSALS * 2):
+    """Kandidat baris teks murah: karakter MSER digabung jadi baris lewat dilasi horizontal"""
+    h, w = gray.shape[:2]
+    mser = cv2.MSER_create()
+    mser.setMinArea(20)
+    mser.setMaxArea(max(40, int(h * w * 0.01)))
+    _, bboxes = mser.detectRegions(gray)
+
+    mask = np.zeros((h, w), dtype=np.uint8)
+    char_heights = []
+    for x, y, bw, bh in bboxes:
+        # Bentuk mirip karakter: tidak terlalu gepeng/tinggi, tinggi wajar
+        if not (0.01 * h <= bh <= 0.3 * h) or not (0.1 <= bw / bh <= 1.5):
+            continue
+        mask[y:y + bh, x:x + bw] = 255
+        char_heights.append(bh)
+    if not char_heights:
+        return []
+
+    kernel_w = max(3, int(np.median(char_heights) * 0.8))
+    lines = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_w, 3)))
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        if bw < bh * 0.8:
+            continue
+        pad = int(bh * 0.2)
+        box = _clip_box(x - pad, x + bw + pad, y - pad, y + bh + pad, gray.shape)
+        if box:
+            boxes.append(box)
+    boxes.sort(key=lambda b: (b[1] - b[0]) * (b[3] - b[2]), reverse=True)
+    return boxes[:max_regions]
+
+
+def _overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1] and a[2] < b[3] and b[2] < a[3]
+
+
+def propose_regions(gray, face_locations, max_regions=MAX_PROPOSALS):
+    """Gabungkan proposal teks, utamakan yang berada di area badan"""
+    torsos = torso_regions(face_locations, gray.shape)
+    lines = text_proposals(gray)
+    in_torso = [b for b in lines if any(_overlaps(b, t) for t in torsos)]
+    others = [b for b in lines if b not in in_torso]
+    # Tanpa baris teks di badan, crop badan itu sendiri tetap dicoba
+    regions = in_torso + (torsos if not in_torso else []) + others
+    return regions[:max_regions]
+
+
+def _digits(text):
+    return "".join(c for c in text if c.isdigit())
+
+
+def _box_key(points):
+    """Kunci (x0, x1, y0, y1) dari 4 titik kotak hasil EasyOCR (urutan hasil bisa berbeda dari input)"""
+    xs = [int(p[0]) for p in points]
+    ys = [int(p[1]) for p in points]
+    return min(xs), max(xs), min(ys), max(ys)
+
+
+def read_number(reader, gray, face_locations=()):
+    """
+    Cari nomor (bib) dengan OCR hanya pada region kandidat, batch sekaligus.
+
+    Angka dari region hanya dipakai bila confidence-nya minimal MIN_CONFIDENCE
+    (MIN_CONFIDENCE_OUTSIDE_TORSO untuk proposal di luar area badan). Jatuh ke
+    OCR seluruh frame (perilaku lama) bila tidak ada region yang lolos.
+    Kembalikan (digits | None, timings, sumber).
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    regions = propose_regions(gray, face_locations)
+    timings["ocr_proposal"] = time.perf_counter() - t0
+
+    if regions:
+        t0 = time.perf_counter()
+        results = reader.recognize(
+            gray,
+            horizontal_list=regions,
+            free_list=[],
+            allowlist=DIGIT_ALLOWLIST,
+            detail=1,
+            batch_size=len(regions),
+        )
+        timings["ocr_recognize"] = time.perf_counter() - t0
+        torsos = torso_regions(face_locations, gray.shape)
+        near_torso = {tuple(b) for b in regions if any(_overlaps(b, t) for t in torsos)}
+        candidates = []
+        for box, text, conf in results:
+            found = _digits(text)
+            floor = MIN_CONFIDENCE if _box_key(box) in near_torso else MIN_CONFIDENCE_OUTSIDE_TORSO
+            if found and conf >= floor:
+                candidates.append((conf, found))
+        if candidates:
+            return max(candidates)[1], timings, "roi"
+
+    t0 = time.perf_counter()
+    result = reader.readtext(gray, detail=0, paragraph=False)
+    timings["ocr_fallback"] = time.perf_counter() - t0
+    for text in result:
+        found = _digits(text)
+        if found:
+            return found, timings, "full_frame"
+    return None, timings, "none"
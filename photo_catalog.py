@@ -0,0 +1,136 @@
+import os
+import threading
+from collections import namedtuple
+from PIL import Image
+
+from database import photo_service
+from metrics import metrics
+
+THUMB_DIR = os.path.join("output", ".thumbs")  # folder titik dilewati saat menelusuri output/
+THUMB_SIZES = (128, 512)  # sisi terpanjang (px)
+THUMB_QUALITY = 85
+PAGE_SIZE = 20
+UPDATE_BATCH = 200
+
+PhotoEntry = namedtuple("PhotoEntry", "id filename type path detected_at persons bib")
+
+
+class PhotoCatalog:
+    """
+    Katalog foto hasil klasifikasi, dibaca dari database foto (bukan os.walk).
+
+    page() memakai keyset pagination photo_service dengan filter orang,
+    nomor dada & rentang waktu, plus label tiap foto dalam satu query.
+    Thumbnail beberapa ukuran disimpan per id foto di THUMB_DIR; update()
+    membuatnya secara inkremental untuk foto yang belum diproses (dicatat
+    dengan watermark id), thumbnail() membuat yang belum ada saat diminta.
+    """
+
+    def __init__(self, thumb_dir=THUMB_DIR, sizes=THUMB_SIZES, quality=THUMB_QUALITY):
+        self.thumb_dir = thumb_dir
+        self.sizes = tuple(sorted(sizes))
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._watermark_path = os.path.join(thumb_dir, ".watermark")
+
+    # ---------------------------------------------------
+    # Daftar foto
+    # ---------------------------------------------------
+    def page(self, limit=PAGE_SIZE, cursor=None, person=None, bib=None, since=None, until=None):
+        """
+        Satu halaman foto terbaru dulu. Kembalikan (entries, next_cursor);
+        next_cursor None bila sudah halaman terakhir. since/until epoch detik.
+        """
+        # Label orang/nomor hanya dicatat untuk foto sukses; tanpa filter status
+        # SQLite memakai index label yang jauh lebih selektif
+        status = "success" if person is None and bib is None else None
+        rows, next_cursor = photo_service.get_photos_page(
+            limit=limit, cursor=cursor, status=status, person=person,
+            bib=None if bib is None else str(bib), since=since, until=until,
+        )
+        labels = photo_service.get_photo_labels(row[0] for row in rows)
+        entries = []
+        for photo_id, filename, photo_type, path, detected_at, _ in rows:
+            persons = [label for kind, label in labels[photo_id] if kind == "person"]
+            bibs = [label for kind, label in labels[photo_id] if kind == "bib"]
+            entries.append(PhotoEntry(photo_id, filename, photo_type, path, detected_at,
+                                      persons, bibs[0] if bibs else None))
+        return entries, next_cursor
+
+    # ---------------------------------------------------
+    # Thumbnail
+    # ---------------------------------------------------
+    def thumb_path(self, photo_id, size):
+        # Dibagi per 1000 id agar satu folder tidak berisi puluhan ribu file
+        return os.path.join(self.thumb_dir, str(size), f"{photo_id // 1000:04d}", f"{photo_id}.jpg")
+
+    def thumbnail(self, entry, size=None):
+        """Path thumbnail foto (id, path), dibuat bila belum ada; None bila foto asli hilang"""
+        size = size or self.sizes[0]
+        if size not in self.sizes:
+            raise ValueError(f"Ukuran thumbnail {size} tidak dikenal, pilih {self.sizes}")
+        path = self.thumb_path(entry[0], size)
+        if os.path.exists(path):
+            return path
+        made = self._make_thumbnails(entry[0], entry[3])
+        return path if made else None
+
+    def _make_thumbnails(self, photo_id, source):
+        """Semua ukuran dari satu decode: JPEG draft ke ukuran terbesar, lalu diperkecil bertahap"""
+        if not source or not os.path.exists(source):
+            return False
+        with metrics.timer("stage_seconds", stage="thumbnail"):
+            with Image.open(source) as img:
+                largest = self.sizes[-1]
+                img.draft("RGB", (largest, largest))
+                image = img.convert("RGB")
+            for size in reversed(self.sizes):
+                image.thumbnail((size, size), Image.LANCZOS)
+                dest = self.thumb_path(photo_id, size)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                tmp = f"{dest}.{threading.get_ident()}.tmp"
+                image.save(tmp, "JPEG", quality=self.quality)
+                os.replace(tmp, dest)
+        metrics.inc("thumbnails_total")
+        return True
+
+    def _watermark(self):
+        try:
+            with open(self._watermark_path) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _save_watermark(self, photo_id):
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        tmp = f"{self._watermark_path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(photo_id))
+        os.replace(tmp, self._watermark_path)
+
+    def update(self, limit=None, batch=UPDATE_BATCH):
+        """Buat thumbnail foto yang belum diproses sejak update terakhir, kembalikan jumlahnya"""
+        made = 0
+        with self._lock:
+            last_id = self._watermark()
+            while limit is None or made < limit:
+                rows = photo_service.get_photos_after(last_id, batch, status="success")
+                if not rows:
+                    break
+                for photo_id, _, _, path, _, _ in rows:
+                    if limit is not None and made >= limit:
+                        break
+                    if not os.path.exists(self.thumb_path(photo_id, self.sizes[-1])):
+                        try:
+                            made += self._make_thumbnails(photo_id, path)
+                        except OSError as e:
+                            print(f"⚠️ Thumbnail {os.path.basename(path)} gagal dibuat: {e}")
+                    last_id = photo_id
+                self._save_watermark(last_id)
+        return made
+
+
+if __name__ == "__main__":
+    # Perbarui thumbnail untuk foto baru (aman dijalankan berkala)
+    jumlah = PhotoCatalog().update()
+    print(f"🖼️ {jumlah} thumbnail baru dibuat.")
@@ -1,79 +1,93 @@
 import os
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from PIL import Image
-from printer_service import print_file
+import time
+from photo_catalog import PhotoCatalog, PAGE_SIZE
+from print_spooler import PrintSpooler
+from print_layout import layout_pdf, size_from_pixels
+from rendition_cache import RenditionCache, PHOTO_SIZES, render
 
-OUTPUT_DIR = "output"
 PRINT_READY_DIR = "print_ready"
 
 os.makedirs(PRINT_READY_DIR, exist_ok=True)
 
-PHOTO_SIZES = {
-    "2x3": (20, 30),
-    "3x4": (30, 40),
-    "4x6": (40, 60),
-    "A4": (210, 297),
-}
 
-
-def list_photos():
-    """Menampilkan semua foto dari folder output"""
-    print("\n📸 Daftar foto siap cetak:")
-    all_photos = []
-    for subdir, _, files in os.walk(OUTPUT_DIR):
-        for f in files:
-            if f.lower().endswith((".jpg", ".jpeg", ".png")):
-                full_path = os.path.join(subdir, f)
-                all_photos.append(full_path)
-                print(f"[{len(all_photos)}] {full_path}")
-    return all_photos
+def list_photos(catalog=None, page_size=PAGE_SIZE, **filters):
+    """
+    Tampilkan foto dari katalog per halaman (terbaru dulu).
+
+    Filter: person, bib, since/until (epoch detik). Kembalikan path foto
+    yang dipilih, atau None bila tidak ada foto / pilihan tidak valid.
+    """
+    catalog = catalog or PhotoCatalog()
+    cursor, page_no = None, 1
+    while True:
+        entries, next_cursor = catalog.page(limit=page_size, cursor=cursor, **filters)
+        if not entries:
+            if page_no == 1:
+                print("❌ Tidak ada foto ditemukan di katalog.")
+            return None
+        print(f"\n📸 Daftar foto siap cetak (halaman {page_no}):")
+        for i, entry in enumerate(entries, 1):
+            persons = ", ".join(entry.persons) or "-"
+            print(f"[{i}] {entry.path}  👤 {persons}  🔢 {entry.bib or '-'}  🕒 {entry.detected_at}")
+
+        prompt = "\nPilih nomor foto yang ingin dicetak"
+        prompt += " ('n' = halaman berikutnya): " if next_cursor else ": "
+        choice = input(prompt).strip().lower()
+        if choice == "n" and next_cursor:
+            cursor, page_no = next_cursor, page_no + 1
+            continue
+        try:
+            return entries[int(choice) - 1].path
+        except (ValueError, IndexError):
+            print("⚠️ Pilihan tidak valid.")
+            return None
+
+
+def ask_filters():
+    """Filter katalog dari input operator; kosong = semua foto"""
+    filters = {}
+    person = input("Filter orang (mis. person3, kosong = semua): ").strip()
+    if person:
+        filters["person"] = person
+    bib = input("Filter nomor dada (kosong = semua): ").strip()
+    if bib:
+        filters["bib"] = bib
+    hours = input("Hanya N jam terakhir (kosong = semua): ").strip()
+    if hours:
+        try:
+            filters["since"] = time.time() - float(hours) * 3600
+        except ValueError:
+            print("⚠️ Jumlah jam tidak valid, filter waktu diabaikan.")
+    return filters
 
 
 def resize_photo(input_path, output_path, size_mm):
-    """Ubah ukuran foto ke ukuran tertentu (mm)"""
-    width_px = int(size_mm[0] / 25.4 * 300) 
-    height_px = int(size_mm[1] / 25.4 * 300)
-    img = Image.open(input_path)
-    img_resized = img.resize((width_px, height_px))
-    img_resized.save(output_path)
-    return output_path
+    """Ubah ukuran foto ke ukuran tertentu (mm), tanpa cache"""
+    return render(input_path, output_path, size_mm)
 
 
-def create_pdf_for_print(image_path, copies=1):
-    """Buat PDF siap cetak (A4 layout)"""
+def create_pdf_for_print(image_path, copies=1, size_key=None, renditions=None):
+    """Buat PDF siap cetak: salinan disusun dalam grid per lembar A4 dengan garis potong"""
     filename = os.path.splitext(os.path.basename(image_path))[0]
     pdf_path = os.path.join(PRINT_READY_DIR, f"{filename}_print.pdf")
 
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    img = Image.open(image_path)
-    img_width, img_height = img.size
-    a4_width, a4_height = A4
-
-    for i in range(copies):
-        # Posisikan di tengah halaman
-        x = (a4_width - img_width * 0.24) / 2
-        y = (a4_height - img_height * 0.24) / 2
-        c.drawImage(image_path, x, y, img_width * 0.24, img_height * 0.24)
-        c.showPage()
-
-    c.save()
+    # Tanpa size_key ukuran diambil dari piksel hasil resize_photo (300 dpi)
+    size_mm = PHOTO_SIZES[size_key] if size_key else size_from_pixels(image_path)
+    layout = layout_pdf([(image_path, copies)], size_mm, pdf_path)
+    print(f"🧾 {layout.placements} foto di {layout.sheets} lembar ({layout.per_sheet} per lembar)")
+    if renditions is not None:
+        renditions.track(pdf_path)  # PDF ikut dibatasi ukuran cache print_ready/
     return pdf_path
 
 
 def start_photo_print_menu():
     print("🖨️=== MENU CETAK FOTO ===")
 
-    photos = list_photos()
-    if not photos:
-        print("❌ Tidak ada foto ditemukan di folder output/")
+    selected_photo = list_photos(PhotoCatalog(), **ask_filters())
+    if selected_photo is None:
         return
-
-    try:
-        pilihan = int(input("\nPilih nomor foto yang ingin dicetak: "))
-        selected_photo = photos[pilihan - 1]
-    except (ValueError, IndexError):
-        print("⚠️ Pilihan tidak valid.")
+    if not os.path.exists(selected_photo):
+        print(f"❌ File foto tidak ditemukan: {selected_photo}")
         return
 
     print("\nUkuran foto tersedia:")
@@ -89,12 +103,9 @@ def start_photo_print_menu():
 
     copies = int(input("Masukkan jumlah cetak: ") or "1")
 
-    # Buat versi resize
-    resized_path = os.path.join(
-        PRINT_READY_DIR,
-        f"{os.path.basename(selected_photo).split('.')[0]}_{size_key}.jpg"
-    )
-    resized_path = resize_photo(selected_photo, resized_path, PHOTO_SIZES[size_key])
+    # Versi siap cetak dari cache (biasanya sudah di-render di background saat foto diklasifikasi)
+    renditions = RenditionCache(PRINT_READY_DIR)
+    resized_path = renditions.get(selected_photo, size_key)
 
     print(f"\n✅ Siap mencetak {copies}x foto '{size_key}' dari {selected_photo}")
     print("1️⃣ Cetak langsung ke printer")
@@ -102,10 +113,15 @@ def start_photo_print_menu():
     option = input("Pilih opsi (1/2): ").strip()
 
     if option == "1":
-        for _ in range(copies):
-            print_file(resized_path)
+        # Satu job antrian untuk semua salinan; spooler mengirimnya sebagai satu `lp -n`
+        spooler = PrintSpooler()
+        spooler.start()
+        job_id = spooler.submit(resized_path, copies)
+        print(f"🧾 Job cetak #{job_id} diantrikan ({copies} salinan)")
+        spooler.stop()
+        print(f"📋 Status job: {spooler.job(job_id).state}")
     elif option == "2":
-        pdf_path = create_pdf_for_print(resized_path, copies)
+        pdf_path = create_pdf_for_print(resized_path, copies, size_key, renditions)
         print(f"📄 File PDF tersimpan: {pdf_path}")
     else:
         print("❎ Cetak dibatalkan.")
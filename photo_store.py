@@ -0,0 +1,186 @@
+import os
+import json
+import uuid
+import errno
+import shutil
+import threading
+from collections import Counter
+
+from dedup import file_digest
+
+# Urutan cara menautkan objek ke folder tujuan, dari yang paling murah
+LINK_METHODS = ("hardlink", "reflink", "symlink", "copy")
+FICLONE = 0x40049409  # ioctl Linux (btrfs/xfs): salinan copy-on-write tanpa menyalin data
+
+
+def _reflink(src, dst):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOTSUP, "reflink tidak didukung")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _place(method, src, dst):
+    if method == "hardlink":
+        os.link(src, dst)
+    elif method == "reflink":
+        _reflink(src, dst)
+    elif method == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def _unlink_quiet(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class Placement:
+    """Tautan hasil satu foto yang sudah terpasang, menunggu baris DB-nya di-commit"""
+
+    def __init__(self, store, manifest, targets):
+        self.store = store
+        self.manifest = manifest
+        self.targets = targets
+
+    def done(self):
+        _unlink_quiet(self.manifest)
+
+    def rollback(self):
+        for dest in self.targets:
+            _unlink_quiet(dest)
+        _unlink_quiet(self.manifest)
+
+
+class PhotoStore:
+    """
+    Penyimpanan foto asli berbasis isi (SHA-256), ditulis sekali per foto.
+
+    Folder per orang/nomor hanya berisi tautan ke objek: hardlink, reflink,
+    atau symlink sesuai kemampuan filesystem, dengan copy sebagai cadangan.
+    Cara yang berhasil diingat per device agar percobaan gagal tidak diulang.
+    """
+
+    def __init__(self, root, methods=LINK_METHODS):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.pending_dir = os.path.join(root, "pending")
+        self.methods = tuple(methods)
+        self._method_cache = {}
+        self._lock = threading.Lock()
+        self.link_counts = Counter()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.pending_dir, exist_ok=True)
+
+    def object_path(self, digest, ext=".jpg"):
+        return os.path.join(self.objects_dir, digest[:2], digest + ext.lower())
+
+    def put(self, src, digest=None):
+        """Simpan isi file sumber ke store (idempoten per isi), kembalikan path objek"""
+        digest = digest or file_digest(src)
+        obj = self.object_path(digest, os.path.splitext(src)[1])
+        if not os.path.exists(obj):
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            # Symlink ke upload tidak berguna karena upload dihapus setelah diproses
+            self._materialize(src, obj, tuple(m for m in self.methods if m != "symlink") or ("copy",))
+        return obj
+
+    def link(self, obj, dest):
+        """Pasang objek di path tujuan secara atomik, kembalikan cara yang dipakai"""
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        method = self._materialize(obj, dest, self.methods)
+        with self._lock:
+            self.link_counts[method] += 1
+        return method
+
+    def _materialize(self, src, dst, methods):
+        dest_dir = os.path.dirname(dst)
+        key = (os.stat(dest_dir).st_dev, methods)
+        with self._lock:
+            cached = self._method_cache.get(key)
+        if cached in methods:
+            methods = methods[methods.index(cached):]
+
+        tmp = os.path.join(dest_dir, f".{os.path.basename(dst)}.{uuid.uuid4().hex[:8]}.tmp")
+        error = None
+        for method in methods:
+            try:
+                _place(method, src, tmp)
+            except OSError as e:
+                _unlink_quiet(tmp)
+                error = e
+                continue
+            os.replace(tmp, dst)
+            # Batas jumlah hardlink per inode tidak berarti filesystem-nya tidak mendukung
+            if not (error is not None and error.errno == errno.EMLINK):
+                with self._lock:
+                    self._method_cache[key] = method
+            return method
+        raise error
+
+    # ---------------------------------------------------
+    # Transaksi tautan ↔ baris database
+    # ---------------------------------------------------
+    def place(self, obj, targets):
+        """
+        Tautkan objek ke semua tujuan, dicatat di jurnal pending/ lebih dulu.
+
+        Pemanggil menulis baris DB lalu memanggil done(), atau rollback()
+        bila gagal. Jurnal yang tersisa karena crash ditangani recover().
+        """
+        targets = list(dict.fromkeys(targets))
+        manifest = os.path.join(self.pending_dir, f"{uuid.uuid4().hex}.json")
+        tmp = manifest + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"object": obj, "targets": targets}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, manifest)
+
+        placement = Placement(self, manifest, [])
+        try:
+            for dest in targets:
+                self.link(obj, dest)
+                placement.targets.append(dest)
+        except BaseException:
+            placement.rollback()
+            raise
+        return placement
+
+    def recover(self, row_exists):
+        """
+        Selesaikan jurnal dari run yang crash: bila baris DB ternyata sudah
+        tertulis, tautan dipertahankan; bila belum, tautan dihapus agar foto
+        (yang masih ada di uploads) diproses ulang dengan bersih.
+        """
+        rolled_back = 0
+        for name in os.listdir(self.pending_dir):
+            path = os.path.join(self.pending_dir, name)
+            if not name.endswith(".json"):
+                _unlink_quiet(path)
+                continue
+            try:
+                with open(path) as f:
+                    targets = json.load(f)["targets"]
+            except (OSError, ValueError, KeyError):
+                _unlink_quiet(path)
+                continue
+            if targets and not any(row_exists(dest) for dest in targets):
+                Placement(self, path, targets).rollback()
+                rolled_back += 1
+            else:
+                _unlink_quiet(path)
+        return rolled_back
+
+    def report(self):
+        with self._lock:
+            counts = dict(self.link_counts)
+        if not counts:
+            return "🗄️ Store foto: belum ada tautan dibuat."
+        detail = ", ".join(f"{m} {counts[m]}" for m in LINK_METHODS if m in counts)
+        return f"🗄️ Store foto: {sum(counts.values())} tautan ({detail})"
@@ -0,0 +1,226 @@
+import os
+import time
+import queue
+import itertools
+import threading
+from collections import defaultdict
+
+from metrics import metrics
+
+QUEUE_SIZE = 16  # batas antrian antar tahap (backpressure ke tahap sebelumnya)
+
+_DONE = object()
+
+
+class StageStats:
+    """Jumlah foto & waktu sibuk per tahap, untuk laporan throughput"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = defaultdict(int)
+        self.busy = defaultdict(float)
+        self.workers = {}
+
+    def register(self, stage, workers):
+        with self._lock:
+            self.workers[stage] = workers
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.items[stage] += 1
+            self.busy[stage] += seconds
+        metrics.observe("pipeline_stage_seconds", seconds, stage=stage)
+
+    def report(self, wall):
+        with self._lock:
+            lines = [f"📊 Throughput per tahap (durasi {wall:.1f}s):"]
+            for stage, workers in self.workers.items():
+                n, busy = self.items[stage], self.busy[stage]
+                per_photo = busy / n if n else 0.0
+                capacity = workers / per_photo if per_photo else 0.0
+                lines.append(f"   {stage:<8} {n:>7} foto | {per_photo * 1000:7.1f} ms/foto | "
+                             f"kapasitas ±{capacity:.1f} foto/s ({workers} worker)")
+            total = max(self.items.values(), default=0)
+        lines.append(f"   total    {total / wall if wall else 0:.1f} foto/s")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    Eksekutor bertahap: tiap tahap punya thread worker sendiri, antar tahap
+    dihubungkan antrian terbatas sehingga decode, deteksi & OCR foto yang
+    berbeda berjalan tumpang tindih.
+
+    Item adalah dict yang diisi fungsi tahap. Error dicatat di item["error"]
+    dan item tetap diteruskan (tahap berikutnya melewatinya). results()
+    mengeluarkan item sesuai urutan submit lewat reorder buffer, sehingga
+    tahap terakhir (mis. klasifikasi galeri) melihat urutan yang sama dengan
+    versi serial. Jumlah item di dalam pipeline dibatasi `max_in_flight`.
+    Tahap CPU berat bisa diteruskan ke pool proses dari dalam fungsi tahap.
+    """
+
+    def __init__(self, stages, maxsize=QUEUE_SIZE, max_in_flight=None, ordered=True, stats=None):
+        self.stages = [(name, fn, max(1, workers)) for name, fn, workers in stages]
+        self.ordered = ordered
+        self.stats = stats
+        self._queues = [queue.Queue(maxsize) for _ in range(len(self.stages) + 1)]
+        capacity = maxsize * len(self._queues) + sum(w for _, _, w in self.stages)
+        self._slots = threading.BoundedSemaphore(max_in_flight or capacity)
+        self._seq = itertools.count()
+        self._submit_lock = threading.Lock()
+        self._closed = False
+
+        for index, (name, fn, workers) in enumerate(self.stages):
+            if stats is not None:
+                stats.register(name, workers)
+            live = [workers, threading.Lock()]
+            for i in range(workers):
+                threading.Thread(target=self._work, args=(index, fn, live),
+                                 name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, item):
+        """Masukkan item; menunggu bila pipeline penuh. Kembalikan nomor urutnya."""
+        self._slots.acquire()
+        with self._submit_lock:
+            if self._closed:
+                self._slots.release()
+                raise RuntimeError("Pipeline sudah ditutup")
+            seq = next(self._seq)
+            self._queues[0].put((seq, item))
+        return seq
+
+    def close(self):
+        """Tidak ada item baru; results() berhenti setelah semua item keluar"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in range(self.stages[0][2]):
+                self._queues[0].put(_DONE)
+
+    def _work(self, index, fn, live):
+        name = self.stages[index][0]
+        inbox, outbox = self._queues[index], self._queues[index + 1]
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                with live[1]:
+                    live[0] -= 1
+                    last = live[0] == 0
+                if last:
+                    # Worker terakhir yang selesai meneruskan tanda berhenti ke tahap berikutnya
+                    downstream = self.stages[index + 1][2] if index + 1 < len(self.stages) else 1
+                    for _ in range(downstream):
+                        outbox.put(_DONE)
+                return
+            _, item = entry
+            if item.get("error") is None:
+                t0 = time.perf_counter()
+                try:
+                    fn(item)
+                except Exception as e:
+                    item["error"] = f"{name}: {e}"
+                if self.stats is not None:
+                    self.stats.add(name, time.perf_counter() - t0)
+            outbox.put(entry)
+
+    def results(self):
+        """Generator item yang sudah melewati semua tahap (urut submit bila ordered)"""
+        final = self._queues[-1]
+        buffer = {}
+        next_seq = 0
+        while True:
+            entry = final.get()
+            if entry is _DONE:
+                return
+            seq, item = entry
+            if not self.ordered:
+                self._slots.release()
+                yield item
+                continue
+            buffer[seq] = item
+            while next_seq in buffer:
+                item = buffer.pop(next_seq)
+                next_seq += 1
+                self._slots.release()
+                yield item
+
+    def map(self, items):
+        """Submit semua item dari thread terpisah & hasilkan keluarannya"""
+        def feed():
+            try:
+                for item in items:
+                    self.submit(item)
+            finally:
+                self.close()
+
+        threading.Thread(target=feed, name="pipeline-feed", daemon=True).start()
+        return self.results()
+
+
+# ===================================================
+# 📸 Tahap foto (sama dengan analyze_photo, dipecah)
+# ===================================================
+def photo_stages(decode_workers=2, detect_workers=1, ocr_workers=1, pool=None, encode_workers=4):
+    """
+    Tahap decode → deteksi → encoding → OCR untuk item {"path": ...}.
+
+    Dengan `pool` (DetectionPool), deteksi & OCR dijalankan di proses worker
+    dan thread tahap hanya menunggu hasilnya. Encoding selalu di proses ini
+    lewat main.face_encoder, sehingga chip dari beberapa foto yang sedang
+    berjalan digabung jadi satu batch; `encode_workers` = foto yang bisa
+    menunggu batch bersamaan.
+    """
+    import main
+    from image_loader import load_image, ImageRejected
+
+    ocr = pool.ocr if pool else main.ocr_number
+
+    def decode(item):
+        t0 = time.perf_counter()
+        try:
+            item["image"], _ = load_image(item["path"], target_width=main.face_detector.frame_width)
+            item["status"] = "ok"
+        except ImageRejected as e:
+            if e.reason != "too_big":
+                raise
+            item["status"] = "too_big"
+        item["timings"] = {"decode": time.perf_counter() - t0}
+
+    def detect_stage(item):
+        if item["status"] == "ok":
+            if pool:
+                item["locations"] = pool.locate(item["image"], item["timings"])
+            else:
+                t0 = time.perf_counter()
+                item["locations"] = main.face_detector.locate(item["image"])
+                item["timings"]["detect"] = time.perf_counter() - t0
+
+    def encode_stage(item):
+        if item["status"] == "ok":
+            t0 = time.perf_counter()
+            item["encodings"] = main.face_encoder.encode(item["image"], item["locations"])
+            item["timings"]["encode"] = time.perf_counter() - t0
+
+    def ocr_stage(item):
+        if item["status"] == "ok":
+            item["digits"], timings, item["ocr_source"] = ocr(item["image"], item["locations"])
+            item["timings"].update(timings)
+
+    return [
+        ("decode", decode, decode_workers),
+        ("deteksi", detect_stage, detect_workers),
+        ("encode", encode_stage, encode_workers),
+        ("ocr", ocr_stage, ocr_workers),
+    ]
+
+
+def analysis_of(item):
+    """Ubah item pipeline menjadi dict analisis seperti keluaran analyze_photo"""
+    import main
+
+    filename = os.path.basename(item["path"])
+    if item["status"] != "ok":
+        return {"filename": filename, "status": item["status"]}
+    return main.analysis_result(filename, item["image"], item["locations"], item["encodings"],
+                                item["digits"], item["ocr_source"], item["timings"])
@@ -0,0 +1,108 @@
+import os
+from collections import namedtuple
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from rendition_cache import PRINT_DPI
+
+MARGIN_MM = 5  # tepi kertas yang tidak dipakai printer
+GAP_MM = 2  # jarak antar foto, ruang untuk potong
+MARK_MM = 3  # panjang garis potong di tepi kertas
+
+Grid = namedtuple("Grid", "cols rows cell_w cell_h x0 y0 gap")
+Layout = namedtuple("Layout", "pdf_path sheets per_sheet placements")
+
+
+def grid_for(size_mm, sheet=A4, margin_mm=MARGIN_MM, gap_mm=GAP_MM):
+    """Grid foto ukuran size_mm (lebar, tinggi) di satu lembar, dipusatkan; satuan point"""
+    cell_w, cell_h = size_mm[0] * mm, size_mm[1] * mm
+    sheet_w, sheet_h = sheet
+    for margin in (margin_mm * mm, 0):
+        gap = gap_mm * mm if margin else 0
+        cols = int((sheet_w - 2 * margin + gap + 0.01) // (cell_w + gap))
+        rows = int((sheet_h - 2 * margin + gap + 0.01) // (cell_h + gap))
+        if cols and rows:
+            break
+    else:
+        raise ValueError(f"Ukuran {size_mm[0]}x{size_mm[1]}mm tidak muat di kertas")
+    used_w = cols * cell_w + (cols - 1) * gap
+    used_h = rows * cell_h + (rows - 1) * gap
+    return Grid(cols, rows, cell_w, cell_h, (sheet_w - used_w) / 2, (sheet_h - used_h) / 2, gap)
+
+
+def size_from_pixels(image_path, dpi=PRINT_DPI):
+    """Ukuran fisik (mm) foto yang sudah di-resize untuk dicetak di dpi tertentu"""
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        width, height = img.size
+    return width / dpi * 25.4, height / dpi * 25.4
+
+
+def _cut_marks(c, grid, sheet):
+    """Garis potong di tepi kertas, sejajar tepi tiap kolom & baris"""
+    sheet_w, sheet_h = sheet
+    length = MARK_MM * mm
+    xs, ys = set(), set()
+    for col in range(grid.cols):
+        left = grid.x0 + col * (grid.cell_w + grid.gap)
+        xs.update((left, left + grid.cell_w))
+    for row in range(grid.rows):
+        bottom = grid.y0 + row * (grid.cell_h + grid.gap)
+        ys.update((bottom, bottom + grid.cell_h))
+
+    c.saveState()
+    c.setLineWidth(0.25)
+    top = grid.y0 + grid.rows * grid.cell_h + (grid.rows - 1) * grid.gap
+    right = grid.x0 + grid.cols * grid.cell_w + (grid.cols - 1) * grid.gap
+    for x in xs:
+        c.line(x, max(0, grid.y0 - length - 1), x, max(0, grid.y0 - 1))
+        c.line(x, min(sheet_h, top + 1), x, min(sheet_h, top + length + 1))
+    for y in ys:
+        c.line(max(0, grid.x0 - length - 1), y, max(0, grid.x0 - 1), y)
+        c.line(min(sheet_w, right + 1), y, min(sheet_w, right + length + 1), y)
+    c.restoreState()
+
+
+def layout_pdf(jobs, size_mm, pdf_path, sheet=A4, cut_marks=True, margin_mm=MARGIN_MM, gap_mm=GAP_MM):
+    """
+    Susun banyak salinan (dan/atau beberapa foto) ukuran size_mm dalam grid per lembar.
+
+    `jobs` berisi (path_gambar, jumlah_salinan). Tiap gambar ditanam sekali
+    sebagai form XObject lalu dipakai ulang di semua posisi & halaman, jadi
+    ukuran PDF dan kerja rasterisasi printer tidak ikut naik per salinan.
+    Kembalikan Layout(pdf_path, sheets, per_sheet, placements).
+    """
+    grid = grid_for(size_mm, sheet, margin_mm, gap_mm)
+    per_sheet = grid.cols * grid.rows
+    c = canvas.Canvas(pdf_path, pagesize=sheet)
+    c.setTitle(os.path.basename(pdf_path))
+
+    forms = {}
+    placements = []
+    for image_path, copies in jobs:
+        name = forms.get(image_path)
+        if name is None:
+            name = forms[image_path] = f"foto{len(forms)}"
+            c.beginForm(name, 0, 0, grid.cell_w, grid.cell_h)
+            c.drawImage(image_path, 0, 0, grid.cell_w, grid.cell_h)
+            c.endForm()
+        placements.extend([name] * copies)
+
+    sheets = 0
+    for start in range(0, len(placements), per_sheet):
+        for slot, name in enumerate(placements[start:start + per_sheet]):
+            # Isi dari kiri atas, baris demi baris
+            col, row = slot % grid.cols, grid.rows - 1 - slot // grid.cols
+            c.saveState()
+            c.translate(grid.x0 + col * (grid.cell_w + grid.gap), grid.y0 + row * (grid.cell_h + grid.gap))
+            c.doForm(name)
+            c.restoreState()
+        if cut_marks and grid.gap:
+            _cut_marks(c, grid, sheet)
+        c.showPage()
+        sheets += 1
+
+    c.save()
+    return Layout(pdf_path, sheets, per_sheet, len(placements))
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple, defaultdict
+
+from metrics import metrics
+from printer_service import LpBackend, PrinterError
+
+PRINT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "print_queue.db")
+DEFAULT_OPTIONS = ("fit-to-page",)
+BATCH_WINDOW = 0.5  # tunggu sebentar agar kiriman beruntun masuk satu batch
+POLL_INTERVAL = 5.0  # interval polling lpstat untuk job yang sudah dikirim
+MAX_FILES = 20  # file per satu panggilan lp
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 10.0
+
+PrintJob = namedtuple("PrintJob", "id path copies printer options state cups_id attempts error")
+
+
+class PrintSpooler:
+    """
+    Antrian cetak persisten (SQLite) dengan spooler di background.
+
+    submit() hanya mencatat job lalu kembali. Spooler menggabungkan job untuk
+    file, printer & opsi yang sama menjadi satu `lp -n <total salinan>`, dan
+    file berbeda dengan jumlah salinan sama dikirim dalam satu panggilan lp.
+    Status job: queued → submitted (id job CUPS) → done / failed, diperbarui
+    dengan polling backend (lpstat). Backend bisa diganti untuk test.
+    """
+
+    def __init__(self, db_path=PRINT_DB_PATH, backend=None, batch_window=BATCH_WINDOW,
+                 poll_interval=POLL_INTERVAL, max_files=MAX_FILES, max_attempts=MAX_ATTEMPTS,
+                 retry_delay=RETRY_DELAY):
+        self.db_path = db_path
+        self.backend = backend or LpBackend()
+        self.batch_window = batch_window
+        self.poll_interval = poll_interval
+        self.max_files = max_files
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._conn = None
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._thread = None
+        self._stopping = False
+        self._last_poll = 0.0
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS print_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    copies INTEGER NOT NULL DEFAULT 1,
+                    printer TEXT,
+                    options TEXT NOT NULL DEFAULT '[]',
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    cups_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    not_before REAL NOT NULL DEFAULT 0,
+                    created_at REAL,
+                    updated_at REAL,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_print_jobs_state ON print_jobs(state, id)")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------------------------------------------------
+    # Producer (menu / API)
+    # ---------------------------------------------------
+    def submit(self, path, copies=1, printer=None, options=DEFAULT_OPTIONS):
+        """Antrikan file untuk dicetak, kembalikan id job tanpa menunggu printer"""
+        if copies < 1:
+            raise ValueError("Jumlah salinan minimal 1")
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        now = time.time()
+        with self._changed:
+            cur = self._db().execute(
+                "INSERT INTO print_jobs (path, copies, printer, options, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(path), copies, printer, json.dumps(list(options)), now, now),
+            )
+            self._changed.notify_all()
+        metrics.inc("print_jobs_total")
+        return cur.lastrowid
+
+    def job(self, job_id):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, path, copies, printer, options, state, cups_id, attempts, error "
+                "FROM print_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    @staticmethod
+    def _job(row):
+        return PrintJob(row[0], row[1], row[2], row[3], tuple(json.loads(row[4])), *row[5:])
+
+    def counts(self):
+        with self._lock:
+            rows = self._db().execute("SELECT state, COUNT(*) FROM print_jobs GROUP BY state").fetchall()
+        counts = {"queued": 0, "submitted": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    # ---------------------------------------------------
+    # Spooler
+    # ---------------------------------------------------
+    def dispatch(self):
+        """Kirim semua job queued yang siap dalam batch, kembalikan jumlah panggilan lp"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, path, copies, printer, options, state, cups_id, attempts, error FROM print_jobs "
+                "WHERE state = 'queued' AND not_before <= ? ORDER BY id", (time.time(),)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        # Salinan file yang sama digabung: satu path → total salinan & job asalnya
+        merged = defaultdict(lambda: [0, []])
+        for job in map(self._job, rows):
+            entry = merged[(job.printer, job.options, job.path)]
+            entry[0] += job.copies
+            entry[1].append(job.id)
+
+        # File dengan printer, opsi & jumlah salinan sama → satu panggilan lp
+        batches = defaultdict(list)
+        for (printer, options, path), (copies, ids) in merged.items():
+            batches[(printer, options, copies)].append((path, ids))
+
+        calls = 0
+        for (printer, options, copies), files in batches.items():
+            for start in range(0, len(files), self.max_files):
+                chunk = files[start:start + self.max_files]
+                ids = [job_id for _, job_ids in chunk for job_id in job_ids]
+                self._send(printer, options, copies, [path for path, _ in chunk], ids)
+                calls += 1
+        return calls
+
+    def _send(self, printer, options, copies, paths, ids):
+        marks = ",".join("?" * len(ids))
+        now = time.time()
+        try:
+            with metrics.timer("stage_seconds", stage="lp"):
+                cups_id = self.backend.submit(paths, copies, printer, options)
+        except PrinterError as e:
+            print(f"⚠️ Gagal mengirim ke printer: {e}")
+            metrics.inc("print_submit_errors_total")
+            with self._changed:
+                self._db().execute(f"""
+                    UPDATE print_jobs SET attempts = attempts + 1, error = ?, updated_at = ?,
+                        state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END,
+                        not_before = ? + ? * (attempts + 1)
+                    WHERE id IN ({marks})
+                """, (str(e), now, self.max_attempts, now, self.retry_delay, *ids))
+                self._changed.notify_all()
+            return None
+
+        metrics.inc("print_spool_submits_total")
+        metrics.inc("print_copies_total", copies * len(paths))
+        with self._changed:
+            self._db().execute(f"""
+                UPDATE print_jobs SET state = 'submitted', cups_id = ?, attempts = attempts + 1,
+                    error = NULL, updated_at = ?
+                WHERE id IN ({marks})
+            """, (cups_id, now, *ids))
+            self._changed.notify_all()
+        print(f"🖨️ {len(paths)} file x{copies} dikirim sebagai job {cups_id}")
+        return cups_id
+
+    def poll(self):
+        """Perbarui status job yang sudah dikirim dari backend, kembalikan jumlah yang selesai"""
+        self._last_poll = time.monotonic()
+        with self._lock:
+            cups_ids = [row[0] for row in self._db().execute(
+                "SELECT DISTINCT cups_id FROM print_jobs WHERE state = 'submitted'"
+            )]
+        if not cups_ids:
+            return 0
+        try:
+            status = self.backend.status(cups_ids)
+        except PrinterError as e:
+            print(f"⚠️ Gagal membaca status printer: {e}")
+            return 0
+
+        finished = [(state, cups_id) for cups_id, state in status.items() if state in ("done", "failed")]
+        if not finished:
+            return 0
+        now = time.time()
+        with self._changed:
+            changed = 0
+            for state, cups_id in finished:
+                changed += self._db().execute(
+                    "UPDATE print_jobs SET state = ?, updated_at = ? WHERE cups_id = ? AND state = 'submitted'",
+                    (state, now, cups_id),
+                ).rowcount
+            self._changed.notify_all()
+        return changed
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="print-spooler", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        """Kirim job yang masih antri lalu hentikan thread spooler"""
+        with self._changed:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._changed.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _has_queued(self):
+        return self._db().execute(
+            "SELECT 1 FROM print_jobs WHERE state = 'queued' AND not_before <= ? LIMIT 1", (time.time(),)
+        ).fetchone() is not None
+
+    def _run(self):
+        while True:
+            with self._changed:
+                if not self._stopping and not self._has_queued():
+                    self._changed.wait(timeout=self.poll_interval)
+                stopping = self._stopping
+                if not stopping and self._has_queued():
+                    # Beri waktu kiriman berikutnya (salinan/foto lain) ikut batch yang sama
+                    self._changed.wait(timeout=self.batch_window)
+                    stopping = self._stopping
+            try:
+                self.dispatch()
+                if time.monotonic() - self._last_poll >= self.poll_interval:
+                    self.poll()
+            except Exception as e:
+                print(f"⚠️ Spooler error: {e}")
+            if stopping:
+                return
+
+    def wait_idle(self, timeout=None, include_submitted=False):
+        """Tunggu sampai tidak ada job queued (dan submitted bila include_submitted)"""
+        states = ("queued", "submitted") if include_submitted else ("queued",)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                counts = self.counts()
+                if not any(counts[s] for s in states):
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(timeout=POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL))
+
+
+if __name__ == "__main__":
+    # Spooler mandiri: kirim job dari antrian & pantau statusnya sampai Ctrl+C
+    spooler = PrintSpooler()
+    spooler.start()
+    print(f"🖨️ Spooler aktif: {spooler.counts()}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        spooler.stop()
@@ -1,7 +1,59 @@
 import os
+import re
 import subprocess
 
-def print_file(file_path):
+REQUEST_ID = re.compile(r"request id is (\S+)")
+
+
+class PrinterError(Exception):
+    """lp/lpstat gagal atau tidak tersedia"""
+
+
+class LpBackend:
+    """
+    Backend CUPS lewat perintah lp/lpstat.
+
+    Perintah bisa diganti (mis. skrip lp palsu saat test). Banyak file dan
+    salinan dikirim dalam satu `lp -n`, sehingga satu batch = satu job CUPS.
+    """
+
+    def __init__(self, lp="lp", lpstat="lpstat", timeout=30):
+        self.lp = lp
+        self.lpstat = lpstat
+        self.timeout = timeout
+
+    def _run(self, cmd):
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise PrinterError(f"{cmd[0]}: {e}") from e
+        if result.returncode != 0:
+            raise PrinterError(result.stderr.strip() or f"{cmd[0]} keluar dengan kode {result.returncode}")
+        return result.stdout
+
+    def submit(self, paths, copies=1, printer=None, options=()):
+        """Kirim file (satu job CUPS), kembalikan id job mis. 'HP-42'"""
+        cmd = [self.lp, "-n", str(copies)]
+        if printer:
+            cmd += ["-d", printer]
+        for option in options:
+            cmd += ["-o", option]
+        out = self._run(cmd + list(paths))
+        match = REQUEST_ID.search(out)
+        if not match:
+            raise PrinterError(f"Id job tidak dikenali: {out.strip()!r}")
+        return match.group(1)
+
+    def status(self, job_ids):
+        """
+        Status job dari `lpstat -o`: 'printing' selama masih di antrian CUPS,
+        'done' bila sudah hilang dari sana.
+        """
+        active = {line.split()[0] for line in self._run([self.lpstat, "-o"]).splitlines() if line.strip()}
+        return {job_id: "printing" if job_id in active else "done" for job_id in job_ids}
+
+
+def print_file(file_path, copies=1, backend=None):
     """Cetak file gambar langsung ke printer menggunakan lp (Linux)."""
     if not os.path.exists(file_path):
         print(f"❌ File tidak ditemukan: {file_path}")
@@ -9,7 +61,7 @@ def print_file(file_path):
 
     print(f"🖨️ Mengirim ke printer: {file_path}")
     try:
-        subprocess.run(["lp", "-o", "fit-to-page", file_path], check=True)
+        (backend or LpBackend()).submit([file_path], copies, options=("fit-to-page",))
         print("✅ File terkirim ke printer.")
-    except subprocess.CalledProcessError:
+    except PrinterError:
         print("⚠️ Gagal mengirim ke printer. Pastikan printer terhubung.")
@@ -0,0 +1,236 @@
+import os
+import json
+import queue
+import hashlib
+import threading
+from PIL import Image
+
+from dedup import file_digest
+from metrics import metrics
+
+PHOTO_SIZES = {
+    "2x3": (20, 30),
+    "3x4": (30, 40),
+    "4x6": (40, 60),
+    "A4": (210, 297),
+}
+PRINT_DPI = 300
+QUALITY = 95
+MAX_BYTES = 500 * 1024 * 1024  # batas isi folder print_ready/
+LOW_WATER = 0.9  # eviction berhenti di 90% batas agar tidak jalan tiap render
+QUEUE_SIZE = 64
+
+
+def render(source, dest, size_mm, dpi=PRINT_DPI, quality=QUALITY, resample=Image.LANCZOS):
+    """
+    Render foto ke ukuran cetak size_mm (mm) pada dpi tertentu.
+
+    JPEG di-decode dengan draft() (DCT scaling) sedekat mungkin di atas
+    ukuran target, lalu di-resample dengan filter berkualitas. File ditulis
+    ke tmp lalu os.replace, sehingga pembaca tidak pernah melihat file setengah jadi.
+    """
+    size_px = (int(size_mm[0] / 25.4 * dpi), int(size_mm[1] / 25.4 * dpi))
+    with Image.open(source) as img:
+        img.draft("RGB", size_px)
+        resized = img.convert("RGB").resize(size_px, resample)
+    tmp = os.path.join(os.path.dirname(dest) or ".", f".{os.path.basename(dest)}.{threading.get_ident()}.tmp")
+    try:
+        resized.save(tmp, "JPEG", quality=quality)
+        os.replace(tmp, dest)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return dest
+
+
+class RenditionCache:
+    """
+    Cache foto siap cetak di print_ready/, dengan kunci isi foto sumber.
+
+    Nama file = hash isi sumber + ukuran + hash parameter render, jadi foto
+    yang sama (termasuk tautannya di folder orang/nomor lain) hanya di-render
+    sekali per ukuran. Waktu pakai terakhir disimpan sebagai mtime file;
+    bila isi folder (termasuk PDF cetak) melewati max_bytes, file yang paling
+    lama tidak dipakai dihapus lebih dulu. prefetch() me-render di thread
+    background untuk foto yang baru diklasifikasi.
+    """
+
+    def __init__(self, root, max_bytes=MAX_BYTES, sizes=PHOTO_SIZES, dpi=PRINT_DPI, quality=QUALITY,
+                 resample=Image.LANCZOS, maxsize=QUEUE_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.sizes = sizes
+        self.dpi = dpi
+        self.quality = quality
+        self.resample = resample
+        params = json.dumps({"dpi": dpi, "quality": quality, "resample": int(resample)}, sort_keys=True)
+        self._params_key = hashlib.sha1(params.encode("utf-8")).hexdigest()[:8]
+        self._lock = threading.Lock()
+        self._digests = {}
+        self._rendering = {}
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        os.makedirs(root, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._files())
+
+    def _files(self):
+        """(path, ukuran, mtime) semua file cache; file tmp diabaikan"""
+        files = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, st.st_size, st.st_mtime))
+        return files
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    # ---------------------------------------------------
+    # Kunci
+    # ---------------------------------------------------
+    def digest(self, source):
+        """Hash isi sumber; diingat per inode sehingga tautan ke objek yang sama tidak di-hash ulang"""
+        st = os.stat(source)
+        inode = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(inode)
+        if digest is None:
+            digest = file_digest(source)
+            with self._lock:
+                self._digests[inode] = digest
+        return digest
+
+    def remember(self, source, digest):
+        """Catat hash yang sudah diketahui pemanggil (mis. nama objek di PhotoStore)"""
+        st = os.stat(source)
+        with self._lock:
+            self._digests[(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)] = digest
+
+    def path_for(self, digest, size_key):
+        return os.path.join(self.root, f"{digest[:16]}_{size_key}_{self._params_key}.jpg")
+
+    # ---------------------------------------------------
+    # Ambil / render
+    # ---------------------------------------------------
+    def get(self, source, size_key, digest=None):
+        """Path rendition siap cetak untuk sumber & ukuran ini, render bila belum ada"""
+        if digest is not None:
+            self.remember(source, digest)
+        path = self.path_for(self.digest(source), size_key)
+
+        while True:
+            with self._lock:
+                if os.path.exists(path):
+                    self.hits += 1
+                    metrics.inc("rendition_cache_total", result="hit")
+                    _touch(path)
+                    return path
+                pending = self._rendering.get(path)
+                if pending is None:
+                    pending = self._rendering[path] = threading.Event()
+                    break
+            # Sedang di-render thread lain (mis. prefetch): tunggu hasilnya
+            pending.wait()
+
+        try:
+            self.misses += 1
+            metrics.inc("rendition_cache_total", result="miss")
+            with metrics.timer("stage_seconds", stage="render"):
+                render(source, path, self.sizes[size_key], self.dpi, self.quality, self.resample)
+            self.track(path)
+        finally:
+            with self._lock:
+                self._rendering.pop(path).set()
+        return path
+
+    def track(self, path):
+        """Hitung file lain di folder cache (mis. PDF cetak) ke batas ukuran"""
+        with self._lock:
+            self._total += os.path.getsize(path)
+            over = self._total > self.max_bytes
+        if over:
+            self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Hapus file yang paling lama tidak dipakai sampai di bawah batas, kembalikan jumlahnya"""
+        with self._lock:
+            # Pindai ulang: proses lain (menu cetak) bisa ikut menulis ke folder yang sama
+            files = sorted(self._files(), key=lambda f: f[2])
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * LOW_WATER
+            removed = 0
+            for path, size, _ in files:
+                if total <= target:
+                    break
+                if path == keep or path in self._rendering:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._total = total
+        if removed:
+            metrics.inc("rendition_evicted_total", removed)
+        return removed
+
+    # ---------------------------------------------------
+    # Prefetch di background
+    # ---------------------------------------------------
+    def prefetch(self, source, size_keys, digest=None):
+        """Antrikan render ukuran-ukuran ini tanpa menunggu; antrian penuh = dilewati"""
+        self.start()
+        try:
+            self._queue.put_nowait((source, tuple(size_keys), digest))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rendition", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            source, size_keys, digest = item
+            for size_key in size_keys:
+                try:
+                    self.get(source, size_key, digest)
+                except Exception as e:
+                    print(f"⚠️ Gagal menyiapkan foto cetak {os.path.basename(source)} ({size_key}): {e}")
+                    break
+
+
+def _touch(path):
+    # mtime = terakhir dipakai, dasar urutan LRU
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,30 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch_process import Checkpoint, iter_sources
+
+
+def test_iter_sources_folder_dan_daftar(tmp_path):
+    arsip = tmp_path / "arsip"
+    (arsip / "hari2").mkdir(parents=True)
+    (arsip / ".store").mkdir()
+    for rel in ("b.jpg", "a.JPG", "catatan.txt", "hari2/c.png", ".store/x.jpg"):
+        (arsip / rel).write_bytes(b"x")
+
+    found = list(iter_sources(str(arsip)))
+    assert [os.path.relpath(p, arsip) for p in found] == ["a.JPG", "b.jpg", os.path.join("hari2", "c.png")]
+
+    daftar = tmp_path / "daftar.txt"
+    daftar.write_text(f"# komentar\n{found[1]}\n\n{arsip / 'catatan.txt'}\n", encoding="utf-8")
+    assert list(iter_sources(str(daftar))) == [found[1]]
+
+
+def test_checkpoint_dilanjutkan(tmp_path):
+    path = str(tmp_path / "ckpt.txt")
+    ckpt = Checkpoint(path)
+    ckpt.record(["/arsip/a.jpg", "/arsip/b.jpg"])
+
+    resumed = Checkpoint(path)
+    assert "/arsip/a.jpg" in resumed and "/arsip/c.jpg" not in resumed
+    resumed.reset()
+    assert not os.path.exists(path) and not resumed.done
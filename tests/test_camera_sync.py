@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# main & camera_sync memuat model (face_recognition/easyocr) dan watchdog saat import
+pytest.importorskip("face_recognition")
+pytest.importorskip("easyocr")
+pytest.importorskip("watchdog")
+
+from database import photo_service
+
+
+@pytest.fixture
+def main_sandbox(tmp_path, monkeypatch):
+    import main
+    from photo_store import PhotoStore
+
+    monkeypatch.setattr(main, "WAJAH_DIR", str(tmp_path / "output" / "wajah"))
+    monkeypatch.setattr(main, "ANGKA_DIR", str(tmp_path / "output" / "angka"))
+    monkeypatch.setattr(main, "photo_store", PhotoStore(str(tmp_path / "output" / ".store")))
+    monkeypatch.setattr(main, "MODEL_WAJAH_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(main, "PREFETCH_SIZES", [])
+    photo_service.close()
+    monkeypatch.setattr(photo_service, "DB_PATH", str(tmp_path / "foto.db"))
+    yield main
+    photo_service.close()
+
+
+def _status_worker():
+    import main
+    return main.IS_WORKER, main.renditions, main.unknown_clusters
+
+
+def test_worker_spawn_tidak_menjalankan_efek_samping_pemilik():
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import main
+
+    assert not main.IS_WORKER and main.renditions is not None
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Tanpa pemulihan store, cache print_ready maupun cluster wajah di proses worker
+        assert pool.submit(_status_worker).result() == (True, None, None)
+
+
+def test_camera_sync_bisa_diimport():
+    import camera_sync
+
+    for name in ("process_photo", "begin_photo", "finish_photo"):
+        assert callable(getattr(camera_sync, name))
+
+
+def test_process_photo_dengan_analyzer_tiruan(main_sandbox, tmp_path):
+    main = main_sandbox
+    path = str(tmp_path / "IMG_0001.jpg")
+    Image.new("RGB", (64, 48), (90, 120, 150)).save(path)
+
+    def analyzer(filepath):
+        return {"filename": os.path.basename(filepath), "status": "ok", "encodings": [], "face_crops": [],
+                "digits": "42", "ocr_source": "roi", "timings": {"decode": 0.01}}
+
+    assert main.process_photo(path, analyzer=analyzer)
+    assert not os.path.exists(path)  # sumber dihapus setelah diproses
+    assert os.path.exists(os.path.join(main.ANGKA_DIR, "42", "IMG_0001.jpg"))
+    assert [row[1] for row in photo_service.get_photos_by_bib("42")] == ["IMG_0001.jpg"]
+
+    # Error dari analyzer dicatat sebagai baris gagal, bukan exception
+    rusak = str(tmp_path / "IMG_0002.jpg")
+    Image.new("RGB", (64, 48)).save(rusak)
+    assert not main.process_photo(rusak, analyzer=lambda p: 1 / 0)
+    assert [row[5] for row in photo_service.get_all_photos() if row[1] == "IMG_0002.jpg"] == ["failed"]
+
+
+def test_label_wajah_sebelumnya_ikut_digabung_dan_dipromosikan(main_sandbox, tmp_path, monkeypatch):
+    from face_cache import FaceCache
+    from face_gallery import FaceGallery
+    from unknown_clusters import UnknownClusters
+
+    main = main_sandbox
+    os.makedirs(main.MODEL_WAJAH_DIR)
+    monkeypatch.setattr(main, "gallery", FaceGallery())
+    monkeypatch.setattr(main, "face_cache", FaceCache(os.path.join(main.MODEL_WAJAH_DIR, "face_cache")))
+    monkeypatch.setattr(main, "unknown_clusters", UnknownClusters(str(tmp_path / "clusters.db")))
+    monkeypatch.setattr(main, "play_voice", lambda message: None)
+
+    def wajah(x):
+        enc = np.zeros(128, dtype=np.float32)
+        enc[0] = x
+        return enc
+
+    for x in (0.0, 0.6, 0.3):
+        main.unknown_clusters.assign(wajah(x))
+    crop = np.zeros((8, 8, 3), dtype=np.uint8)
+    # Wajah pertama masuk unknown2; wajah kedua menggabungkan unknown2 ke unknown1 lalu dipromosikan
+    persons = main._classify_faces("grup.jpg", [wajah(0.6), wajah(0.35)], [crop, crop])
+    assert persons == ["person1", "person1"]
@@ -1,5 +1,6 @@
 import sqlite3
 import pytest
+from database import photo_service
 from database.photo_service import insert_photo, get_all_photos, get_photos_by_type, DB_PATH
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -7,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 @pytest.fixture
 def clean_db():
     """Bersihkan database sebelum test"""
+    photo_service.close()  # lepas koneksi persisten sebelum file dihapus
     if os.path.exists(DB_PATH):
         os.remove(DB_PATH)
     conn = sqlite3.connect(DB_PATH)
@@ -23,6 +25,7 @@ def clean_db():
     conn.commit()
     conn.close()
     yield
+    photo_service.close()
     if os.path.exists(DB_PATH):
         os.remove(DB_PATH)
 
@@ -37,3 +40,86 @@ def test_get_photos_by_type(clean_db):
     data = get_photos_by_type("angka")
     assert len(data) == 1
     assert data[0][2] == "angka"
+
+def test_insert_bersamaan_dari_banyak_thread(clean_db):
+    import threading
+    threads = [
+        threading.Thread(target=lambda n=n: [insert_photo(f"t{n}_{i}.jpg", "wajah", "output/wajah") for i in range(50)])
+        for n in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(get_all_photos()) == 200
+
+
+def test_migrasi_skema_lama_dan_index(clean_db):
+    insert_photo("lama.jpg", "wajah", "output/wajah", wait=True)
+    conn = sqlite3.connect(DB_PATH)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(photos)")}
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(photos)")}
+    conn.close()
+    assert "detected_ts" in cols
+    assert {"idx_photos_type_ts", "idx_photos_status", "idx_photos_filename"} <= indexes
+
+
+def test_keyset_pagination_dan_label(clean_db):
+    from database.photo_service import get_photos_page, get_photos_by_person, get_photos_by_bib, rename_person
+    for i in range(7):
+        insert_photo(f"f{i}.jpg", "campuran", f"output/wajah/unknown1/f{i}.jpg",
+                     persons=["unknown1"], bib="42" if i % 2 else None)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = get_photos_page(limit=3, cursor=cursor, photo_type="campuran")
+        seen.extend(row[1] for row in rows)
+        if cursor is None:
+            break
+    assert seen == [f"f{i}.jpg" for i in reversed(range(7))]
+    # Urutan lama (ORDER BY detected_at DESC) tetap: terbaru dulu
+    assert [row[1] for row in get_all_photos()] == seen
+
+    assert len(get_photos_by_bib(42)) == 3
+    rename_person("unknown1", "person1", "output/wajah/unknown1", "output/wajah/person1")
+    rows = get_photos_by_person("person1", limit=2)
+    assert len(rows) == 2 and rows[0][3] == "output/wajah/person1/f6.jpg"
+    assert get_photos_by_person("unknown1") == []
+
+
+def test_error_non_sqlite_tidak_mematikan_writer(clean_db, monkeypatch):
+    def rusak():
+        raise RuntimeError("disk penuh")
+
+    monkeypatch.setattr(photo_service, "get_connection", rusak)
+    with pytest.raises(RuntimeError):
+        insert_photo("gagal.jpg", "wajah", "output/wajah", wait=True)
+    photo_service.flush()  # tidak boleh menggantung
+
+    monkeypatch.undo()
+    insert_photo("lanjut.jpg", "wajah", "output/wajah", wait=True)
+    assert [row[1] for row in get_all_photos()] == ["lanjut.jpg"]
+
+
+def test_flush_tidak_menunggu_insert_yang_datang_belakangan(clean_db):
+    import threading
+    insert_photo("awal.jpg", "wajah", "output/wajah/awal.jpg")
+    stop = threading.Event()
+
+    def produsen():
+        i = 0
+        while not stop.is_set():
+            insert_photo(f"s{i}.jpg", "wajah", "output/wajah")
+            i += 1
+
+    t = threading.Thread(target=produsen, daemon=True)
+    t.start()
+    try:
+        flusher = threading.Thread(target=photo_service.flush, daemon=True)
+        flusher.start()
+        flusher.join(timeout=10)
+        assert not flusher.is_alive()  # antrian tidak pernah kosong, flush tetap selesai
+        assert photo_service.photo_path_exists("output/wajah/awal.jpg")
+    finally:
+        stop.set()
+        t.join()
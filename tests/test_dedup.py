@@ -0,0 +1,40 @@
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import photo_service
+from dedup import DuplicateFilter, file_digest
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    photo_service.close()
+    monkeypatch.setattr(photo_service, "DB_PATH", str(tmp_path / "test.db"))
+    yield
+    photo_service.close()
+
+
+def test_file_digest_streaming(tmp_path):
+    import hashlib
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path = tmp_path / "foto.jpg"
+    path.write_bytes(data)
+    assert file_digest(str(path), chunk_size=65536) == hashlib.sha256(data).hexdigest()
+
+
+def test_duplikat_persis_dilewati(tmp_path, temp_db):
+    asli = tmp_path / "a.jpg"
+    salinan = tmp_path / "b.jpg"
+    asli.write_bytes(b"isi foto" * 1000)
+    salinan.write_bytes(b"isi foto" * 1000)
+
+    dedup = DuplicateFilter()
+    verdict, info = dedup.check(str(asli))
+    assert verdict == "new"
+    # Salinan yang datang saat aslinya masih diproses juga terdeteksi
+    assert dedup.check(str(salinan))[0] == "duplicate"
+    dedup.remember(info, "a.jpg")
+
+    verdict, info = DuplicateFilter().check(str(salinan))
+    assert verdict == "duplicate" and info["original"] == "a.jpg"
+    assert dedup.exact_skipped == 1
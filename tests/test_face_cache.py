@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_cache import FaceCache, CacheCorruptError
+
+
+def test_append_rename_dan_load(tmp_path):
+    cache = FaceCache(str(tmp_path / "face_cache"))
+    cache.reset()
+    enc = np.arange(256, dtype=np.float32).reshape(2, 128)
+    cache.append(enc[0], "unknown1")
+    cache.append(enc[1], "unknown2")
+    cache.rename(0, "person1")
+
+    encodings, names = FaceCache(str(tmp_path / "face_cache")).load()
+    assert isinstance(encodings, np.memmap)
+    assert names == ["person1", "unknown2"]
+    assert np.array_equal(encodings, enc)
+
+
+def test_jurnal_rename_diputar_ulang(tmp_path):
+    cache = FaceCache(str(tmp_path / "face_cache"))
+    cache.reset()
+    cache.append(np.zeros(128), "unknown1")
+    # Simulasikan crash setelah jurnal ditulis, sebelum index diubah
+    with open(cache.journal_path, "w") as f:
+        f.write('{"op": "rename", "row": 0, "name": "person1"}\n')
+
+    _, names = FaceCache(str(tmp_path / "face_cache")).load()
+    assert names == ["person1"]
+    assert not os.path.exists(cache.journal_path)
+
+
+def test_append_terputus_dipotong(tmp_path):
+    cache = FaceCache(str(tmp_path / "face_cache"))
+    cache.reset()
+    cache.append(np.ones(128), "person1")
+    with open(cache.enc_path, "ab") as f:
+        f.write(b"\x00" * 100)
+
+    encodings, names = FaceCache(str(tmp_path / "face_cache")).load()
+    assert len(encodings) == 1 and names == ["person1"]
+
+
+def test_checksum_rusak_terdeteksi(tmp_path):
+    cache = FaceCache(str(tmp_path / "face_cache"))
+    cache.reset()
+    cache.append(np.ones(128), "person1")
+    with open(cache.enc_path, "r+b") as f:
+        f.write(b"\xff\xff\xff\xff")
+
+    with pytest.raises(CacheCorruptError):
+        FaceCache(str(tmp_path / "face_cache")).load()
+
+
+def test_replace_encoding_dan_jurnal(tmp_path):
+    cache = FaceCache(str(tmp_path / "face_cache"))
+    cache.reset()
+    cache.append(np.zeros(128), "person1")
+    cache.append(np.ones(128), "person1")
+    cache.replace(0, np.full(128, 2.0))
+
+    encodings, names = FaceCache(str(tmp_path / "face_cache")).load()
+    assert names == ["person1", "person1"]
+    assert np.array_equal(encodings[0], np.full(128, 2.0, dtype=np.float32))
+
+    # Crash setelah jurnal replace ditulis: diputar ulang, checksum tetap cocok
+    with open(cache.journal_path, "w") as f:
+        f.write(json.dumps({"op": "replace", "row": 1, "encoding": [3.0] * 128}) + "\n")
+    encodings, _ = FaceCache(str(tmp_path / "face_cache")).load()
+    assert np.array_equal(encodings[1], np.full(128, 3.0, dtype=np.float32))
@@ -0,0 +1,87 @@
+import time
+import numpy as np
+import cv2
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_detection import FaceDetector, nms, tile_grid, pyramid_widths
+
+
+def _kotak_putih(tile, y0, x0, scale, upsample):
+    """Pengganti HOG: kotak putih = wajah, skor = luas yang terlihat di tile"""
+    contours, _ = cv2.findContours((tile[:, :, 0] > 128).astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for c in contours:
+        x, y, w, h = cv2.boundingRect(c)
+        boxes.append(((int((y + y0) / scale), int((x + w + x0) / scale), int((y + h + y0) / scale),
+                       int((x + x0) / scale)), float(w * h)))
+    return boxes
+
+
+def _frame():
+    image = np.zeros((1800, 2400, 3), dtype=np.uint8)
+    faces = [(100, 140, 40, 40), (900, 780, 60, 60), (1500, 2300, 50, 50)]  # y, x, h, w; satu di tepi tile
+    for y, x, h, w in faces:
+        image[y:y + h, x:x + w] = 255
+    return image, faces
+
+
+def test_tile_menutup_frame_dengan_overlap():
+    tiles = tile_grid(1800, 2400, tile=800, overlap=200)
+    covered = np.zeros((1800, 2400), dtype=bool)
+    for y0, x0, y1, x1 in tiles:
+        assert y1 - y0 <= 800 and x1 - x0 <= 800
+        covered[y0:y1, x0:x1] = True
+    assert covered.all()
+    assert tile_grid(600, 800) == [(0, 0, 600, 800)]
+    assert pyramid_widths(2400) == [2400, 1200, 800]
+
+
+def test_nms_buang_potongan_di_tepi_tile():
+    utuh = ((100, 200, 200, 100), 0.9)
+    potongan = ((100, 200, 200, 180), 0.4)  # sisa wajah yang terpotong tile tetangga
+    lain = ((500, 600, 600, 500), 0.5)
+    assert nms([potongan, utuh, lain]) == [utuh[0], lain[0]]
+
+
+def test_tiled_gabungkan_wajah_dari_semua_tile():
+    image, faces = _frame()
+    for strategy in ("tiled", "pyramid"):
+        detector = FaceDetector(strategy, coarse=lambda img: [], workers=1, budget=60, detect_tile=_kotak_putih)
+        locations = sorted(detector.locate(image))
+        expected = sorted((y, x + w, y + h, x) for y, x, h, w in faces)
+        assert len(locations) == len(expected)
+        for got, want in zip(locations, expected):
+            assert np.allclose(got, want, atol=3)
+
+
+def test_budget_habis_turun_ke_pass_kasar():
+    image, _ = _frame()
+    coarse_calls = []
+
+    def coarse(img):
+        coarse_calls.append(img.shape)
+        return [(10, 60, 60, 10)]
+
+    tile_calls = []
+
+    def lambat(*args):
+        tile_calls.append(args[1:3])
+        time.sleep(0.05)
+        return []
+
+    detector = FaceDetector("tiled", coarse=coarse, workers=1, budget=0.1, cooldown=1, detect_tile=lambat)
+    locations = detector.locate(image)
+    assert coarse_calls == [(600, 800, 3)]
+    assert locations == [(30, 180, 180, 30)]  # dipetakan balik ke frame 2400px
+    tiles_first = len(tile_calls)
+    assert 0 < tiles_first < len(detector.jobs(image))  # berhenti di tengah, tidak semua tile
+
+    # Foto berikutnya langsung pass kasar (cooldown) tanpa menyentuh tile
+    detector.locate(image)
+    assert len(coarse_calls) == 2
+    assert len(tile_calls) == tiles_first
+
+    # Setelah cooldown habis, tile dicoba lagi
+    detector.locate(image)
+    assert len(tile_calls) > tiles_first
@@ -0,0 +1,71 @@
+import time
+import threading
+import numpy as np
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_encoder import BatchEncoder
+
+
+class FakeResNet:
+    """Pengganti encoder dlib: chip = angka, encoding = [angka], catat ukuran tiap batch"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, chips):
+        self.batches.append(len(chips))
+        if self.fail:
+            raise RuntimeError("encoder rusak")
+        return [np.array([chip], dtype=np.float64) for chip in chips]
+
+
+def _chips(image, face_locations):
+    return [image * 100 + i for i in range(len(face_locations))]
+
+
+def test_chip_dari_beberapa_foto_digabung_satu_batch():
+    resnet = FakeResNet()
+    encoder = BatchEncoder(encode=resnet, chips=_chips, max_batch=8, max_latency=1.0)
+    results = {}
+
+    def foto(n):
+        results[n] = encoder.encode(n, [None, None])
+
+    threads = [threading.Thread(target=foto, args=(n,)) for n in range(4)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Batch penuh (8 chip) langsung jalan tanpa menunggu batas latensi
+    assert time.perf_counter() - t0 < 0.5
+    assert resnet.batches == [8]
+    for n in range(4):
+        assert [float(e[0]) for e in results[n]] == [n * 100, n * 100 + 1]
+
+
+def test_batch_tidak_penuh_jalan_setelah_batas_latensi():
+    resnet = FakeResNet()
+    encoder = BatchEncoder(encode=resnet, chips=_chips, max_batch=16, max_latency=0.05)
+    t0 = time.perf_counter()
+    assert len(encoder.encode(1, [None])) == 1
+    assert 0.04 <= time.perf_counter() - t0 < 0.5
+    assert encoder.encode(1, []) == []
+    assert resnet.batches == [1]
+
+
+def test_foto_banyak_wajah_dipecah_dan_error_diteruskan():
+    resnet = FakeResNet()
+    encoder = BatchEncoder(encode=resnet, chips=_chips, max_batch=8, max_latency=0)
+    encodings = encoder.encode(0, [None] * 20)
+    assert [float(e[0]) for e in encodings] == list(range(20))
+    assert resnet.batches == [8, 8, 4]
+    assert (encoder.batches, encoder.encoded) == (3, 20)
+
+    rusak = BatchEncoder(encode=FakeResNet(fail=True), chips=_chips, max_latency=0.01)
+    with pytest.raises(RuntimeError):
+        rusak.encode(0, [None])
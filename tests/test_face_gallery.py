@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_gallery import FaceGallery
+
+
+def test_gallery_tumbuh_dan_view():
+    gallery = FaceGallery(capacity=2)
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(size=(5, 128)).astype(np.float32)
+    for i, enc in enumerate(encodings):
+        gallery.add(enc, f"person{i + 1}")
+
+    assert len(gallery) == 5
+    assert gallery.encodings.dtype == np.float32
+    assert np.allclose(gallery.encodings, encodings)
+    assert list(gallery.names) == ["person1", "person2", "person3", "person4", "person5"]
+
+
+def test_match_batch_sama_dengan_face_distance():
+    gallery = FaceGallery()
+    rng = np.random.default_rng(1)
+    known = rng.normal(scale=0.1, size=(50, 128)).astype(np.float32)
+    gallery.extend(known, [f"p{i}" for i in range(50)])
+
+    queries = known[[3, 7]] + 0.001
+    queries = np.vstack([queries, np.full(128, 5.0, dtype=np.float32)])
+    hasil = gallery.match(queries, tolerance=0.55)
+
+    expected = np.linalg.norm(known[None, :, :] - queries[:, None, :], axis=2)
+    assert hasil[0][0] == "p3"
+    assert hasil[1][0] == "p7"
+    assert hasil[2][0] is None
+    for (name, jarak, margin), row in zip(hasil, expected):
+        row = np.sort(row)
+        assert jarak == pytest.approx(float(row[0]), abs=1e-3)
+        assert margin == pytest.approx(float(row[1] - row[0]), abs=1e-3)
+
+
+def test_rename_unknown_jadi_person():
+    gallery = FaceGallery()
+    gallery.add(np.zeros(128), "unknown1")
+    gallery.rename("unknown1", "person1")
+    assert gallery.match([np.zeros(128)])[0][0] == "person1"
+
+
+
+def test_identitas_banyak_embedding_cocok_lewat_anggota():
+    gallery = FaceGallery(refine=2)
+    pagi, sore = np.zeros(128, dtype=np.float32), np.zeros(128, dtype=np.float32)
+    sore[0] = 0.9  # wajah yang sama di pencahayaan berbeda
+    gallery.extend([pagi, sore], ["person1", "person1"])
+    lain = np.zeros(128, dtype=np.float32)
+    lain[1] = 0.6
+    gallery.add(lain, "person2")
+
+    assert gallery.identities == 2
+    assert np.allclose(gallery.centroids[0][0], 0.45)
+    # Centroid person2 lebih dekat, tapi anggota "sore" person1 yang paling cocok
+    query = sore.copy()
+    query[1] = 0.05
+    name, jarak, margin = gallery.match([query])[0]
+    assert name == "person1"
+    assert jarak == pytest.approx(0.05, abs=1e-4)
+    assert margin > 0.5
+
+
+def test_fold_dibatasi_dengan_eviksi_anggota_redundan():
+    gallery = FaceGallery(max_members=3)
+    gallery.add(np.zeros(128), "person1")
+    vecs = [np.eye(128, dtype=np.float32)[i] * 0.3 for i in range(3)]
+    assert gallery.fold("person1", vecs[0]) == ("append", 1)
+    assert gallery.fold("person1", vecs[1]) == ("append", 2)
+
+    # Penuh: dari pasangan termirip, anggota yang paling dekat ke centroid diganti
+    op, row = gallery.fold("person1", vecs[2])
+    assert op == "replace" and row == 0
+    assert len(gallery) == 3
+    assert np.allclose(gallery.encodings[0], vecs[2])
+    assert np.allclose(gallery.centroids[0], np.mean(vecs, axis=0))
+    # Embedding yang nyaris sama dengan anggota tidak menambah variasi
+    assert gallery.fold("person1", vecs[1] * 1.01) is None
+    assert len(gallery) == 3
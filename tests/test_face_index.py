@@ -0,0 +1,52 @@
+import numpy as np
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from face_gallery import FaceGallery
+from face_index import IVFIndex
+
+
+def _vectors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=(n, 128)).astype(np.float32)
+    return v / (np.linalg.norm(v, axis=1, keepdims=True) * np.sqrt(2))
+
+
+def test_ivf_sama_dengan_exact_dan_insert_inkremental():
+    vectors = _vectors(3000)
+    exact = FaceGallery()
+    ivf = FaceGallery(index=IVFIndex(nprobe=16, train_min=1000))
+    names = [f"unknown{i + 1}" for i in range(len(vectors))]
+    exact.extend(vectors[:2000], names[:2000])
+    ivf.extend(vectors[:2000], names[:2000])
+    # Insert satu per satu setelah index terlatih
+    for vec, name in zip(vectors[2000:2100], names[2000:2100]):
+        exact.add(vec, name)
+        ivf.add(vec, name)
+    assert ivf.index.trained
+
+    queries = vectors[[5, 1500, 2050]] + 0.01
+    assert [m[0] for m in ivf.match(queries)] == [m[0] for m in exact.match(queries)]
+
+
+def test_rename_tetap_terlihat_di_ivf():
+    vectors = _vectors(1200)
+    gallery = FaceGallery(index=IVFIndex(train_min=1000))
+    gallery.extend(vectors, [f"unknown{i + 1}" for i in range(len(vectors))])
+    gallery.rename("unknown10", "person1")
+    assert gallery.match([vectors[9]])[0][0] == "person1"
+
+
+def test_centroid_bergeser_dipindah_ke_list_ivf_terdekat():
+    vectors = _vectors(1200)
+    gallery = FaceGallery(index=IVFIndex(nprobe=1, train_min=1000), max_members=2)
+    gallery.extend(vectors, [f"unknown{i + 1}" for i in range(len(vectors))])
+    # Setelah replace, centroid unknown1 = vectors[600] (list IVF lain)
+    jauh = 2 * vectors[600] - vectors[0]
+
+    # append (lewat extend) lalu replace: keduanya menggeser centroid unknown1
+    assert gallery.fold("unknown1", vectors[0] + 0.001)[0] == "append"
+    assert gallery.fold("unknown1", jauh)[0] == "replace"
+    # Query tepat di centroid baru hanya memeriksa list terdekatnya
+    assert np.allclose(gallery.centroids[0], vectors[600], atol=1e-3)
+    assert 0 in gallery.index.candidates(gallery.centroids[[0]])[0]
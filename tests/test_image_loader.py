@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from image_loader import ImageRejected, load_image, crop_face, crop_face_location
+
+
+def test_decode_langsung_ke_lebar_target(tmp_path):
+    path = tmp_path / "besar.jpg"
+    Image.new("RGB", (3200, 2400), color=(10, 200, 30)).save(path)
+
+    image, original = load_image(str(path), target_width=800)
+    assert original == (3200, 2400)
+    assert image.shape == (600, 800, 3)
+    assert tuple(image[300, 400]) == pytest.approx((10, 200, 30), abs=3)
+
+
+def test_tolak_sebelum_decode(tmp_path):
+    path = tmp_path / "rusak.jpg"
+    path.write_bytes(b"bukan gambar" * 10)
+    with pytest.raises(ImageRejected) as e:
+        load_image(str(path), max_bytes=50)
+    assert e.value.reason == "too_big"
+    with pytest.raises(ImageRejected) as e:
+        load_image(str(path))
+    assert e.value.reason == "invalid"
+
+
+def test_crop_wajah_dan_lokasinya():
+    image = np.zeros((400, 400, 3), dtype=np.uint8)
+    crop = crop_face(image, (100, 200, 200, 100))
+    assert crop.shape[:2] == (200, 200)
+    assert crop_face_location(crop) == (50, 150, 150, 50)
@@ -0,0 +1,54 @@
+import json
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import Metrics
+
+
+def test_nonaktif_tidak_mencatat_apa_pun():
+    m = Metrics()
+    with m.timer("stage_seconds", stage="decode"):
+        pass
+    m.inc("photos_total", result="classified")
+    m.observe("queue_wait_seconds", 1.0)
+    assert m.timer("x") is m.timer("y")  # objek kosong bersama, tanpa alokasi
+    snap = m.snapshot()
+    assert not snap["counters"] and not snap["histograms"]
+
+
+def test_histogram_dan_counter_format_prometheus():
+    m = Metrics(enabled=True, buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        m.observe("stage_seconds", value, stage="ocr")
+    m.inc("photos_total", result="classified")
+    m.inc("photos_total", 2, result="classified")
+    m.add("workers_busy", 1)
+    m.collector(lambda: [("queue_depth", 7, {"state": "queued"})])
+
+    text = m.render()
+    assert "# TYPE cetak_stage_seconds histogram" in text
+    assert 'cetak_stage_seconds_bucket{stage="ocr",le="0.1"} 1' in text
+    assert 'cetak_stage_seconds_bucket{stage="ocr",le="1.0"} 2' in text
+    assert 'cetak_stage_seconds_bucket{stage="ocr",le="+Inf"} 3' in text
+    assert 'cetak_stage_seconds_count{stage="ocr"} 3' in text
+    assert 'cetak_photos_total{result="classified"} 3' in text
+    assert "cetak_workers_busy 1" in text
+    assert 'cetak_queue_depth{state="queued"} 7' in text
+
+
+def test_nilai_label_di_escape():
+    m = Metrics(enabled=True)
+    m.inc("photos_total", file='a"b\\c\nd.jpg')
+    assert 'cetak_photos_total{file="a\\"b\\\\c\\nd.jpg"} 1' in m.render()
+
+
+def test_jsonl_opsional(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    m = Metrics(jsonl_path=str(path))
+    with m.timer("stage_seconds", stage="db"):
+        pass
+    m.close()
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert rows[0]["name"] == "stage_seconds" and rows[0]["stage"] == "db"
+    assert rows[0]["type"] == "histogram" and rows[0]["value"] >= 0
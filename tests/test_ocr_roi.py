@@ -0,0 +1,88 @@
+import numpy as np
+import cv2
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ocr_roi import propose_regions, read_number, torso_regions
+
+
+def _foto_pelari():
+    img = np.full((600, 400), 200, dtype=np.uint8)
+    cv2.rectangle(img, (150, 60), (250, 180), 120, -1)  # "wajah"
+    cv2.putText(img, "1234", (120, 330), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    return img, [(60, 250, 180, 150)]
+
+
+class FakeReader:
+    """Seperti EasyOCR: satu hasil per region (kotak 4 titik), teks `roi_text` di region `roi_index`"""
+
+    def __init__(self, roi_text, conf=0.9, roi_index=0):
+        self.roi_text = roi_text
+        self.conf = conf
+        self.roi_index = roi_index
+        self.calls = []
+        self.regions = []
+
+    def recognize(self, gray, horizontal_list, free_list, allowlist, detail, batch_size):
+        self.calls.append(("recognize", len(horizontal_list), allowlist))
+        self.regions = horizontal_list
+        results = []
+        for i, (x0, x1, y0, y1) in enumerate(horizontal_list):
+            text = self.roi_text if i == self.roi_index else ""
+            results.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, self.conf if text else 0.1))
+        # EasyOCR mengurutkan hasil dari atas ke bawah, bukan urutan input
+        return sorted(results, key=lambda r: r[0][0][1])
+
+    def readtext(self, gray, detail=0, paragraph=False):
+        self.calls.append(("readtext",))
+        return ["Nomor 77"]
+
+
+def test_proposal_mencakup_nomor_di_badan():
+    gray, faces = _foto_pelari()
+    torso = torso_regions(faces, gray.shape)[0]
+    regions = propose_regions(gray, faces)
+    assert regions
+    x0, x1, y0, y1 = regions[0]
+    assert torso[2] <= y0 and y1 <= torso[3]
+    assert x0 <= 125 and x1 >= 230
+
+
+def test_roi_tanpa_fallback_seluruh_frame():
+    gray, faces = _foto_pelari()
+    reader = FakeReader("1234")
+    digits, timings, source = read_number(reader, gray, faces)
+    assert (digits, source) == ("1234", "roi")
+    assert reader.calls == [("recognize", reader.calls[0][1], "0123456789")]
+    assert "ocr_proposal" in timings and "ocr_recognize" in timings
+
+
+def test_fallback_bila_roi_kosong():
+    gray, faces = _foto_pelari()
+    reader = FakeReader("")
+    digits, timings, source = read_number(reader, gray, faces)
+    assert (digits, source) == ("77", "full_frame")
+    assert "ocr_fallback" in timings
+
+
+def test_angka_confidence_rendah_diabaikan():
+    gray, faces = _foto_pelari()
+    reader = FakeReader("1234", conf=0.3)
+    digits, _, source = read_number(reader, gray, faces)
+    assert (digits, source) == ("77", "full_frame")
+
+
+def test_proposal_di_luar_badan_butuh_confidence_lebih_tinggi(monkeypatch):
+    import ocr_roi
+    gray, faces = _foto_pelari()
+    torso = torso_regions(faces, gray.shape)[0]
+    latar = [10, 80, 10, 50]  # teks latar di atas kepala, di luar area badan
+    monkeypatch.setattr(ocr_roi, "propose_regions", lambda gray, faces: [torso, latar])
+
+    digits, _, source = read_number(FakeReader("88", conf=0.6, roi_index=1), gray, faces)
+    assert (digits, source) == ("77", "full_frame")
+    digits, _, source = read_number(FakeReader("88", conf=0.95, roi_index=1), gray, faces)
+    assert (digits, source) == ("88", "roi")
+    # Confidence yang sama cukup untuk region di area badan
+    digits, _, source = read_number(FakeReader("1234", conf=0.6), gray, faces)
+    assert (digits, source) == ("1234", "roi")
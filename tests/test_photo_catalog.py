@@ -0,0 +1,73 @@
+import time
+import pytest
+import numpy as np
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import photo_service
+from database.photo_service import insert_photo
+from photo_catalog import PhotoCatalog
+
+
+@pytest.fixture
+def katalog_db(tmp_path, monkeypatch):
+    photo_service.close()
+    monkeypatch.setattr(photo_service, "DB_PATH", str(tmp_path / "katalog.db"))
+    yield
+    photo_service.close()
+
+
+def _foto(path, size=(1600, 1200)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(len(path))
+    Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)).save(path, quality=85)
+    return path
+
+
+def test_halaman_dengan_filter_dan_label(katalog_db):
+    for i in range(5):
+        insert_photo(f"f{i}.jpg", "campuran", f"output/wajah/person1/f{i}.jpg",
+                     persons=["person1"], bib="42" if i % 2 else None)
+    insert_photo("g.jpg", "wajah", "output/wajah/person2/g.jpg", persons=["person2", "person1"])
+    insert_photo("gagal.jpg", "none", "uploads/gagal.jpg", status="failed")
+
+    catalog = PhotoCatalog()
+    seen, cursor = [], None
+    while True:
+        entries, cursor = catalog.page(limit=2, cursor=cursor, person="person1")
+        seen.extend(entries)
+        if cursor is None:
+            break
+    assert [e.filename for e in seen] == ["g.jpg", "f4.jpg", "f3.jpg", "f2.jpg", "f1.jpg", "f0.jpg"]
+    assert seen[0].persons == ["person2", "person1"] and seen[0].bib is None
+    assert seen[2].bib == "42"
+
+    assert [e.filename for e in catalog.page(bib=42)[0]] == ["f3.jpg", "f1.jpg"]
+    assert catalog.page(since=time.time() + 3600)[0] == []
+    # Foto gagal (path di uploads) tidak masuk katalog cetak
+    assert "gagal.jpg" not in {e.filename for e in catalog.page(limit=50)[0]}
+
+
+def test_thumbnail_inkremental(katalog_db, tmp_path):
+    catalog = PhotoCatalog(str(tmp_path / "thumbs"))
+    a = _foto(str(tmp_path / "output" / "a.jpg"))
+    b = _foto(str(tmp_path / "output" / "b.jpg"), size=(900, 1600))
+    insert_photo("a.jpg", "wajah", a, persons=["person1"])
+    insert_photo("b.jpg", "angka", b, bib="7")
+    insert_photo("hilang.jpg", "wajah", str(tmp_path / "hilang.jpg"), persons=["person1"])
+
+    assert catalog.update() == 2
+    assert catalog.update() == 0  # watermark: foto lama tidak diproses ulang
+
+    entries, _ = catalog.page()
+    kecil = catalog.thumbnail(entries[1])
+    with Image.open(kecil) as img:
+        assert img.size == (72, 128)
+    with Image.open(catalog.thumbnail(entries[1], 512)) as img:
+        assert max(img.size) == 512
+    assert catalog.thumbnail(entries[0]) is None
+
+    c = _foto(str(tmp_path / "output" / "c.jpg"))
+    insert_photo("c.jpg", "wajah", c, persons=["person2"])
+    assert catalog.update() == 1
@@ -0,0 +1,73 @@
+import errno
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import photo_store
+from photo_store import PhotoStore
+
+
+@pytest.fixture
+def upload(tmp_path):
+    path = tmp_path / "uploads" / "IMG_1.jpg"
+    path.parent.mkdir()
+    path.write_bytes(b"\xff\xd8" + os.urandom(4096) + b"\xff\xd9")
+    return str(path)
+
+
+def test_put_idempoten_tanpa_salin_ulang(tmp_path, upload):
+    store = PhotoStore(str(tmp_path / "output" / ".store"))
+    obj = store.put(upload)
+    assert store.put(upload) == obj
+    assert os.path.samefile(obj, upload)  # hardlink dari upload, bukan salinan
+
+    os.remove(upload)
+    assert os.path.getsize(obj) == 4100
+
+
+def test_place_tautan_ke_semua_folder(tmp_path, upload):
+    store = PhotoStore(str(tmp_path / "output" / ".store"))
+    obj = store.put(upload)
+    targets = [str(tmp_path / "output" / "wajah" / p / "IMG_1.jpg") for p in ("person1", "person2", "person1")]
+    placement = store.place(obj, targets)
+    placement.done()
+
+    assert placement.targets == targets[:2]
+    for dest in targets:
+        assert os.path.samefile(dest, obj)
+    assert os.listdir(store.pending_dir) == []
+    assert store.link_counts["hardlink"] == 2
+
+
+def test_fallback_bila_hardlink_tidak_didukung(tmp_path, upload, monkeypatch):
+    def no_link(src, dst):
+        raise OSError(errno.EXDEV, "beda device")
+    monkeypatch.setattr(photo_store.os, "link", no_link)
+    monkeypatch.setattr(photo_store, "_reflink", no_link)
+
+    store = PhotoStore(str(tmp_path / "output" / ".store"))
+    obj = store.put(upload)  # tanpa hardlink/reflink objek disalin sekali
+    assert not os.path.islink(obj)
+
+    dest = str(tmp_path / "output" / "angka" / "123" / "IMG_1.jpg")
+    store.place(obj, [dest]).done()
+    assert os.path.islink(dest) and os.path.samefile(dest, obj)
+    assert store.link_counts == {"symlink": 1}
+    assert not [f for f in os.listdir(os.path.dirname(dest)) if f.endswith(".tmp")]
+
+
+def test_rollback_dan_recover_jurnal(tmp_path, upload):
+    store = PhotoStore(str(tmp_path / "output" / ".store"))
+    obj = store.put(upload)
+    a = str(tmp_path / "output" / "wajah" / "person1" / "IMG_1.jpg")
+    b = str(tmp_path / "output" / "angka" / "7" / "IMG_1.jpg")
+
+    store.place(obj, [a]).rollback()
+    assert not os.path.exists(a)
+
+    # Crash setelah tautan dipasang tapi sebelum baris DB tertulis
+    store.place(obj, [a])
+    store.place(obj, [b])
+    assert store.recover(lambda path: path == b) == 1
+    assert not os.path.exists(a) and os.path.exists(b)
+    assert os.listdir(store.pending_dir) == []
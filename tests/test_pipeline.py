@@ -0,0 +1,75 @@
+import random
+import threading
+import time
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pipeline import Pipeline, StageStats
+
+
+def test_tahap_paralel_dengan_error_diteruskan():
+    stats = StageStats()
+    aktif, puncak = [0], [0]
+    lock = threading.Lock()
+
+    def double(item):
+        with lock:
+            aktif[0] += 1
+            puncak[0] = max(puncak[0], aktif[0])
+        try:
+            if item["n"] == 3:
+                raise ValueError("rusak")
+            threading.Event().wait(0.01)
+            item["x"] = item["n"] * 2
+        finally:
+            with lock:
+                aktif[0] -= 1
+
+    pipeline = Pipeline([("a", double, 4), ("b", lambda item: item.update(y=item["x"] + 1), 2)],
+                        maxsize=2, ordered=False, stats=stats)
+    hasil = sorted(pipeline.map({"n": n} for n in range(20)), key=lambda item: item["n"])
+
+    assert len(hasil) == 20
+    assert hasil[3]["error"] == "a: rusak" and "y" not in hasil[3]
+    assert all(item["y"] == item["n"] * 2 + 1 for item in hasil if item["n"] != 3)
+    assert puncak[0] > 1
+    assert stats.items["a"] == 20 and stats.items["b"] == 19
+    assert "kapasitas" in stats.report(1.0)
+
+
+def test_hasil_urut_submit_meski_selesai_acak():
+    rng = random.Random(0)
+    delays = [rng.uniform(0, 0.01) for _ in range(50)]
+
+    def slow(item):
+        time.sleep(delays[item["n"]])
+
+    pipeline = Pipeline([("decode", slow, 4), ("ocr", slow, 3)], maxsize=4)
+    assert [item["n"] for item in pipeline.map({"n": n} for n in range(50))] == list(range(50))
+
+
+def test_jumlah_item_di_dalam_dibatasi():
+    masuk = threading.Event()
+    lepas = threading.Event()
+
+    def block(item):
+        masuk.set()
+        lepas.wait()
+
+    pipeline = Pipeline([("a", block, 1)], maxsize=1, max_in_flight=2)
+    pipeline.submit({"n": 0})
+    pipeline.submit({"n": 1})
+    masuk.wait(1)
+
+    ketiga = threading.Thread(target=pipeline.submit, args=({"n": 2},), daemon=True)
+    ketiga.start()
+    ketiga.join(0.1)
+    assert ketiga.is_alive()  # backpressure: submit menunggu slot
+
+    lepas.set()
+    results = pipeline.results()
+    assert next(results)["n"] == 0
+    ketiga.join(1)
+    assert not ketiga.is_alive()
+    pipeline.close()
+    assert [item["n"] for item in results] == [1, 2]
@@ -0,0 +1,43 @@
+import re
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from print_layout import grid_for, layout_pdf
+from reportlab.lib.units import mm
+
+
+def _foto(tmp_path, name="pas.jpg", color=(200, 30, 30)):
+    path = tmp_path / name
+    Image.new("RGB", (354, 472), color=color).save(path)  # 3x4 cm di 300 dpi
+    return str(path)
+
+
+def test_grid_ukuran_mm_pas_di_a4():
+    grid = grid_for((30, 40))
+    assert (grid.cols, grid.rows) == (6, 6)
+    assert abs(grid.cell_w - 30 * mm) < 1e-6 and abs(grid.cell_h - 40 * mm) < 1e-6
+    # Grid dipusatkan & tetap di dalam margin
+    assert grid.x0 >= 5 * mm and grid.y0 >= 5 * mm
+
+    penuh = grid_for((210, 297))
+    assert (penuh.cols, penuh.rows, penuh.x0, penuh.gap) == (1, 1, 0, 0)
+
+
+def test_salinan_digabung_per_lembar_dan_gambar_ditanam_sekali(tmp_path):
+    foto = _foto(tmp_path)
+    layout = layout_pdf([(foto, 100)], (30, 40), str(tmp_path / "pas.pdf"))
+    assert (layout.sheets, layout.per_sheet, layout.placements) == (3, 36, 100)
+
+    data = open(layout.pdf_path, "rb").read()
+    assert len(re.findall(rb"/Subtype /Image", data)) == 1
+    assert len(re.findall(rb"/Type /Page\b", data)) == 3
+
+
+def test_beberapa_foto_satu_lembar(tmp_path):
+    a = _foto(tmp_path, "a.jpg")
+    b = _foto(tmp_path, "b.jpg", color=(30, 30, 200))
+    layout = layout_pdf([(a, 4), (b, 4)], (30, 40), str(tmp_path / "campur.pdf"))
+    assert (layout.sheets, layout.placements) == (1, 8)
+    data = open(layout.pdf_path, "rb").read()
+    assert len(re.findall(rb"/Subtype /Image", data)) == 2
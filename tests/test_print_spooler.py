@@ -0,0 +1,106 @@
+import stat
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from print_spooler import PrintSpooler
+from printer_service import LpBackend, PrinterError
+
+
+class FakeBackend:
+    def __init__(self, fail=0):
+        self.calls = []
+        self.active = set()
+        self.fail = fail
+
+    def submit(self, paths, copies=1, printer=None, options=()):
+        if self.fail:
+            self.fail -= 1
+            raise PrinterError("printer offline")
+        self.calls.append((list(paths), copies, printer))
+        job_id = f"fake-{len(self.calls)}"
+        self.active.add(job_id)
+        return job_id
+
+    def status(self, job_ids):
+        return {j: "printing" if j in self.active else "done" for j in job_ids}
+
+
+@pytest.fixture
+def foto(tmp_path):
+    def buat(name):
+        path = tmp_path / name
+        path.write_bytes(b"\xff\xd8data\xff\xd9")
+        return str(path)
+    return buat
+
+
+def test_salinan_digabung_jadi_satu_lp(tmp_path, foto):
+    backend = FakeBackend()
+    spooler = PrintSpooler(str(tmp_path / "print.db"), backend=backend)
+    a, b, c = foto("a.jpg"), foto("b.jpg"), foto("c.jpg")
+    ids = [spooler.submit(a, 2), spooler.submit(a, 3), spooler.submit(b, 5), spooler.submit(c, 1)]
+
+    assert spooler.dispatch() == 2
+    # a: 2 + 3 salinan, sama jumlahnya dengan b → satu panggilan lp
+    assert sorted(backend.calls, key=lambda call: call[1]) == [([c], 1, None), ([a, b], 5, None)]
+    assert {spooler.job(i).state for i in ids} == {"submitted"}
+    assert spooler.job(ids[0]).cups_id == spooler.job(ids[2]).cups_id
+
+    # Status dari polling: job yang hilang dari antrian printer = selesai
+    backend.active.discard(spooler.job(ids[3]).cups_id)
+    assert spooler.poll() == 1
+    assert spooler.job(ids[3]).state == "done"
+    assert spooler.counts() == {"queued": 0, "submitted": 3, "done": 1, "failed": 0}
+    spooler.close()
+
+
+def test_gagal_dicoba_ulang_lalu_failed(tmp_path, foto):
+    backend = FakeBackend(fail=3)
+    spooler = PrintSpooler(str(tmp_path / "print.db"), backend=backend, retry_delay=0, max_attempts=2)
+    job_id = spooler.submit(foto("a.jpg"))
+    spooler.dispatch()
+    assert spooler.job(job_id).state == "queued"
+    spooler.dispatch()
+    job = spooler.job(job_id)
+    assert job.state == "failed" and job.attempts == 2 and job.error == "printer offline"
+    assert spooler.dispatch() == 0
+    spooler.close()
+
+
+def test_thread_spooler_dan_antrian_persisten(tmp_path, foto):
+    db = str(tmp_path / "print.db")
+    lama = PrintSpooler(db, backend=FakeBackend())
+    job_id = lama.submit(foto("a.jpg"), 10)
+    lama.close()  # proses menu keluar sebelum spooler jalan
+
+    backend = FakeBackend()
+    spooler = PrintSpooler(db, backend=backend, batch_window=0.01, poll_interval=0.05)
+    spooler.start()
+    assert spooler.wait_idle(timeout=5)
+    backend.active.clear()  # printer selesai, terbaca dari polling berikutnya
+    assert spooler.wait_idle(timeout=5, include_submitted=True)
+    spooler.stop()
+    assert backend.calls == [([spooler.job(job_id).path], 10, None)]
+    assert spooler.job(job_id).state == "done"
+    spooler.close()
+
+
+def test_backend_lp_dengan_perintah_palsu(tmp_path, foto):
+    log = tmp_path / "lp.log"
+    lp = tmp_path / "lp"
+    lp.write_text(f"#!/bin/sh\nfor arg in \"$@\"; do printf '%s\\n' \"$arg\" >> {log}; done\n"
+                  "echo 'request id is Kantor-42 (2 file(s))'\n")
+    lpstat = tmp_path / "lpstat"
+    lpstat.write_text("#!/bin/sh\necho 'Kantor-41 agent 1024 Sen 10 Jan 2026'\n")
+    for script in (lp, lpstat):
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+    backend = LpBackend(lp=str(lp), lpstat=str(lpstat))
+    a, b = foto("a.jpg"), foto("b.jpg")
+    assert backend.submit([a, b], 3, "Kantor", ("fit-to-page",)) == "Kantor-42"
+    assert log.read_text().split() == ["-n", "3", "-d", "Kantor", "-o", "fit-to-page", a, b]
+    assert backend.status(["Kantor-41", "Kantor-42"]) == {"Kantor-41": "printing", "Kantor-42": "done"}
+
+    with pytest.raises(PrinterError):
+        LpBackend(lp=str(tmp_path / "tidak-ada")).submit([a])
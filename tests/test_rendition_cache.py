@@ -0,0 +1,62 @@
+import shutil
+import numpy as np
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rendition_cache import RenditionCache
+
+
+def _foto(path, seed=0, size=(1200, 900)):
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)).save(path, quality=90)
+    return str(path)
+
+
+def test_render_sekali_per_isi_dan_ukuran(tmp_path):
+    cache = RenditionCache(str(tmp_path / "print_ready"))
+    sumber = _foto(tmp_path / "a.jpg")
+    salinan = str(tmp_path / "tautan.jpg")
+    shutil.copy(sumber, salinan)  # isi sama di folder orang/nomor lain
+
+    path = cache.get(sumber, "3x4")
+    with Image.open(path) as img:
+        assert img.size == (354, 472)
+    assert cache.get(salinan, "3x4") == path
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert cache.get(sumber, "4x6") != path
+    # Parameter render lain = kunci lain
+    lain = RenditionCache(str(tmp_path / "print_ready"), quality=80)
+    assert lain.get(sumber, "3x4") != path
+
+
+def test_lru_menghapus_yang_paling_lama_tidak_dipakai(tmp_path):
+    root = tmp_path / "print_ready"
+    cache = RenditionCache(str(root))
+    fotos = [_foto(tmp_path / f"{i}.jpg", seed=i) for i in range(3)]
+    paths = [cache.get(f, "4x6") for f in fotos]
+    for age, path in enumerate(paths):
+        os.utime(path, (1000 + age, 1000 + age))
+    cache.get(fotos[0], "4x6")  # dipakai lagi → paling baru
+
+    pdf = root / "cetak_print.pdf"
+    pdf.write_bytes(b"%PDF" + b"0" * 1000)
+    cache.max_bytes = sum(os.path.getsize(p) for p in paths) + 500
+    cache.track(str(pdf))
+
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[0]) and os.path.exists(paths[2]) and pdf.exists()
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_prefetch_di_background(tmp_path):
+    cache = RenditionCache(str(tmp_path / "print_ready"))
+    sumber = _foto(tmp_path / "a.jpg")
+    assert cache.prefetch(sumber, ["3x4", "4x6"], digest="ab" * 32)
+    cache.stop()
+    assert cache.misses == 2
+
+    # Hash dari nama objek store dipakai ulang, sumber tidak di-hash lagi
+    assert os.path.basename(cache.get(sumber, "3x4")).startswith("ab" * 8)
+    assert cache.hits == 1
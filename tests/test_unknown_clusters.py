@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unknown_clusters import UnknownClusters
+
+
+def _wajah(x, y=0.0):
+    enc = np.zeros(128, dtype=np.float32)
+    enc[0], enc[1] = x, y
+    return enc
+
+
+def test_wajah_sama_masuk_satu_cluster_lalu_bisa_dipromosikan(tmp_path):
+    db = str(tmp_path / "clusters.db")
+    clusters = UnknownClusters(db)
+    pertama = clusters.assign(_wajah(0.0))
+    assert pertama.created and pertama.label == "unknown1"
+
+    kedua = clusters.assign(_wajah(0.1, 0.05))
+    assert not kedua.created and kedua.cluster == pertama.cluster
+    assert not clusters.promotable(pertama.cluster)
+
+    lain = clusters.assign(_wajah(3.0))
+    assert lain.created and lain.label == "unknown2"
+
+    clusters.assign(_wajah(0.05, -0.05))
+    assert clusters[pertama.cluster].count == 3
+    assert clusters.promotable(pertama.cluster)
+    clusters.close()
+
+    # Cluster & statistiknya tersimpan, nomor tidak dipakai ulang
+    ulang = UnknownClusters(db)
+    assert len(ulang) == 2
+    assert ulang[pertama.cluster].count == 3
+    centroid = ulang.promote(pertama.cluster, "person1")
+    assert np.allclose(centroid[:2], [0.05, 0.0], atol=1e-5)
+    assert len(ulang) == 1
+    assert ulang.assign(_wajah(-3.0)).label == "unknown3"
+
+
+def test_cluster_yang_konvergen_digabung(tmp_path):
+    clusters = UnknownClusters(str(tmp_path / "clusters.db"))
+    a = clusters.assign(_wajah(0.0))
+    b = clusters.assign(_wajah(0.6))
+    assert a.cluster != b.cluster
+
+    assert clusters.assign(_wajah(0.3)).absorbed == []
+    hasil = clusters.assign(_wajah(0.35))
+    assert hasil.label == "unknown1"
+    assert hasil.absorbed == ["unknown2"]
+    assert len(clusters) == 1
+    assert clusters[a.cluster].count == 4
+
+
+def test_counter_nomor_tanpa_scan_folder(tmp_path):
+    clusters = UnknownClusters(str(tmp_path / "clusters.db"))
+    clusters.reserve("unknown", 7)
+    clusters.reserve("person", 4)
+    clusters.reserve("person", 2)
+    assert clusters.assign(_wajah(0.0)).label == "unknown8"
+    assert clusters.next_number("person") == 5
+    assert clusters.next_number("person") == 6
+
+
+def test_matriks_centroid_tumbuh_dan_hapus_tetap_konsisten(tmp_path):
+    clusters = UnknownClusters(str(tmp_path / "clusters.db"))
+    labels = [clusters.assign(_wajah(2.0 * i)).cluster for i in range(40)]
+    for cid in labels[5:35:3]:
+        clusters.promote(cid, f"person{cid}")
+    sisa = [cid for cid in labels if cid in clusters._clusters]
+    assert len(clusters) == len(sisa) == 30
+    for cid in sisa:
+        assert clusters.nearest(clusters[cid].centroid) == (cid, 0.0)
+
+
+def test_penggabungan_gagal_dibatalkan_seluruhnya(tmp_path, monkeypatch):
+    db = str(tmp_path / "clusters.db")
+    clusters = UnknownClusters(db)
+    a = clusters.assign(_wajah(0.0))
+    b = clusters.assign(_wajah(0.6))
+    clusters.assign(_wajah(0.3))
+
+    def gagal(cluster, now):
+        raise RuntimeError("disk penuh")
+
+    monkeypatch.setattr(clusters, "_save", gagal)
+    with pytest.raises(RuntimeError):
+        clusters.assign(_wajah(0.35))  # memicu penggabungan unknown2 ke unknown1
+    monkeypatch.undo()
+
+    # Tidak ada setengah penggabungan: database & memori tetap dua cluster
+    assert len(clusters) == 2 and clusters[a.cluster].count == 2 and clusters[b.cluster].count == 1
+    ulang = UnknownClusters(db)
+    assert len(ulang) == 2 and ulang[a.cluster].count == 2
@@ -0,0 +1,79 @@
+import threading
+import time
+from PIL import Image
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from upload_ingest import ReadinessTracker, is_complete
+
+
+def test_is_complete_jpeg_dan_png(tmp_path):
+    jpg = tmp_path / "a.jpg"
+    png = tmp_path / "b.png"
+    Image.new("RGB", (50, 50)).save(jpg)
+    Image.new("RGB", (50, 50)).save(png)
+    assert is_complete(str(jpg)) and is_complete(str(png))
+
+    data = jpg.read_bytes()
+    jpg.write_bytes(data[: len(data) // 2])
+    assert not is_complete(str(jpg))
+    png.write_bytes(png.read_bytes()[:-6])
+    assert not is_complete(str(png))
+
+
+def test_file_setengah_jadi_dicoba_ulang_sampai_lengkap(tmp_path):
+    path = tmp_path / "kamera.jpg"
+    Image.new("RGB", (200, 200), color=(1, 2, 3)).save(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:100])
+
+    ready = []
+    done = threading.Event()
+    tracker = ReadinessTracker(on_ready=lambda p: (ready.append(p), done.set()), settle=0.05)
+    tracker.start()
+    try:
+        tracker.touch(str(path))
+        time.sleep(0.3)
+        assert ready == []  # belum lengkap, belum diantrikan
+
+        path.write_bytes(data)
+        tracker.touch(str(path), closed=True)
+        assert done.wait(5)
+        assert ready == [str(path)]
+
+        # Event susulan untuk file yang sudah diantrikan diabaikan
+        tracker.touch(str(path), closed=True)
+        time.sleep(0.2)
+        assert ready == [str(path)]
+
+        tracker.mark_started(str(path))
+        assert len(tracker.latencies) == 1
+    finally:
+        tracker.stop()
+
+
+def test_path_relatif_watcher_dan_absolut_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads")
+    Image.new("RGB", (60, 60)).save(os.path.join("uploads", "IMG_0001.jpg"))
+
+    ready = []
+    tracker = ReadinessTracker(on_ready=ready.append, settle=0.01)
+    tracker.touch(os.path.join("uploads", "IMG_0001.jpg"), closed=True)  # event watchdog: relatif
+    tracker._check(os.path.abspath(os.path.join("uploads", "IMG_0001.jpg")))
+    absolut = str(tmp_path / "uploads" / "IMG_0001.jpg")
+    assert ready == [absolut]
+
+    tracker.mark_started(absolut)  # worker: path absolut dari antrian
+    assert len(tracker.latencies) == 1 and tracker._ready_at == {}
+
+    # Upload berikutnya dengan nama yang sama (counter kamera) tetap diantrikan
+    tracker.touch(os.path.join("uploads", "IMG_0001.jpg"), closed=True)
+    tracker._check(absolut)
+    assert ready == [absolut, absolut]
+
+    # Path yang ditolak antrian tidak tertahan di status siap
+    ditolak = ReadinessTracker(on_ready=lambda p: False)
+    ditolak.touch(os.path.join("uploads", "IMG_0001.jpg"), closed=True)
+    ditolak._check(absolut)
+    assert ditolak._ready_at == {}
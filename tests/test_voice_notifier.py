@@ -0,0 +1,46 @@
+import threading
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from voice_notifier import VoiceNotifier
+
+
+def test_klip_dirender_sekali_dan_duplikat_digabung(tmp_path):
+    rendered, played = [], []
+    gate = threading.Event()
+
+    def synthesize(message, lang, path):
+        rendered.append(message)
+        with open(path, "wb") as f:
+            f.write(b"mp3")
+
+    def play(path):
+        gate.wait(5)
+        played.append(path)
+
+    voice = VoiceNotifier(str(tmp_path), synthesize=synthesize, play=play)
+    voice.start(phrases=("Wajah terdeteksi",))
+    assert voice.notify("Wajah terdeteksi") is True
+    # Pesan sama yang masih menunggu tidak diantrikan lagi
+    results = [voice.notify("Wajah dan angka terdeteksi") for _ in range(3)]
+    assert results.count(True) == 1
+    gate.set()
+    voice.stop()
+
+    assert rendered.count("Wajah terdeteksi") == 1
+    assert len(played) == 2
+
+
+def test_offline_pakai_fallback(tmp_path):
+    spoken = []
+
+    def synthesize(message, lang, path):
+        raise OSError("tidak ada internet")
+
+    voice = VoiceNotifier(str(tmp_path), synthesize=synthesize, play=lambda p: None,
+                          fallback=lambda message, lang: spoken.append(message))
+    voice.start(phrases=())
+    voice.notify("Wajah terdeteksi")
+    voice.stop()
+    assert spoken == ["Wajah terdeteksi"]
+    assert os.listdir(tmp_path) == []
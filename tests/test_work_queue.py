@@ -0,0 +1,79 @@
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.work_queue import WorkQueue, QueueFull, PRIORITY_MANUAL
+
+
+@pytest.fixture
+def foto(tmp_path):
+    def buat(name):
+        path = tmp_path / name
+        path.write_bytes(b"\xff\xd8data\xff\xd9")
+        return str(path)
+    return buat
+
+
+def test_prioritas_manual_didahulukan(tmp_path, foto):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    a, b, c = foto("a.jpg"), foto("b.jpg"), foto("c.jpg")
+    assert q.put(a) and q.put(b)
+    assert q.put(c, PRIORITY_MANUAL)
+    assert not q.put(a)  # path yang masih aktif tidak digandakan
+
+    assert [q.get(timeout=0).path for _ in range(3)] == [c, a, b]
+    assert q.get(timeout=0) is None
+    q.close()
+
+
+def test_batas_antrian_dan_bypass(tmp_path, foto):
+    q = WorkQueue(str(tmp_path / "q.db"), maxsize=2)
+    q.put(foto("a.jpg"))
+    q.put(foto("b.jpg"))
+    with pytest.raises(QueueFull):
+        q.put(foto("c.jpg"), block=False)
+    with pytest.raises(QueueFull):
+        q.put(foto("c.jpg"), timeout=0.05)
+    assert q.put(foto("d.jpg"), PRIORITY_MANUAL, bypass_bound=True)
+
+    q.complete(q.get(timeout=0))
+    assert q.counts()["queued"] == 2
+    q.close()
+
+
+def test_job_run_sebelumnya_dipulihkan(tmp_path, foto):
+    db_path = str(tmp_path / "q.db")
+    path = foto("a.jpg")
+    lama = WorkQueue(db_path)
+    lama.put(path)
+    job = lama.get(timeout=0)
+    lama.close()  # proses mati tanpa complete()
+
+    baru = WorkQueue(db_path)
+    baru.owner = "run-berikutnya"
+    assert baru.seen(path)
+    assert baru.recover() == 1
+    ulang = baru.get(timeout=0)
+    assert ulang.path == path and ulang.id == job.id and ulang.attempts == 2
+    baru.close()
+
+
+def test_lease_kedaluwarsa_diambil_ulang(tmp_path, foto):
+    q = WorkQueue(str(tmp_path / "q.db"), lease_seconds=-1)
+    q.put(foto("a.jpg"))
+    first = q.get(timeout=0)
+    second = q.get(timeout=0)
+    assert second.id == first.id
+    q.close()
+
+
+def test_gagal_dicoba_ulang_lalu_failed(tmp_path, foto):
+    q = WorkQueue(str(tmp_path / "q.db"), max_attempts=2)
+    q.put(foto("a.jpg"))
+    q.fail(q.get(timeout=0), RuntimeError("rusak"))
+    assert q.counts()["queued"] == 1
+    q.fail(q.get(timeout=0), RuntimeError("rusak"))
+    counts = q.counts()
+    assert counts["failed"] == 1 and counts["queued"] == 0
+    assert q.wait_idle(timeout=0)
+    q.close()
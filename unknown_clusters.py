@@ -0,0 +1,283 @@
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+import numpy as np
+
+from face_gallery import ENCODING_DIM, DEFAULT_TOLERANCE
+
+JOIN_DISTANCE = DEFAULT_TOLERANCE  # wajah masuk cluster bila sedekat ini ke centroid
+MERGE_DISTANCE = 0.4  # dua centroid sedekat ini dianggap orang yang sama → digabung
+PROMOTE_SIZE = 3  # minimal kemunculan sebelum dipromosikan jadi personN
+PROMOTE_SPREAD = 0.4  # rata-rata jarak anggota ke centroid harus ≤ ini (cluster rapat)
+
+Assignment = namedtuple("Assignment", "cluster label created distance absorbed")
+
+
+class Cluster:
+    """Centroid + statistik O(1): jumlah anggota, total & maksimum jarak ke centroid"""
+
+    __slots__ = ("id", "centroid", "count", "spread_sum", "radius")
+
+    def __init__(self, cid, centroid, count=1, spread_sum=0.0, radius=0.0):
+        self.id = cid
+        self.centroid = np.asarray(centroid, dtype=np.float32)
+        self.count = count
+        self.spread_sum = spread_sum
+        self.radius = radius
+
+    @property
+    def label(self):
+        return f"unknown{self.id}"
+
+    @property
+    def spread(self):
+        """Rata-rata jarak anggota ke centroid (saat bergabung); kecil = cluster rapat"""
+        return self.spread_sum / self.count
+
+    def add(self, encoding, distance):
+        self.count += 1
+        self.centroid += (encoding - self.centroid) / self.count
+        self.spread_sum += distance
+        self.radius = max(self.radius, distance)
+
+    def absorb(self, other, distance):
+        total = self.count + other.count
+        self.centroid = (self.centroid * self.count + other.centroid * other.count) / total
+        # Anggota kedua sisi bergeser ke centroid gabungan (batas atas, ketidaksamaan segitiga)
+        self.spread_sum += other.spread_sum + 2 * distance * self.count * other.count / total
+        self.radius = max(self.radius + distance * other.count / total, other.radius + distance * self.count / total)
+        self.count = total
+
+
+class UnknownClusters:
+    """
+    Clustering online untuk wajah yang belum dikenal, disimpan di SQLite.
+
+    Wajah yang tidak cocok dengan galeri masuk ke cluster terdekat (atau
+    membuat cluster baru). Centroid yang saling mendekat digabung, dan
+    cluster yang cukup besar & rapat dipromosikan ke galeri oleh pemanggil.
+    Galeri hanya berisi orang yang sudah dipromosikan sehingga tetap kecil.
+    Nomor unknownN & personN diambil dari counter tersimpan, bukan dari
+    menghitung isi folder.
+    """
+
+    def __init__(self, db_path, join_distance=JOIN_DISTANCE, merge_distance=MERGE_DISTANCE,
+                 promote_size=PROMOTE_SIZE, promote_spread=PROMOTE_SPREAD, dim=ENCODING_DIM):
+        self.db_path = db_path
+        self.join_distance = join_distance
+        self.merge_distance = merge_distance
+        self.promote_size = promote_size
+        self.promote_spread = promote_spread
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._conn = None
+        self._clusters = {}
+        self._ids = []
+        self._rows = {}
+        self._matrix = np.zeros((16, dim), dtype=np.float32)
+        self._load()
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clusters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    centroid BLOB NOT NULL,
+                    count INTEGER NOT NULL,
+                    spread_sum REAL NOT NULL DEFAULT 0,
+                    radius REAL NOT NULL DEFAULT 0,
+                    state TEXT NOT NULL DEFAULT 'active',
+                    promoted_to TEXT,
+                    created_at REAL,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _load(self):
+        rows = self._db().execute(
+            "SELECT id, centroid, count, spread_sum, radius FROM clusters WHERE state = 'active' ORDER BY id"
+        ).fetchall()
+        self._clusters = {}
+        for cid, blob, count, spread_sum, radius in rows:
+            centroid = np.frombuffer(blob, dtype=np.float32).copy()
+            self._clusters[cid] = Cluster(cid, centroid, count, spread_sum, radius)
+        self._ids = list(self._clusters)
+        self._rows = {cid: i for i, cid in enumerate(self._ids)}
+        capacity = max(16, len(self._ids))
+        self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        for i, cid in enumerate(self._ids):
+            self._matrix[i] = self._clusters[cid].centroid
+
+    def _append_row(self, cluster):
+        """Tambah centroid di akhir matriks; kapasitas tumbuh 2x lipat seperti FaceGallery"""
+        n = len(self._ids)
+        if n == len(self._matrix):
+            grown = np.zeros((2 * n, self.dim), dtype=np.float32)
+            grown[:n] = self._matrix
+            self._matrix = grown
+        self._matrix[n] = cluster.centroid
+        self._ids.append(cluster.id)
+        self._rows[cluster.id] = n
+
+    def _remove_row(self, cid):
+        """Hapus centroid dengan memindahkan baris terakhir ke posisinya (O(1))"""
+        i = self._rows.pop(cid)
+        last = len(self._ids) - 1
+        if i != last:
+            moved = self._ids[last]
+            self._ids[i] = moved
+            self._matrix[i] = self._matrix[last]
+            self._rows[moved] = i
+        self._ids.pop()
+
+    def __len__(self):
+        return len(self._clusters)
+
+    def __getitem__(self, cid):
+        return self._clusters[cid]
+
+    # ---------------------------------------------------
+    # Counter nama (O(1), tersimpan)
+    # ---------------------------------------------------
+    def reserve(self, name, value):
+        """Pastikan counter `name` minimal `value` (mis. unknownN lama yang sudah ada di disk)"""
+        with self._lock:
+            conn = self._db()
+            if name == "unknown":
+                # Nomor unknownN = id cluster (AUTOINCREMENT), naikkan sequence-nya
+                current = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'clusters'").fetchone()
+                if current is None:
+                    conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('clusters', ?)", (value,))
+                elif current[0] < value:
+                    conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'clusters'", (value,))
+                return
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+                (name, value),
+            )
+
+    def next_number(self, name):
+        """Naikkan & kembalikan counter `name` (mis. 'person' → 1, 2, 3 ...)"""
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            return conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+    # ---------------------------------------------------
+    # Clustering
+    # ---------------------------------------------------
+    def nearest(self, encoding, exclude=None):
+        """(id cluster, jarak) centroid terdekat, atau (None, inf)"""
+        if not self._ids:
+            return None, float("inf")
+        diff = self._matrix[:len(self._ids)] - np.asarray(encoding, dtype=np.float32)
+        dist = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        if exclude is not None:
+            dist[self._rows[exclude]] = np.inf
+        best = int(np.argmin(dist))
+        return self._ids[best], float(dist[best])
+
+    def assign(self, encoding):
+        """
+        Masukkan satu wajah tak dikenal ke cluster, kembalikan Assignment.
+
+        `absorbed` berisi label cluster yang baru saja digabung ke cluster ini;
+        pemanggil memindahkan folder/baris DB-nya ke `label`.
+        """
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            db = self._db()
+            now = time.time()
+            # Cluster baru, penggabungan & centroid akhir tersimpan bersama atau tidak sama sekali
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                cid, distance = self.nearest(encoding)
+                if cid is not None and distance <= self.join_distance:
+                    cluster = self._clusters[cid]
+                    cluster.add(encoding, distance)
+                    self._matrix[self._rows[cid]] = cluster.centroid
+                    created = False
+                else:
+                    cur = db.execute(
+                        "INSERT INTO clusters (centroid, count, created_at, updated_at) VALUES (?, 1, ?, ?)",
+                        (encoding.tobytes(), now, now),
+                    )
+                    cluster = Cluster(cur.lastrowid, encoding.copy())
+                    self._clusters[cluster.id] = cluster
+                    self._append_row(cluster)
+                    distance = 0.0
+                    created = True
+
+                absorbed = self._merge_into(cluster, now)
+                self._save(cluster, now)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                # Statistik di memori mungkin sudah berubah: samakan lagi dengan database
+                self._load()
+                raise
+            return Assignment(cluster.id, cluster.label, created, distance, absorbed)
+
+    def _merge_into(self, cluster, now):
+        """Gabungkan cluster lain yang centroid-nya sudah konvergen ke cluster ini (dalam transaksi assign)"""
+        absorbed = []
+        while len(self._ids) > 1:
+            other_id, distance = self.nearest(cluster.centroid, exclude=cluster.id)
+            if distance > self.merge_distance:
+                break
+            other = self._clusters.pop(other_id)
+            cluster.absorb(other, distance)
+            self._db().execute(
+                "UPDATE clusters SET state = 'merged', promoted_to = ?, updated_at = ? WHERE id = ?",
+                (cluster.label, now, other_id),
+            )
+            self._remove_row(other_id)
+            absorbed.append(other.label)
+        self._matrix[self._rows[cluster.id]] = cluster.centroid
+        return absorbed
+
+    def _save(self, cluster, now):
+        self._db().execute(
+            "UPDATE clusters SET centroid = ?, count = ?, spread_sum = ?, radius = ?, updated_at = ? WHERE id = ?",
+            (cluster.centroid.tobytes(), cluster.count, cluster.spread_sum, cluster.radius, now, cluster.id),
+        )
+
+    def promotable(self, cid):
+        """Cluster cukup besar & rapat untuk jadi model tetap"""
+        cluster = self._clusters.get(cid)
+        return (cluster is not None and cluster.count >= self.promote_size
+                and cluster.spread <= self.promote_spread)
+
+    def promote(self, cid, name):
+        """Keluarkan cluster dari daftar aktif, kembalikan centroid-nya untuk galeri"""
+        with self._lock:
+            cluster = self._clusters.pop(cid)
+            self._remove_row(cid)
+            self._db().execute(
+                "UPDATE clusters SET state = 'promoted', promoted_to = ?, updated_at = ? WHERE id = ?",
+                (name, time.time(), cid),
+            )
+            return cluster.centroid.copy()
+
+    def stats(self):
+        """Jumlah cluster aktif & total wajah di dalamnya"""
+        with self._lock:
+            return {"clusters": len(self._clusters), "faces": sum(c.count for c in self._clusters.values())}
@@ -0,0 +1,176 @@
+import os
+import time
+import threading
+
+from metrics import metrics
+
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SETTLE_SECONDS = 0.5  # debounce event per path
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10.0
+MAX_ATTEMPTS = 10
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+
+def is_photo(path):
+    return path.lower().endswith(PHOTO_EXTENSIONS)
+
+
+def is_complete(path):
+    """File sudah utuh: JPEG diakhiri marker EOI, PNG diakhiri chunk IEND"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(8)
+            f.seek(max(0, size - 1024))
+            tail = f.read()
+    except OSError:
+        return False
+
+    if head.startswith(b"\xff\xd8"):
+        # Sebagian kamera menambahkan padding nol setelah EOI
+        return tail.rstrip(b"\x00").endswith(b"\xff\xd9")
+    if head.startswith(PNG_SIGNATURE):
+        return tail.endswith(PNG_IEND)
+    return False
+
+
+class _Pending:
+    __slots__ = ("last_event", "closed_at", "size", "attempts", "next_check")
+
+    def __init__(self, now):
+        self.last_event = now
+        self.closed_at = None
+        self.size = None
+        self.attempts = 0
+        self.next_check = now + SETTLE_SECONDS
+
+
+class ReadinessTracker:
+    """
+    Tahap ingest: kumpulkan event watcher per path (debounce), pastikan file
+    utuh (ukuran stabil + marker akhir JPEG/PNG) lalu panggil `on_ready`.
+    File yang belum utuh dicek ulang otomatis dengan backoff. Path disimpan
+    absolut, sehingga event watcher (relatif) dan worker (absolut) bertemu
+    di kunci yang sama. on_ready yang mengembalikan False (tidak diantrikan)
+    tidak meninggalkan path dalam status siap.
+    """
+
+    def __init__(self, on_ready, settle=SETTLE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.on_ready = on_ready
+        self.settle = settle
+        self.max_attempts = max_attempts
+        self._pending = {}
+        self._ready_at = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.latencies = []
+        self.given_up = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="upload-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def touch(self, path, closed=False):
+        """Catat event untuk path; closed=True bila penulis sudah menutup file"""
+        path = os.path.abspath(path)
+        now = time.monotonic()
+        with self._cond:
+            if path in self._ready_at:
+                return  # sudah diantrikan, event susulan (mis. closed) diabaikan
+            state = self._pending.get(path)
+            if state is None:
+                state = self._pending[path] = _Pending(now)
+            state.last_event = now
+            if closed:
+                state.closed_at = now
+                state.next_check = now
+            else:
+                state.next_check = max(state.next_check, now + self.settle)
+            self._cond.notify_all()
+
+    def forget(self, path):
+        with self._cond:
+            self._pending.pop(os.path.abspath(path), None)
+
+    def mark_started(self, path):
+        """Dipanggil worker saat mulai memproses; catat latensi closed → proses"""
+        with self._cond:
+            ready_at = self._ready_at.pop(os.path.abspath(path), None)
+            if ready_at is not None:
+                latency = time.monotonic() - ready_at
+                self.latencies.append(latency)
+                metrics.observe("ingest_latency_seconds", latency)
+                del self.latencies[:-1000]
+
+    def latency_report(self):
+        with self._cond:
+            data = sorted(self.latencies)
+        if not data:
+            return "⏳ Latensi file siap → mulai proses: belum ada data."
+        p95 = data[min(len(data) - 1, int(len(data) * 0.95))]
+        return (f"⏳ Latensi file siap → mulai proses: rata-rata {sum(data) / len(data):.2f}s, "
+                f"p95 {p95:.2f}s, maks {data[-1]:.2f}s ({len(data)} foto, {self.given_up} menyerah)")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                due = [p for p, s in self._pending.items() if s.next_check <= now]
+                if not due:
+                    wait = min((s.next_check for s in self._pending.values()), default=now + 1) - now
+                    self._cond.wait(timeout=max(0.05, wait))
+                    continue
+            for path in due:
+                self._check(path)
+
+    def _check(self, path):
+        exists = os.path.exists(path)
+        size = os.path.getsize(path) if exists else None
+        complete = exists and is_complete(path)
+
+        with self._cond:
+            state = self._pending.get(path)
+            if state is None:
+                return
+            if not exists:
+                del self._pending[path]
+                return
+            stable = state.size == size
+            if complete and (stable or state.closed_at is not None):
+                del self._pending[path]
+                # Tanpa event closed, waktu event terakhir dianggap waktu file selesai ditulis
+                self._ready_at[path] = state.closed_at or state.last_event
+                ready = True
+            else:
+                ready = False
+                state.size = size
+                state.attempts += 1
+                if state.attempts > self.max_attempts:
+                    del self._pending[path]
+                    self.given_up += 1
+                    print(f"[⚠️] {os.path.basename(path)} tidak pernah lengkap, dilewati.")
+                    return
+                if complete:
+                    # Marker akhir sudah ada, tinggal pastikan ukuran tidak berubah lagi
+                    delay = 0.1
+                else:
+                    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (state.attempts - 1))
+                state.next_check = time.monotonic() + delay
+
+        if ready and self.on_ready(path) is False:
+            # Tidak diantrikan (mis. sudah pernah diproses): jangan blokir upload berikutnya
+            with self._cond:
+                self._ready_at.pop(path, None)
@@ -0,0 +1,129 @@
+import os
+import queue
+import shutil
+import hashlib
+import threading
+import subprocess
+
+from metrics import metrics
+
+# Kalimat tetap yang dipakai sistem, di-render sekali ke cache
+PHRASES = (
+    "Wajah terdeteksi",
+    "Wajah dan angka terdeteksi",
+    "Wajah baru berhasil disimpan permanen",
+)
+QUEUE_SIZE = 8
+
+
+def _gtts_synthesize(message, lang, path):
+    from gtts import gTTS
+    gTTS(text=message, lang=lang).save(path)
+
+
+def _playsound(path):
+    from playsound import playsound
+    playsound(path)
+
+
+def _offline_say(message, lang):
+    """Cadangan tanpa internet: TTS lokal bila ada, kalau tidak cukup bunyi bel"""
+    for cmd in (["espeak-ng", "-v", lang, message], ["espeak", "-v", lang, message], ["spd-say", "-w", message]):
+        if shutil.which(cmd[0]):
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return
+    print(f"\a🔔 {message}")
+
+
+class VoiceNotifier:
+    """
+    Notifikasi suara non-blocking.
+
+    Klip per kalimat disimpan di cache disk (di-render dengan gTTS sekali),
+    diputar oleh satu thread audio dengan antrian terbatas. Pesan yang sama
+    yang masih menunggu di antrian tidak ditambahkan lagi.
+    """
+
+    def __init__(self, cache_dir, lang="id", maxsize=QUEUE_SIZE,
+                 synthesize=_gtts_synthesize, play=_playsound, fallback=_offline_say):
+        self.cache_dir = cache_dir
+        self.lang = lang
+        self._synthesize = synthesize
+        self._play = play
+        self._fallback = fallback
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+
+    def clip_path(self, message):
+        key = hashlib.sha1(f"{self.lang}:{message}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def ensure_clip(self, message):
+        """Kembalikan path klip dari cache, render bila belum ada (None bila offline)"""
+        path = self.clip_path(message)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            self._synthesize(message, self.lang, tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def start(self, phrases=PHRASES):
+        """Jalankan thread audio; kalimat tetap di-render lebih dulu di thread itu"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(phrases,), name="voice", daemon=True)
+                self._thread.start()
+
+    def notify(self, message):
+        """Antrikan pesan tanpa menunggu; duplikat & antrian penuh diabaikan"""
+        self.start()
+        with self._lock:
+            if message in self._pending:
+                return False
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._pending.add(message)
+            return True
+
+    def stop(self, timeout=5):
+        """Beri kesempatan antrian diputar habis sebelum keluar"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self, phrases):
+        for phrase in phrases:
+            self.ensure_clip(phrase)
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            with self._lock:
+                self._pending.discard(message)
+            with metrics.timer("stage_seconds", stage="tts"):
+                path = self.ensure_clip(message)
+            try:
+                with metrics.timer("stage_seconds", stage="audio"):
+                    if path:
+                        self._play(path)
+                    else:
+                        self._fallback(message, self.lang)
+            except Exception:
+                pass